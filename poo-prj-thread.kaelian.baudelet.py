@@ -25,16 +25,57 @@
 
 # Bonus:
 # - Créer un class Database qui stocke les données dans un fichier/ou une BDD. (Fait)
-# - Créer un class AppApi qui permet d'utiliser l'application via une API REST. (Pas fait)
+# - Créer un class AppApi qui permet d'utiliser l'application via une API REST. (Fait)
 
 import sqlite3 # Utilisation de SQLite3 pour se connecter a une vrai base de donnée
 import random # Utilisation de random.choice() pour selectionenr un post aléatoire
+import bisect # Recherche dichotomique pour la pagination des posts en mémoire
+import time # Horloge monotone pour le commit groupé
+import threading # Verrou d'écriture et connexions de lecture par thread
+import contextlib # Gestionnaires de contexte pour l'accès aux connexions
+import concurrent.futures # Pool de threads pour les benchmarks
+import os # Suppression des fichiers de benchmark
+import sys # Arguments de la ligne de commande
+import asyncio # Version asynchrone de l'application
+import math # Calcul des percentiles et des scores BM25
+import struct # Encodage binaire des sauvegardes
+import mmap # Lecture des sauvegardes sans les charger en entier
+import collections # OrderedDict pour les caches LRU
+import re # Découpage des textes en mots pour la recherche
+import unicodedata # Suppression des accents pour la recherche
+import heapq # Meilleurs résultats de recherche
+import array # Colonnes compactes de ColumnarDatabase
+import gc # Mesures mémoire des benchmarks
+import tracemalloc # Mesures mémoire des benchmarks
+import hashlib # Dérivation des mots de passe (scrypt, ou PBKDF2 à défaut)
+import hmac # Comparaison en temps constant des empreintes
+import secrets # Sels et jetons de session aléatoires
+import functools # Empreinte du mot de passe des benchmarks calculée une seule fois
+import json # Résultats des benchmarks lisibles par machine
+try:
+    import resource # Pic de mémoire des benchmarks (absent sous Windows)
+except ImportError:
+    resource = None
+import cProfile # Profil d'une action de l'app
+import pstats # Mise en forme du profil
+import io # Capture du rapport de profil dans une chaîne
+import builtins # Mesure du temps passé à attendre la saisie pendant une action profilée
+import http.server # Serveur HTTP de l'API REST
+import http.client # Générateur de charge de l'API (connexions persistantes)
+import urllib.parse # Découpage des URL de l'API
+import csv # Import / export des données au format CSV
+import itertools # Reprise d'un import après le point de reprise
+import zlib # crc32 : contrôle des enregistrements sauvegardés et hachage stable des pseudos
+import traceback # Trace des erreurs internes de l'API REST
 
 # Interface IDatabase
 class IDatabase:
     def create_user(self, username, password):
         pass
 
+    def update_password(self, user, password):
+        pass
+
     def get_user(self, username):
         pass
 
@@ -44,33 +85,187 @@ class IDatabase:
     def get_posts(self):
         pass
 
+    def get_post(self, post_id):
+        pass
+
+    def get_posts_by_user(self, username):
+        pass
+
+    def get_comments_for_post(self, post):
+        pass
+
+    def search(self, query, limit=10):
+        pass
+
+    def get_posts_page(self, after_id=None, limit=20):
+        pass
+
+    def iter_posts(self, batch_size=100):
+        pass
+
     def get_random_post(self):
         pass
 
+    def get_random_posts(self, k):
+        pass
+
     def add_comment(self, post, user, text):
         pass
 
+    def follow(self, follower, followee):
+        pass
+
+    def unfollow(self, follower, followee):
+        pass
+
+    def get_timeline(self, user, cursor=None, limit=20):
+        pass
+
+    def get_top_posts(self, k=10):
+        pass
+
+    def create_users_bulk(self, users):
+        pass
+
+    def create_posts_bulk(self, posts):
+        pass
+
+    def add_comments_bulk(self, comments):
+        pass
+
+    def iter_users(self, batch_size=100):
+        pass
+
+    def import_users_bulk(self, users):
+        pass
+
+    def import_posts_bulk(self, posts):
+        pass
+
+    def import_comments_bulk(self, comments):
+        pass
+
+    def close(self):
+        pass
+
 # Model
 
 class DatabaseModel:
+    __slots__ = ("_database",) # Pas de __dict__ par instance : les modèles sont créés par millions
+
     def __init__(self, database: IDatabase):
         self._database = database
 
 # Class de la vrai base de donnée
 
 class RealDatabase(IDatabase):
-    def __init__(self):
-        self.database_connection = sqlite3.connect("database.db")
-        self.cursor = self.database_connection.cursor() # Connection à la base de donnée
-        # Création des tables dans la base de données :
-        self.cursor.execute("""
+    # Requêtes de chargement : l'auteur est récupéré par jointure plutôt qu'avec un get_user par ligne
+    POST_QUERY = """
+        SELECT Posts.id, Posts.username, Users.password, Posts.text
+        FROM Posts LEFT JOIN Users ON Users.username = Posts.username
+    """
+    COMMENT_QUERY = """
+        SELECT Comments.id, Comments.post_id, Comments.username, Users.password, Comments.text
+        FROM Comments LEFT JOIN Users ON Users.username = Comments.username
+    """
+    IN_CHUNK_SIZE = 500 # Nombre max de paramètres par IN (...) (SQLite limite le nombre de variables)
+    RANDOM_MAX_ATTEMPTS = 8 # Nombre de tirages d'ids avant de se rabattre sur ORDER BY RANDOM()
+    FANOUT_LIMIT = 10000 # Au-delà de ce nombre d'abonnés, les posts d'un auteur sont fusionnés à la lecture du fil
+    JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+    SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+    def __init__(self, path="database.db", compact=False, journal_mode="WAL", synchronous="NORMAL",
+                 cache_size=-20000, commit_every=1, commit_interval_ms=None, read_only=False):
+        """
+        Paramètres: path (fichier SQLite), compact (stocke user_id au lieu du pseudo dans les posts et commentaires),
+                    journal_mode, synchronous, cache_size (pragmas SQLite, cache_size négatif = taille en Kio),
+                    commit_every (commit toutes les N lignes écrites, None pour désactiver),
+                    commit_interval_ms (commit si le dernier date de plus de T ms, None pour désactiver),
+                    read_only (lecture seule d'un fichier existant écrit par un autre processus :
+                    ni création du schéma, ni migration, toute écriture lève sqlite3.OperationalError)
+        """
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"journal_mode invalide: {journal_mode}")
+        if synchronous not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous invalide: {synchronous}")
+        self.path = path
+        self.read_only = read_only
+        self.cache_size = int(cache_size)
+        # Une seule connexion d'écriture protégée par un verrou, et une connexion de lecture par thread.
+        # Avec le journal WAL, les lecteurs ne bloquent pas l'écrivain (et inversement).
+        # Une base ":memory:" n'existe que dans sa connexion : tout passe alors par la connexion d'écriture.
+        self.database_connection = self._connect(path) if read_only else sqlite3.connect(path, check_same_thread=False)
+        self._write_lock = threading.RLock()
+        self._shared_connection = path == ":memory:"
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._trace_callback = None # Fonction appelée avec chaque requête SQL exécutée (instrumentation)
+        if not read_only:
+            self.database_connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+        self.database_connection.execute(f"PRAGMA synchronous = {synchronous}")
+        self.database_connection.execute(f"PRAGMA cache_size = {self.cache_size}")
+        # Le trigger de tendance utilise ln() et exp() de SQLite (compilé avec SQLITE_ENABLE_MATH_FUNCTIONS,
+        # comme la commande sqlite3) ; sans elles, des équivalents Python sont fournis à la connexion d'écriture
+        try:
+            self.database_connection.execute("SELECT ln(1), exp(0)")
+        except sqlite3.OperationalError:
+            self.database_connection.create_function("ln", 1, math.log, deterministic=True)
+            self.database_connection.create_function("exp", 1, math.exp, deterministic=True)
+        # Sans FTS5, search() compare les textes normalisés comme les mots de la requête (voir _fold_text)
+        self.database_connection.create_function("fold", 1, _fold_text, deterministic=True)
+        # Commit groupé : plusieurs écritures partagent un même fsync
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval_ms / 1000 if commit_interval_ms is not None else None
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+        self._closed = threading.Event()
+        if not read_only:
+            self._create_tables()
+        # Dans le format compact, Posts et Comments sont des vues sur PostData et CommentData
+        row = self.database_connection.execute("SELECT type FROM sqlite_master WHERE name = 'Posts'").fetchone()
+        if row is None:
+            raise ValueError(f"Base {path} sans schéma : impossible de l'ouvrir en lecture seule")
+        self.compact = row[0] == "view"
+        self._use_layout()
+        if not read_only:
+            self._migrate()
+            if compact and not self.compact:
+                self._convert_to_compact()
+        row = self.database_connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'PostsFts'").fetchone()
+        self.fts_enabled = row[0] > 0 # Faux si SQLite a été compilé sans FTS5
+        if self.commit_interval is not None and not read_only:
+            # Le commit groupé par délai est aussi déclenché en arrière-plan, même sans nouvelle écriture
+            threading.Thread(target=self._flush_periodically, daemon=True).start()
+
+    def _connect(self, path):
+        """
+        Méthode pour ouvrir une connexion qui ne peut pas écrire dans le fichier (lectures, base en lecture seule)
+        Paramètres: path
+        Retourne: une connexion sqlite3
+        """
+        if self.read_only:
+            connection = sqlite3.connect(f"file:{urllib.parse.quote(path)}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute("PRAGMA query_only = ON")
+        connection.create_function("fold", 1, _fold_text, deterministic=True)
+        return connection
+
+    def _create_tables(self):
+        """
+        Méthode pour créer les tables de la base de données si elles n'existent pas
+        """
+        self.database_connection.execute("""
             CREATE TABLE IF NOT EXISTS Users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE NOT NULL,
             password TEXT NOT NULL
             )
         """)
-        self.cursor.execute("""
+        self.database_connection.execute("""
             CREATE TABLE IF NOT EXISTS Posts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT NOT NULL,
@@ -78,7 +273,7 @@ class RealDatabase(IDatabase):
             FOREIGN KEY (username) REFERENCES Users(username)
             )
         """)
-        self.cursor.execute("""
+        self.database_connection.execute("""
             CREATE TABLE IF NOT EXISTS Comments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             post_id INTEGER NOT NULL,
@@ -89,96 +284,281 @@ class RealDatabase(IDatabase):
             )
         """)
 
-    def create_user(self, username, password):
+    @contextlib.contextmanager
+    def _reading(self):
         """
-        Méthode pour créer un utilisateur
-        Paramètres: username, password
-        Retourne: un objet User
+        Méthode pour obtenir la connexion de lecture du thread courant (créée à la première utilisation)
+        Retourne: un gestionnaire de contexte qui fournit une connexion
         """
-        self.cursor.execute("INSERT INTO Users (username, password) VALUES (?, ?)", (username, password))
-        self.database_connection.commit()
-        return User(self, username, password)
+        # Avec le commit groupé, les écritures en attente ne sont visibles que sur la connexion d'écriture :
+        # on y lit tant qu'il en reste, pour qu'un thread retrouve ce qu'il vient d'écrire (inscription puis connexion)
+        if self._shared_connection or self._pending_writes:
+            with self._write_lock:
+                yield self.database_connection
+            return
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect(self.path)
+            connection.execute(f"PRAGMA cache_size = {self.cache_size}")
+            connection.set_trace_callback(self._trace_callback)
+            self._local.connection = connection
+            with self._readers_lock:
+                self._readers.append(connection)
+        yield connection
 
-    def get_user(self, username):
+    def set_trace_callback(self, callback):
         """
-        Méthode pour récupérer un utilisateur
-        Paramètres: username
-        Retourne: un objet User ou None
+        Méthode pour transmettre chaque requête SQL exécutée (y compris dans les triggers) à une fonction
+        Paramètres: callback (fonction qui reçoit le texte de la requête, None pour arrêter)
         """
-        self.cursor.execute("SELECT username, password FROM Users WHERE username = ?", (username,))
-        col = self.cursor.fetchone()
-        if col:
-            return User(self, col[0], col[1])
-        return None
+        self._trace_callback = callback
+        with self._write_lock:
+            self.database_connection.set_trace_callback(callback)
+        with self._readers_lock:
+            for connection in self._readers:
+                connection.set_trace_callback(callback)
 
-    def create_post(self, user, text):
+    @contextlib.contextmanager
+    def _writing(self):
         """
-        Méthode pour créer un post
-        Paramètres: user, text
-        Retourne: un objet Post
+        Méthode pour obtenir la connexion d'écriture (un seul écrivain à la fois)
+        Retourne: un gestionnaire de contexte qui fournit une connexion
         """
-        self.cursor.execute("INSERT INTO Posts (username, text) VALUES (?, ?)", (user.username, text))
-        self.database_connection.commit()
-        post_id = self.cursor.lastrowid
-        return Post(self, post_id, user, text)
+        with self._write_lock:
+            yield self.database_connection
 
-    def get_posts(self):
+    def _migrate(self):
         """
-        Méthode pour récupérer tous les posts
-        Retourne: une liste d'objets Post
+        Méthode pour mettre à jour le schéma d'un fichier existant (version stockée dans PRAGMA user_version)
         """
-        self.cursor.execute("SELECT id, username, text FROM Posts")
-        rows = self.cursor.fetchall()
-        posts = []
-        for row in rows:
-            user = self.get_user(row[1])
-            post = Post(self, row[0], user, row[2])
-            post.comments = self.get_comments_for_post(post)
-            posts.append(post)
-        return posts
+        version = self.database_connection.execute("PRAGMA user_version").fetchone()[0]
+        migrations = [
+            self._migration_1_indexes, self._migration_2_search, self._migration_3_timeline,
+            self._migration_4_trending, self._migration_5_trending_sql
+        ]
+        for number, migration in enumerate(migrations, start=1):
+            if version < number:
+                migration()
+                self.database_connection.execute(f"PRAGMA user_version = {number}")
+                self.database_connection.commit()
 
-    def get_comments_for_post(self, post):
+    def _migration_1_indexes(self):
         """
-        Méthode pour récupérer les commentaires d'un post
-        Paramètres: post
-        Retourne: une liste d'objets Comment
+        Migration 1 : index sur les clés utilisées par le chargement du feed
         """
-        self.cursor.execute("SELECT id, username, text FROM Comments WHERE post_id = ?", (post.id,))
-        rows = self.cursor.fetchall()
-        comments = []
-        for row in rows:
-            user = self.get_user(row[1])
-            comment = Comment(self, row[0], post, user, row[2])
-            comments.append(comment)
-        return comments
+        if self.compact:
+            return # Les index du format compact sont créés par _convert_to_compact
+        # Commentaires d'un post : évite un parcours complet de Comments pour chaque post,
+        # le pseudo est inclus pour que la jointure avec Users se fasse depuis l'index
+        self.database_connection.execute("CREATE INDEX IF NOT EXISTS idx_comments_post_id ON Comments (post_id, username)")
+        # Posts d'un utilisateur : index couvrant pour les requêtes qui ne lisent que les ids
+        self.database_connection.execute("CREATE INDEX IF NOT EXISTS idx_posts_username ON Posts (username)")
 
-    def get_random_post(self):
+    def _migration_2_search(self):
         """
-        Méthode pour récupérer un post aléatoire
-        Retourne: un objet Post ou None
+        Migration 2 : index plein texte FTS5 sur les posts et les commentaires
         """
-        posts = self.get_posts()
-        if not posts:
-            return None
-        return random.choice(posts)
+        try:
+            self._create_search_index()
+        except sqlite3.OperationalError:
+            pass # FTS5 indisponible : search() utilisera LIKE
 
-    def add_comment(self, post, user, text):
+    def _create_search_index(self):
         """
-        Méthode pour ajouter un commentaire
-        Paramètres: post, user, text
-        Retourne: un objet Comment
+        Méthode pour (re)créer les tables FTS5 des posts et commentaires, leurs triggers de synchronisation,
+        et les remplir à partir des tables existantes
+        """
+        connection = self.database_connection
+        for table in ("PostsFts", "CommentsFts"):
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+        # Tables "external content" : le texte n'est pas dupliqué, seul l'index est stocké
+        connection.execute(f"CREATE VIRTUAL TABLE PostsFts USING fts5(text, content='{self.posts_table}', content_rowid='id')")
+        connection.execute(f"CREATE VIRTUAL TABLE CommentsFts USING fts5(text, content='{self.comments_table}', content_rowid='id')")
+        for fts_table, table in (("PostsFts", self.posts_table), ("CommentsFts", self.comments_table)):
+            prefix = fts_table.lower()
+            connection.execute(f"DROP TRIGGER IF EXISTS {prefix}_insert")
+            connection.execute(f"DROP TRIGGER IF EXISTS {prefix}_delete")
+            connection.execute(f"DROP TRIGGER IF EXISTS {prefix}_update")
+            connection.execute(f"""
+                CREATE TRIGGER {prefix}_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts_table} (rowid, text) VALUES (new.id, new.text);
+                END
+            """)
+            connection.execute(f"""
+                CREATE TRIGGER {prefix}_delete AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, text) VALUES ('delete', old.id, old.text);
+                END
+            """)
+            connection.execute(f"""
+                CREATE TRIGGER {prefix}_update AFTER UPDATE OF text ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, text) VALUES ('delete', old.id, old.text);
+                    INSERT INTO {fts_table} (rowid, text) VALUES (new.id, new.text);
+                END
+            """)
+            connection.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+        connection.commit()
+
+    def _migration_3_timeline(self):
+        """
+        Migration 3 : abonnements et fils d'actualité précalculés (remplis à partir des posts existants)
         """
-        self.cursor.execute("INSERT INTO Comments (post_id, username, text) VALUES (?, ?, ?)", (post.id, user.username, text))
+        self.database_connection.execute("""
+            CREATE TABLE IF NOT EXISTS Follows (
+            follower TEXT NOT NULL,
+            followee TEXT NOT NULL,
+            PRIMARY KEY (follower, followee)
+            ) WITHOUT ROWID
+        """)
+        self.database_connection.execute("CREATE INDEX IF NOT EXISTS idx_follows_followee ON Follows (followee, follower)")
+        self.database_connection.execute("""
+            CREATE TABLE IF NOT EXISTS Timeline (
+            username TEXT NOT NULL,
+            post_id INTEGER NOT NULL,
+            PRIMARY KEY (username, post_id)
+            ) WITHOUT ROWID
+        """)
+        self.database_connection.execute("INSERT OR IGNORE INTO Timeline (username, post_id) SELECT username, id FROM Posts")
+        self._create_timeline_trigger()
+
+    def _migration_4_trending(self):
+        """
+        Migration 4 : nombre de commentaires et score de tendance dénormalisés dans les posts
+        Les posts existants n'ont pas de date : leurs commentaires sont comptés comme faits maintenant.
+        """
+        connection = self.database_connection
+        connection.execute(f"ALTER TABLE {self.posts_table} ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0")
+        connection.execute(f"ALTER TABLE {self.posts_table} ADD COLUMN hot REAL NOT NULL DEFAULT 0")
+        now = hot_points(time.time())
+        connection.execute(f"UPDATE {self.posts_table} SET hot = ?", (now,))
+        counts = connection.execute(f"SELECT post_id, COUNT(*) FROM {self.comments_table} GROUP BY post_id").fetchall()
+        connection.executemany(
+            f"UPDATE {self.posts_table} SET comment_count = ?, hot = ? WHERE id = ?",
+            ((count, now + math.log1p(count), post_id) for post_id, count in counts)
+        )
+        connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.posts_table.lower()}_hot ON {self.posts_table} (hot)")
+        self._create_trending_trigger()
+
+    def _migration_5_trending_sql(self):
+        """
+        Migration 5 : trigger de tendance recréé en SQL pur (l'ancien appelait une fonction Python enregistrée
+        sur la connexion de l'app : les autres clients SQLite ne pouvaient plus ajouter de commentaire)
+        """
+        self._create_trending_trigger()
+
+    def _create_trending_trigger(self):
+        """
+        Méthode pour (re)créer le trigger qui tient à jour le nombre de commentaires et le score de tendance
+        d'un post à chaque nouveau commentaire (y compris les écritures groupées et les imports)
+        Le score est calculé comme hot_add, en SQL : max + ln(1 + exp(min - max)).
+        """
+        self.database_connection.execute("DROP TRIGGER IF EXISTS trending_comment")
+        self.database_connection.execute(f"""
+            CREATE TRIGGER trending_comment AFTER INSERT ON {self.comments_table} BEGIN
+                UPDATE {self.posts_table} SET comment_count = comment_count + 1, hot = (
+                    SELECT MAX(hot, now) + ln(1 + exp(MIN(hot, now) - MAX(hot, now))) FROM (SELECT {HOT_NOW_SQL} AS now)
+                )
+                WHERE id = new.post_id;
+            END
+        """)
+
+    def _create_timeline_trigger(self):
+        """
+        Méthode pour (re)créer le trigger de fan-out : chaque nouveau post est ajouté au fil de son auteur
+        et de ses abonnés, sauf si l'auteur a plus de FANOUT_LIMIT abonnés (fusion à la lecture)
+        Le trigger couvre aussi les écritures groupées (executemany).
+        """
+        if self.compact:
+            author = "(SELECT username FROM Users WHERE id = new.user_id)"
+        else:
+            author = "new.username"
+        self.database_connection.execute("DROP TRIGGER IF EXISTS timeline_fanout")
+        self.database_connection.execute(f"""
+            CREATE TRIGGER timeline_fanout AFTER INSERT ON {self.posts_table} BEGIN
+                INSERT OR IGNORE INTO Timeline (username, post_id) VALUES ({author}, new.id);
+                INSERT OR IGNORE INTO Timeline (username, post_id)
+                SELECT follower, new.id FROM Follows
+                WHERE followee = {author}
+                AND (SELECT COUNT(*) FROM (SELECT 1 FROM Follows WHERE followee = {author} LIMIT {self.FANOUT_LIMIT + 1})) <= {self.FANOUT_LIMIT};
+            END
+        """)
+
+    def _convert_to_compact(self):
+        """
+        Méthode pour passer au format compact : les posts et commentaires stockent l'id entier de
+        l'utilisateur au lieu de répéter son pseudo. Les vues Posts et Comments gardent les mêmes
+        colonnes, donc les requêtes de lecture ne changent pas.
+        """
+        self.database_connection.execute("BEGIN")
+        self.database_connection.execute("""
+            CREATE TABLE PostData (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            text TEXT NOT NULL,
+            comment_count INTEGER NOT NULL DEFAULT 0,
+            hot REAL NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES Users(id)
+            )
+        """)
+        self.database_connection.execute("""
+            CREATE TABLE CommentData (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            post_id INTEGER NOT NULL,
+            user_id INTEGER,
+            text TEXT NOT NULL,
+            FOREIGN KEY (post_id) REFERENCES PostData(id),
+            FOREIGN KEY (user_id) REFERENCES Users(id)
+            )
+        """)
+        self.database_connection.execute("""
+            INSERT INTO PostData (id, user_id, text, comment_count, hot)
+            SELECT Posts.id, Users.id, Posts.text, Posts.comment_count, Posts.hot FROM Posts LEFT JOIN Users ON Users.username = Posts.username
+        """)
+        self.database_connection.execute("""
+            INSERT INTO CommentData (id, post_id, user_id, text)
+            SELECT Comments.id, Comments.post_id, Users.id, Comments.text FROM Comments LEFT JOIN Users ON Users.username = Comments.username
+        """)
+        self.database_connection.execute("DROP TABLE Comments")
+        self.database_connection.execute("DROP TABLE Posts")
+        self.database_connection.execute("""
+            CREATE VIEW Posts AS
+            SELECT PostData.id AS id, Users.username AS username, PostData.text AS text
+            FROM PostData LEFT JOIN Users ON Users.id = PostData.user_id
+        """)
+        self.database_connection.execute("""
+            CREATE VIEW Comments AS
+            SELECT CommentData.id AS id, CommentData.post_id AS post_id, Users.username AS username, CommentData.text AS text
+            FROM CommentData LEFT JOIN Users ON Users.id = CommentData.user_id
+        """)
+        self.database_connection.execute("CREATE INDEX idx_commentdata_post_id ON CommentData (post_id, user_id)")
+        self.database_connection.execute("CREATE INDEX idx_postdata_user_id ON PostData (user_id)")
+        self.database_connection.execute("CREATE INDEX idx_postdata_hot ON PostData (hot)")
+        self.database_connection.commit()
+        self.compact = True
+        self._use_layout()
+        row = self.database_connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'PostsFts'").fetchone()
+        if row[0]:
+            self._create_search_index() # L'index plein texte suit les nouvelles tables
+        self._create_timeline_trigger()
+        self._create_trending_trigger()
         self.database_connection.commit()
-        comment_id = self.cursor.lastrowid
-        return Comment(self, comment_id, post, user, text)
-    
-# Class de la fausse base de donnée
 
-class InMemoryDatabase(IDatabase):
-    def __init__(self):
-        self.users = {}
-        self.posts = []
+    def _use_layout(self):
+        """
+        Méthode pour choisir les tables et requêtes d'écriture selon le format (classique ou compact)
+        """
+        if self.compact:
+            self.posts_table = "PostData"
+            self.comments_table = "CommentData"
+            self.insert_post_sql = f"INSERT INTO PostData (id, user_id, text, hot) VALUES (:id, (SELECT id FROM Users WHERE username = :username), :text, {HOT_NOW_SQL})"
+            self.insert_comment_sql = "INSERT INTO CommentData (id, post_id, user_id, text) VALUES (:id, :post_id, (SELECT id FROM Users WHERE username = :username), :text)"
+        else:
+            self.posts_table = "Posts"
+            self.comments_table = "Comments"
+            self.insert_post_sql = f"INSERT INTO Posts (id, username, text, hot) VALUES (:id, :username, :text, {HOT_NOW_SQL})"
+            self.insert_comment_sql = "INSERT INTO Comments (id, post_id, username, text) VALUES (:id, :post_id, :username, :text)"
+        # Import : les ids sont fournis et les lignes déjà présentes sont ignorées (reprise sans doublon)
+        self.import_post_sql = self.insert_post_sql.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+        self.import_comment_sql = self.insert_comment_sql.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
 
     def create_user(self, username, password):
         """
@@ -186,11 +566,20 @@ class InMemoryDatabase(IDatabase):
         Paramètres: username, password
         Retourne: un objet User
         """
-        if username in self.users:
-            print("\033[0;31m⚠ L'utilisateur existe déjà\033[0m")
-        user = User(self, username, password)
-        self.users[username] = user
-        return user
+        with self._writing() as connection:
+            connection.execute("INSERT INTO Users (username, password) VALUES (?, ?)", (username, password))
+            self._written()
+        return User(self, username, password)
+
+    def update_password(self, user, password):
+        """
+        Méthode pour remplacer le mot de passe enregistré d'un utilisateur (ex : empreinte d'un ancien mot de passe en clair)
+        Paramètres: user, password
+        """
+        with self._writing() as connection:
+            connection.execute("UPDATE Users SET password = ? WHERE username = ?", (password, user.username))
+            self._written()
+        user.password = password
 
     def get_user(self, username):
         """
@@ -198,7 +587,11 @@ class InMemoryDatabase(IDatabase):
         Paramètres: username
         Retourne: un objet User ou None
         """
-        return self.users.get(username)
+        with self._reading() as connection:
+            col = connection.execute("SELECT username, password FROM Users WHERE username = ?", (username,)).fetchone()
+        if col:
+            return User(self, col[0], col[1])
+        return None
 
     def create_post(self, user, text):
         """
@@ -206,147 +599,3691 @@ class InMemoryDatabase(IDatabase):
         Paramètres: user, text
         Retourne: un objet Post
         """
-        post_id = len(self.posts) + 1
-        post = Post(self, post_id, user, text)
-        self.posts.append(post)
-        return post
-    
+        with self._writing() as connection:
+            post_id = connection.execute(self.insert_post_sql, {"id": None, "username": user.username, "text": text}).lastrowid
+            self._written()
+        return Post(self, post_id, user, text)
+
     def get_posts(self):
         """
         Méthode pour récupérer tous les posts
         Retourne: une liste d'objets Post
         """
-        return self.posts
+        # Deux requêtes au total (posts + commentaires), quelle que soit la taille du feed
+        users = {}
+        with self._reading() as connection:
+            posts = [self._post_from_row(row, users) for row in connection.execute(self.POST_QUERY + " ORDER BY Posts.id")]
+            posts_by_id = {post.id: post for post in posts}
+            for row in connection.execute(self.COMMENT_QUERY + " ORDER BY Comments.id"):
+                post = posts_by_id.get(row[1])
+                if post:
+                    post.comments.append(self._comment_from_row(row, post, users))
+        return posts
 
-    def get_random_post(self):
+    def get_post(self, post_id):
         """
-        Méthode pour récupérer un post aléatoire
+        Méthode pour récupérer un post par son id
+        Paramètres: post_id
         Retourne: un objet Post ou None
         """
-
-        if not self.posts:
+        with self._reading() as connection:
+            posts = self._get_posts_by_ids(connection, [post_id])
+        if not posts:
             return None
-        return random.choice(self.posts)
+        return posts[0]
 
-    def add_comment(self, post, user, text):
+    def get_posts_by_user(self, username):
         """
-        Méthode pour ajouter un commentaire
-        Paramètres: post, user, text
-        Retourne: un objet Comment
+        Méthode pour récupérer les posts d'un utilisateur (index idx_posts_username)
+        Paramètres: username
+        Retourne: une liste d'objets Post
         """
-        return post.add_comment(user, text)
-
-# Class des Posts
-
-class Post(DatabaseModel):
-    def __init__(self, database, post_id, user, text):
-        super().__init__(database)
-        self.id = post_id
-        self.user = user
-        self.text = text
-        self.comments = []
+        with self._reading() as connection:
+            rows = connection.execute(self.POST_QUERY + " WHERE Posts.username = ? ORDER BY Posts.id", (username,)).fetchall()
+            return self._load_posts(connection, rows)
 
-    def __str__(self):
-        return f"{self.user} : {self.text}"
-
-    def add_comment(self, user, text):
+    def search(self, query, limit=10):
         """
-        Méthode pour ajouter un commentaire
-        Paramètres: user, text
-        Retourne: un objet Comment
+        Méthode pour rechercher des posts par mots-clés dans leur texte et celui de leurs commentaires
+        Les résultats sont classés par pertinence (BM25 de FTS5, scores du post et de ses commentaires additionnés).
+        Sans FTS5, les posts dont le texte ou un commentaire contient les mots de la requête à la suite sont
+        renvoyés sans classement ; textes et requête sont normalisés de la même façon (accents, casse, ponctuation).
+        Paramètres: query, limit
+        Retourne: une liste d'objets Post
         """
-        comment = Comment(self._database, None, self, user, text)
-        self.comments.append(comment)
-        return comment
-
-# Class des Commentaires
-
-class Comment(DatabaseModel):
-    def __init__(self, database, comment_id, post, user, text):
-        super().__init__(database)
-        self.id = comment_id
-        self.post = post
-        self.user = user
-        self.text = text
-
-    def __str__(self):
-        return f"{self.user}: {self.text}"
-    
-# Class des Utilisateurs
-
-class User(DatabaseModel):
-    def __init__(self, database, username, password):
-        super().__init__(database)
-        self.username = username
-        self.password = password
-
-    def __str__(self):
-        return f"{self.username}"
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._reading() as connection:
+            if self.fts_enabled:
+                # Chaque mot est mis entre guillemets pour ne pas être interprété comme syntaxe FTS5
+                match = " OR ".join(f'"{term}"' for term in terms)
+                rows = connection.execute(f"""
+                    SELECT post_id FROM (
+                        SELECT rowid AS post_id, bm25(PostsFts) AS score FROM PostsFts WHERE PostsFts MATCH :match
+                        UNION ALL
+                        SELECT {self.comments_table}.post_id, bm25(CommentsFts) FROM CommentsFts
+                        JOIN {self.comments_table} ON {self.comments_table}.id = CommentsFts.rowid
+                        WHERE CommentsFts MATCH :match
+                    ) GROUP BY post_id ORDER BY SUM(score) LIMIT :limit
+                """, {"match": match, "limit": limit}).fetchall()
+            else:
+                pattern = "%" + " ".join(terms) + "%"
+                rows = connection.execute(
+                    "SELECT id FROM Posts WHERE fold(text) LIKE :pattern UNION SELECT post_id FROM Comments WHERE fold(text) LIKE :pattern LIMIT :limit",
+                    {"pattern": pattern, "limit": limit}
+                ).fetchall()
+            return self._get_posts_by_ids(connection, [row[0] for row in rows])
 
-    def create_post(self, text):
+    def follow(self, follower, followee):
         """
-        Méthode pour créer un post
-        Paramètres: text
-        Retourne: un objet Post
+        Méthode pour abonner un utilisateur à un autre ; les posts existants de l'auteur sont ajoutés au fil
+        Paramètres: follower, followee
         """
-        return self._database.create_post(self, text)
+        if follower.username == followee.username:
+            raise ValueError("Un utilisateur ne peut pas se suivre lui-même")
+        with self._writing() as connection:
+            connection.execute("INSERT OR IGNORE INTO Follows (follower, followee) VALUES (?, ?)", (follower.username, followee.username))
+            connection.execute(
+                "INSERT OR IGNORE INTO Timeline (username, post_id) SELECT ?, id FROM Posts WHERE username = ?",
+                (follower.username, followee.username)
+            )
+            self._written()
 
-# Class principal de l'app
+    def unfollow(self, follower, followee):
+        """
+        Méthode pour désabonner un utilisateur d'un autre ; les posts de l'auteur sont retirés du fil
+        Paramètres: follower, followee
+        """
+        with self._writing() as connection:
+            connection.execute("DELETE FROM Follows WHERE follower = ? AND followee = ?", (follower.username, followee.username))
+            connection.execute(
+                "DELETE FROM Timeline WHERE username = ? AND post_id IN (SELECT id FROM Posts WHERE username = ?)",
+                (follower.username, followee.username)
+            )
+            self._written()
 
-class App:
-    
-    def __init__(self, database: IDatabase):
-        self._database = database
-        self.current_user = None
+    def get_timeline(self, user, cursor=None, limit=20):
+        """
+        Méthode pour récupérer le fil d'actualité d'un utilisateur (ses posts et ceux des comptes suivis)
+        Le fil est lu dans la table Timeline, sans parcourir Posts ; seuls les posts des comptes
+        au-delà de FANOUT_LIMIT abonnés sont lus à part, par l'index idx_posts_username.
+        Paramètres: user, cursor (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post, du plus récent au plus ancien
+        """
+        before = cursor if cursor is not None else sys.maxsize
+        with self._reading() as connection:
+            post_ids = {row[0] for row in connection.execute(
+                "SELECT post_id FROM Timeline WHERE username = ? AND post_id < ? ORDER BY post_id DESC LIMIT ?",
+                (user.username, before, limit)
+            )}
+            celebrities = connection.execute(f"""
+                SELECT followee FROM Follows AS f WHERE follower = ?
+                AND (SELECT COUNT(*) FROM (SELECT 1 FROM Follows WHERE followee = f.followee LIMIT {self.FANOUT_LIMIT + 1})) > {self.FANOUT_LIMIT}
+            """, (user.username,)).fetchall()
+            for (celebrity,) in celebrities:
+                post_ids.update(row[0] for row in connection.execute(
+                    "SELECT id FROM Posts WHERE username = ? AND id < ? ORDER BY id DESC LIMIT ?", (celebrity, before, limit)
+                ))
+            return self._get_posts_by_ids(connection, sorted(post_ids, reverse=True)[:limit])
 
-    def disconnect(self):
+    def get_top_posts(self, k=10):
         """
-        Méthode pour déconnecter l'utilisateur
+        Méthode pour récupérer les posts les plus tendance (commentaires récents pondérés par leur âge)
+        Les k premiers ids sont lus dans l'index idx_posts_hot, sans compter les commentaires.
+        Paramètres: k
+        Retourne: une liste d'objets Post, du plus au moins tendance
         """
-        if self.current_user:
-            print(f"\033[0;32mL'utilisateur \033[1;33m{self.current_user}\033[0;32m à été déconnecté\033[0m")
-            self.current_user = None
-            input()
-        else:
-            print("\033[0;31m⚠ Vous n'etes pas connecté\033[0m")
-            input()
+        scores = self.get_top_post_scores(k)
+        with self._reading() as connection:
+            posts = self._get_posts_by_ids(connection, [post_id for post_id, score, comment_count in scores])
+        comment_counts = {post_id: comment_count for post_id, score, comment_count in scores}
+        for post in posts:
+            post.comment_count = comment_counts[post.id]
+        return posts
 
-    def signup(self):
+    def get_top_post_scores(self, k=10):
         """
-        Méthode pour inscrire un utilisateur
+        Méthode pour récupérer les ids, scores de tendance et nombres de commentaires des k meilleurs posts
+        (fusion entre plusieurs bases)
+        Paramètres: k
+        Retourne: une liste de tuples (post_id, score, comment_count), du plus au moins tendance
         """
-        try:
-            username = input('Entréer un nom d\'utilisateur: ')
-            password = input('Entréer un mot de passe: ')
-            self._database.create_user(username, password)
-            print(f"\033[0;32mL'utilisateur {username} à été créer avec succès\033[0m")
-        except:
-             print("\033[0;31m⚠ L'utilisateur existe déjà.\033[0m")
-        input()
+        with self._reading() as connection:
+            return connection.execute(f"SELECT id, hot, comment_count FROM {self.posts_table} ORDER BY hot DESC, id DESC LIMIT ?", (k,)).fetchall()
 
-    def login(self):
+    def get_post_count(self):
         """
-        Méthode pour connecter un utilisateur
+        Méthode pour compter les posts (tirages aléatoires répartis entre plusieurs bases)
+        Retourne: le nombre de posts
         """
-        username = input("Entrer votre nom d'utilisateur: ")
-        password = input("Entrer votre mot de passe: ")
-        user = self._database.get_user(password)
-        if user and user.password == password:
-            self.current_user = user
-            print(f"\033[0;32mL'utilisateur {username} est connecté\033[0m")
-        else:
-             print("\033[0;31m⚠ Mauvais nom d'utilisateur ou mot de passe.\033[0m")
-        input()
+        with self._reading() as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM {self.posts_table}").fetchone()[0]
 
-    def create_post(self):
+    def get_last_ids(self):
         """
-        Méthode pour créer un post
+        Méthode pour récupérer les plus grands ids de posts et de commentaires (lus dans la clé primaire, sans parcours)
+        Retourne: un tuple (dernier id de post, dernier id de commentaire), 0 si la table est vide
         """
-        if self.current_user:
+        with self._reading() as connection:
+            last_post_id = connection.execute(f"SELECT MAX(id) FROM {self.posts_table}").fetchone()[0]
+            last_comment_id = connection.execute(f"SELECT MAX(id) FROM {self.comments_table}").fetchone()[0]
+        return last_post_id or 0, last_comment_id or 0
 
-            self.current_user.create_post(input("Entrer le texte du post: "))
-            print("\033[1;32mPost créer avec succès\033[0m")
-        else:
+    def get_posts_page(self, after_id=None, limit=20):
+        """
+        Méthode pour récupérer une page de posts (pagination par curseur sur l'id)
+        Paramètres: after_id (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post
+        """
+        with self._reading() as connection:
+            rows = connection.execute(self.POST_QUERY + " WHERE Posts.id > ? ORDER BY Posts.id LIMIT ?", (after_id or 0, limit)).fetchall()
+            return self._load_posts(connection, rows)
+
+    def iter_posts(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les posts sans les garder en mémoire (un paquet lu par id à la fois)
+        Chaque paquet est lu puis la connexion est rendue avant de le renvoyer : un parcours en cours
+        ne bloque pas les écritures, même quand la lecture passe par la connexion d'écriture.
+        Paramètres: batch_size
+        Retourne: un générateur d'objets Post
+        """
+        users = {}
+        last_id = 0
+        while True:
+            with self._reading() as connection:
+                rows = connection.execute(self.POST_QUERY + " WHERE Posts.id > ? ORDER BY Posts.id LIMIT ?", (last_id, batch_size)).fetchall()
+                posts = self._load_posts(connection, rows, users)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            yield from posts
+
+    def get_comments_for_post(self, post):
+        """
+        Méthode pour récupérer les commentaires d'un post
+        Paramètres: post
+        Retourne: une liste d'objets Comment
+        """
+        with self._reading() as connection:
+            self._load_comments(connection, [post])
+        return post.comments
+
+    def _load_posts(self, connection, rows, users=None):
+        """
+        Méthode pour construire des posts complets (auteurs et commentaires) à partir de lignes SQL
+        Paramètres: connection, rows (id, username, password, text), users (identity map optionnelle)
+        Retourne: une liste d'objets Post
+        """
+        if users is None:
+            users = {}
+        posts = [self._post_from_row(row, users) for row in rows]
+        self._load_comments(connection, posts, users)
+        return posts
+
+    def _load_comments(self, connection, posts, users=None):
+        """
+        Méthode pour charger les commentaires d'une liste de posts par paquets de IN (...)
+        Paramètres: connection, posts, users (identity map optionnelle)
+        """
+        if users is None:
+            users = {}
+        posts_by_id = {post.id: post for post in posts}
+        for post in posts:
+            post.comments = []
+        post_ids = list(posts_by_id)
+        for start in range(0, len(post_ids), self.IN_CHUNK_SIZE):
+            chunk = post_ids[start:start + self.IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in connection.execute(self.COMMENT_QUERY + f" WHERE Comments.post_id IN ({placeholders}) ORDER BY Comments.id", chunk):
+                post = posts_by_id[row[1]]
+                post.comments.append(self._comment_from_row(row, post, users))
+
+    def _user_from_row(self, username, password, users):
+        """
+        Méthode pour récupérer un utilisateur depuis l'identity map (créé une seule fois par chargement)
+        Paramètres: username, password (None si l'utilisateur n'existe pas), users
+        Retourne: un objet User ou None
+        """
+        user = users.get(username)
+        if user is None and password is not None:
+            user = User(self, username, password)
+            users[username] = user
+        return user
+
+    def _post_from_row(self, row, users):
+        """
+        Méthode pour construire un post à partir d'une ligne de POST_QUERY
+        Paramètres: row, users
+        Retourne: un objet Post
+        """
+        return Post(self, row[0], self._user_from_row(row[1], row[2], users), row[3])
+
+    def _comment_from_row(self, row, post, users):
+        """
+        Méthode pour construire un commentaire à partir d'une ligne de COMMENT_QUERY
+        Paramètres: row, post, users
+        Retourne: un objet Comment
+        """
+        return Comment(self, row[0], post, self._user_from_row(row[2], row[3], users), row[4])
+
+    def get_random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire
+        Retourne: un objet Post ou None
+        """
+        posts = self.get_random_posts(1)
+        if not posts:
+            return None
+        return posts[0]
+
+    def get_random_posts(self, k):
+        """
+        Méthode pour récupérer k posts aléatoires distincts sans charger tout le feed
+        Les ids sont tirés dans [MIN(id), MAX(id)] et rejetés s'ils n'existent plus,
+        ce qui garde un tirage uniforme même quand des posts ont été supprimés.
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        if k <= 0:
+            return []
+        with self._reading() as connection:
+            return self._sample_posts(connection, k)
+
+    def _sample_posts(self, connection, k):
+        """
+        Méthode pour tirer k posts distincts avec une connexion donnée (voir get_random_posts)
+        Paramètres: connection, k
+        Retourne: une liste d'objets Post
+        """
+        low, high = connection.execute(f"SELECT (SELECT MIN(id) FROM {self.posts_table}), (SELECT MAX(id) FROM {self.posts_table})").fetchone()
+        if low is None:
+            return []
+        span = high - low + 1
+        chosen = []
+        tried = set()
+        for _ in range(self.RANDOM_MAX_ATTEMPTS):
+            missing = k - len(chosen)
+            if missing <= 0 or len(tried) >= span:
+                break
+            candidates = []
+            while len(candidates) < min(2 * missing, self.IN_CHUNK_SIZE, span - len(tried)):
+                candidate = random.randint(low, high)
+                if candidate not in tried:
+                    tried.add(candidate)
+                    candidates.append(candidate)
+            placeholders = ", ".join("?" * len(candidates))
+            existing = {row[0] for row in connection.execute(f"SELECT id FROM {self.posts_table} WHERE id IN ({placeholders})", candidates)}
+            chosen.extend([candidate for candidate in candidates if candidate in existing][:missing])
+        missing = k - len(chosen)
+        if missing > 0 and len(tried) < span:
+            # Trop de trous dans les ids : on complète avec un tirage SQL (uniforme mais linéaire)
+            already_chosen = set(chosen)
+            rows = connection.execute(f"SELECT id FROM {self.posts_table} ORDER BY RANDOM() LIMIT ?", (k + len(chosen),))
+            rest = [row[0] for row in rows if row[0] not in already_chosen]
+            chosen.extend(rest[:missing])
+        return self._get_posts_by_ids(connection, chosen)
+
+    def _get_posts_by_ids(self, connection, post_ids):
+        """
+        Méthode pour charger des posts complets à partir de leurs ids, dans l'ordre donné
+        Paramètres: connection, post_ids
+        Retourne: une liste d'objets Post (les ids inexistants sont ignorés)
+        """
+        users = {}
+        posts_by_id = {}
+        for start in range(0, len(post_ids), self.IN_CHUNK_SIZE):
+            chunk = post_ids[start:start + self.IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in connection.execute(self.POST_QUERY + f" WHERE Posts.id IN ({placeholders})", chunk):
+                posts_by_id[row[0]] = self._post_from_row(row, users)
+        posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+        self._load_comments(connection, posts, users)
+        return posts
+
+    def add_comment(self, post, user, text):
+        """
+        Méthode pour ajouter un commentaire
+        Paramètres: post, user, text
+        Retourne: un objet Comment
+        """
+        with self._writing() as connection:
+            comment_id = connection.execute(self.insert_comment_sql, {"id": None, "post_id": post.id, "username": user.username, "text": text}).lastrowid
+            self._written()
+        comment = Comment(self, comment_id, post, user, text)
+        post.comments.append(comment)
+        return comment
+
+    def create_users_bulk(self, users):
+        """
+        Méthode pour créer plusieurs utilisateurs en une seule transaction
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs créés
+        """
+        return self._bulk_write("INSERT INTO Users (username, password) VALUES (?, ?)", users)
+
+    def create_posts_bulk(self, posts):
+        """
+        Méthode pour créer plusieurs posts en une seule transaction
+        Paramètres: posts (itérable de tuples (user, text))
+        Retourne: le nombre de posts créés
+        """
+        rows = ({"id": None, "username": user.username, "text": text} for user, text in posts)
+        return self._bulk_write(self.insert_post_sql, rows)
+
+    def add_comments_bulk(self, comments):
+        """
+        Méthode pour ajouter plusieurs commentaires en une seule transaction
+        Paramètres: comments (itérable de tuples (post, user, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        rows = ({"id": None, "post_id": post.id, "username": user.username, "text": text} for post, user, text in comments)
+        return self._bulk_write(self.insert_comment_sql, rows)
+
+    def iter_users(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les utilisateurs sans les garder en mémoire (un paquet lu par id à la fois,
+        connexion rendue avant de le renvoyer, comme iter_posts)
+        Paramètres: batch_size
+        Retourne: un générateur d'objets User
+        """
+        last_id = 0
+        while True:
+            with self._reading() as connection:
+                rows = connection.execute("SELECT id, username, password FROM Users WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for user_id, username, password in rows:
+                yield User(self, username, password)
+
+    def import_users_bulk(self, users):
+        """
+        Méthode pour importer des utilisateurs en une transaction (les pseudos déjà présents sont ignorés)
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs ajoutés
+        """
+        return self._bulk_write("INSERT OR IGNORE INTO Users (username, password) VALUES (?, ?)", users)
+
+    def import_posts_bulk(self, posts):
+        """
+        Méthode pour importer des posts en gardant leurs ids (les ids déjà présents sont ignorés)
+        Paramètres: posts (itérable de tuples (post_id, username, text))
+        Retourne: le nombre de posts ajoutés
+        """
+        rows = ({"id": post_id, "username": username, "text": text} for post_id, username, text in posts)
+        return self._bulk_write(self.import_post_sql, rows)
+
+    def import_comments_bulk(self, comments):
+        """
+        Méthode pour importer des commentaires en gardant leurs ids et leur post (les ids déjà présents sont ignorés)
+        Paramètres: comments (itérable de tuples (comment_id, post_id, username, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        rows = ({"id": comment_id, "post_id": post_id, "username": username, "text": text} for comment_id, post_id, username, text in comments)
+        return self._bulk_write(self.import_comment_sql, rows)
+
+    def _bulk_write(self, sql, rows):
+        """
+        Méthode pour exécuter un executemany dans la transaction courante
+        En cas d'erreur, seules les lignes de cet appel sont annulées (savepoint) ; si la transaction
+        a été ouverte par cet appel, elle est annulée entièrement (voir _rollback_bulk_write).
+        Paramètres: sql, rows
+        Retourne: le nombre de lignes écrites
+        """
+        with self._writing() as connection:
+            started = not connection.in_transaction
+            if started:
+                connection.execute("BEGIN")
+            connection.execute("SAVEPOINT bulk_write")
+            try:
+                count = connection.executemany(sql, rows).rowcount
+            except sqlite3.Error:
+                self._rollback_bulk_write(connection, started)
+                raise
+            connection.execute("RELEASE bulk_write")
+            self._written(count)
+        return count
+
+    def _rollback_bulk_write(self, connection, started):
+        """
+        Méthode pour annuler les lignes d'une écriture groupée qui a échoué (à appeler avec le verrou d'écriture)
+        Les écritures en attente d'un commit groupé précédent sont gardées. Si la transaction a été ouverte
+        par cette écriture, il n'y a rien à garder : elle est annulée, ce qui libère le verrou du fichier
+        pour les autres processus, et le compteur du commit groupé est remis à zéro.
+        Paramètres: connection, started (True si la transaction a été ouverte par cette écriture)
+        """
+        connection.execute("ROLLBACK TO bulk_write")
+        connection.execute("RELEASE bulk_write")
+        if started:
+            connection.rollback()
+            self._pending_writes = 0
+
+    def _written(self, count=1):
+        """
+        Méthode appelée après chaque écriture : valide la transaction quand le seuil de lignes
+        ou le délai du commit groupé est atteint
+        Paramètres: count (nombre de lignes écrites)
+        À appeler avec le verrou d'écriture
+        """
+        self._pending_writes += count
+        if self.commit_every is not None and self._pending_writes >= self.commit_every:
+            self.flush()
+        elif self.commit_interval is not None and time.monotonic() - self._last_commit >= self.commit_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Méthode pour valider immédiatement les écritures en attente
+        """
+        with self._writing() as connection:
+            connection.commit()
+            self._pending_writes = 0
+            self._last_commit = time.monotonic()
+
+    def _flush_periodically(self):
+        """
+        Méthode exécutée par le thread de commit groupé : valide les écritures en attente toutes les commit_interval secondes
+        """
+        while not self._closed.wait(self.commit_interval):
+            with self._writing():
+                if self._pending_writes and not self._closed.is_set():
+                    self.flush()
+
+    def close(self):
+        """
+        Méthode pour valider les écritures en attente et fermer toutes les connexions
+        """
+        with self._writing() as connection:
+            if self._closed.is_set():
+                return
+            self.flush()
+            self._closed.set()
+            connection.close()
+        with self._readers_lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers.clear()
+    
+# Recherche plein texte
+
+def tokenize(text):
+    """
+    Fonction pour découper un texte en mots normalisés (minuscules, sans accents), comme le tokenizer unicode61 de FTS5
+    Paramètres: text
+    Retourne: une liste de mots
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(character for character in text if not unicodedata.combining(character))
+    return re.findall(r"\w+", text)
+
+def _fold_text(text):
+    """
+    Fonction SQL fold() : texte réduit à ses mots normalisés séparés par une espace, pour que la recherche
+    LIKE (sans FTS5) trouve « café » avec la requête « cafe » comme le fait FTS5
+    Paramètres: text
+    Retourne: une chaîne
+    """
+    return " ".join(tokenize(text)) if text is not None else None
+
+class InvertedIndex:
+    """
+    Index inversé maintenu au fil des écritures : pour chaque mot, le nombre d'occurrences dans chaque
+    document où il apparaît (le nombre de documents du mot est la taille de ce dictionnaire). Un document
+    peut être enrichi après coup (ex : les commentaires d'un post). Le classement utilise BM25.
+    """
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.postings = {} # Mot -> {id de document: nombre d'occurrences}
+        self.lengths = array.array("l") # Nombre de mots de chaque document, indexé par id
+        self.total_length = 0
+        self.document_count = 0
+
+    def add(self, document_id, text):
+        """
+        Méthode pour indexer un texte dans un document (créé s'il n'existe pas)
+        Paramètres: document_id (entier positif), text
+        """
+        terms = tokenize(text)
+        if document_id >= len(self.lengths):
+            self.lengths.extend([0] * (document_id + 1 - len(self.lengths)))
+        if self.lengths[document_id] == 0 and terms:
+            self.document_count += 1
+        self.lengths[document_id] += len(terms)
+        self.total_length += len(terms)
+        for term, frequency in collections.Counter(terms).items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+            posting[document_id] = posting.get(document_id, 0) + frequency
+
+    def search(self, query, limit=10):
+        """
+        Méthode pour rechercher les documents les plus pertinents pour une requête
+        Paramètres: query, limit
+        Retourne: une liste d'ids de documents, du plus au moins pertinent
+        """
+        if not self.document_count:
+            return []
+        average_length = self.total_length / self.document_count
+        scores = collections.defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (self.document_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for document_id, frequency in posting.items():
+                norm = self.K1 * (1 - self.B + self.B * self.lengths[document_id] / average_length)
+                scores[document_id] += idf * frequency * (self.K1 + 1) / (frequency + norm)
+        return [document_id for document_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1])]
+
+# Fil d'actualité précalculé (fan-out à l'écriture)
+
+class TimelineStore:
+    """
+    Abonnements et fils d'actualité en mémoire. À la création d'un post, son id est ajouté au fil de
+    l'auteur et de chacun de ses abonnés (fan-out à l'écriture). Pour un auteur qui a plus de
+    fanout_limit abonnés, ce serait trop coûteux : ses posts sont fusionnés à la lecture.
+    """
+    def __init__(self, fanout_limit=10000):
+        self.fanout_limit = fanout_limit
+        self.followers = {} # username -> ensemble des pseudos des abonnés
+        self.following = {} # username -> ensemble des pseudos suivis
+        self.timelines = {} # username -> liste triée des ids de posts du fil
+
+    def is_celebrity(self, username):
+        """
+        Méthode pour savoir si un auteur dépasse le seuil de fan-out
+        Paramètres: username
+        Retourne: un booléen
+        """
+        return len(self.followers.get(username, ())) > self.fanout_limit
+
+    def publish(self, author, post_id):
+        """
+        Méthode pour ajouter un nouveau post au fil de son auteur et de ses abonnés
+        Paramètres: author (pseudo), post_id
+        """
+        self._insert(author, post_id)
+        if not self.is_celebrity(author):
+            for follower in self.followers.get(author, ()):
+                self._insert(follower, post_id)
+
+    def _insert(self, username, post_id):
+        """
+        Méthode pour ajouter un id à un fil en le gardant trié (ajout en fin dans le cas courant)
+        Paramètres: username, post_id
+        """
+        timeline = self.timelines.setdefault(username, [])
+        if not timeline or timeline[-1] < post_id:
+            timeline.append(post_id)
+        else:
+            position = bisect.bisect_left(timeline, post_id)
+            if position == len(timeline) or timeline[position] != post_id:
+                timeline.insert(position, post_id)
+
+    def follow(self, follower, followee, followee_post_ids):
+        """
+        Méthode pour abonner un utilisateur à un autre ; les posts existants de l'auteur sont ajoutés au fil
+        Paramètres: follower, followee (pseudos), followee_post_ids (ids des posts de l'auteur)
+        """
+        if follower == followee:
+            raise ValueError("Un utilisateur ne peut pas se suivre lui-même")
+        self.followers.setdefault(followee, set()).add(follower)
+        self.following.setdefault(follower, set()).add(followee)
+        timeline = self.timelines.setdefault(follower, [])
+        self.timelines[follower] = sorted(set(timeline).union(followee_post_ids))
+
+    def unfollow(self, follower, followee, followee_post_ids):
+        """
+        Méthode pour désabonner un utilisateur ; les posts de l'auteur sont retirés du fil
+        Paramètres: follower, followee (pseudos), followee_post_ids (ids des posts de l'auteur)
+        """
+        self.followers.get(followee, set()).discard(follower)
+        self.following.get(follower, set()).discard(followee)
+        removed = set(followee_post_ids)
+        self.timelines[follower] = [post_id for post_id in self.timelines.get(follower, []) if post_id not in removed]
+
+    def get_timeline(self, username, cursor, limit, recent_post_ids):
+        """
+        Méthode pour lire une page du fil, du plus récent au plus ancien
+        Paramètres: username, cursor (ne renvoie que les ids inférieurs, None pour la première page), limit,
+                    recent_post_ids (fonction (auteur, cursor, limit) -> ids récents d'un auteur, pour le fan-out à la lecture)
+        Retourne: une liste d'ids de posts
+        """
+        timeline = self.timelines.get(username, [])
+        end = len(timeline) if cursor is None else bisect.bisect_left(timeline, cursor)
+        post_ids = set(timeline[max(0, end - limit):end])
+        for followee in self.following.get(username, ()):
+            if self.is_celebrity(followee):
+                post_ids.update(recent_post_ids(followee, cursor, limit))
+        return sorted(post_ids, reverse=True)[:limit]
+
+# Posts tendance (compteurs de commentaires et score qui décroît avec le temps)
+
+TRENDING_HALF_LIFE = 6 * 3600 # Demi-vie du score de tendance, en secondes
+# Points de tendance de l'instant présent (voir hot_points), calculés par SQLite à l'écriture
+HOT_NOW_SQL = f"((julianday('now') - 2440587.5) * 86400.0 * {math.log(2) / TRENDING_HALF_LIFE!r})"
+
+def hot_points(timestamp):
+    """
+    Fonction pour convertir un instant en points de tendance (logarithme du poids de l'événement)
+    Un événement (création du post ou commentaire) pèse 2^(t / demi-vie) : tous les scores décroissent
+    au même rythme, donc leur ordre ne change pas avec le temps et rien n'est à recalculer.
+    Paramètres: timestamp (secondes depuis l'epoch)
+    Retourne: un nombre
+    """
+    return timestamp * math.log(2) / TRENDING_HALF_LIFE
+
+def hot_add(score, points):
+    """
+    Fonction pour ajouter un événement à un score de tendance : log(e^score + e^points), sans dépassement
+    Paramètres: score (None si aucun événement), points
+    Retourne: le nouveau score
+    """
+    if score is None:
+        return points
+    high, low = max(score, points), min(score, points)
+    return high + math.log1p(math.exp(low - high))
+
+class TrendingIndex:
+    """
+    Compteurs de commentaires et scores de tendance des posts (tableaux indexés par id), tenus à jour
+    à chaque écriture. Un tas max paresseux donne les k meilleurs posts sans trier tous les scores :
+    l'ancienne entrée d'un post dont le score a changé reste dans le tas, elle est ignorée à la lecture
+    et le tas est reconstruit quand les entrées périmées deviennent majoritaires.
+    """
+    def __init__(self):
+        self.comment_counts = array.array("l") # Nombre de commentaires, indexé par id de post
+        self.scores = array.array("d") # Score de tendance, indexé par id de post (-inf si aucun post)
+        self.post_count = 0
+        self._heap = [] # (-score, -post_id), y compris des entrées périmées
+
+    def _ensure(self, post_id):
+        """
+        Méthode pour agrandir les tableaux jusqu'à un id de post
+        Paramètres: post_id
+        """
+        if post_id >= len(self.scores):
+            missing = post_id + 1 - len(self.scores)
+            self.comment_counts.extend([0] * missing)
+            self.scores.extend([-math.inf] * missing)
+
+    def add_post(self, post_id, timestamp=None):
+        """
+        Méthode pour enregistrer un nouveau post (sa création compte comme un premier événement)
+        Paramètres: post_id, timestamp (None pour maintenant)
+        """
+        if post_id == len(self.scores):
+            # Cas courant (ids croissants) : le score est directement les points de l'instant
+            score = hot_points(time.time() if timestamp is None else timestamp)
+            self.comment_counts.append(0)
+            self.scores.append(score)
+            self.post_count += 1
+            heapq.heappush(self._heap, (-score, -post_id))
+            return
+        self._ensure(post_id)
+        if self.scores[post_id] == -math.inf:
+            self.post_count += 1
+        self._add_event(post_id, timestamp)
+
+    def add_comment(self, post_id, timestamp=None):
+        """
+        Méthode pour compter un nouveau commentaire sur un post
+        Paramètres: post_id, timestamp (None pour maintenant)
+        """
+        self._ensure(post_id)
+        self.comment_counts[post_id] += 1
+        self._add_event(post_id, timestamp)
+
+    def _add_event(self, post_id, timestamp):
+        """
+        Méthode pour ajouter un événement au score d'un post (l'ancienne entrée du tas devient périmée)
+        Paramètres: post_id, timestamp
+        """
+        points = hot_points(time.time() if timestamp is None else timestamp)
+        score = self.scores[post_id]
+        score = hot_add(None if score == -math.inf else score, points)
+        self.scores[post_id] = score
+        heapq.heappush(self._heap, (-score, -post_id))
+        if len(self._heap) > 2 * self.post_count + 64:
+            self._heap = [(-score, -post_id) for post_id, score in enumerate(self.scores) if score != -math.inf]
+            heapq.heapify(self._heap)
+
+    def top(self, k):
+        """
+        Méthode pour récupérer les k posts les plus tendance
+        Le tas est parcouru comme un arbre (enfants 2i+1 et 2i+2) à l'aide d'un second tas de candidats,
+        ce qui coûte O((k + entrées périmées rencontrées) log k) au lieu d'un tri complet.
+        Paramètres: k
+        Retourne: une liste d'ids de posts, du plus au moins tendance (à égalité, le plus récent d'abord)
+        """
+        heap = self._heap
+        post_ids = []
+        seen = set()
+        candidates = [(heap[0], 0)] if heap else []
+        while candidates and len(post_ids) < k:
+            (negative_score, negative_id), index = heapq.heappop(candidates)
+            post_id = -negative_id
+            if self.scores[post_id] == -negative_score and post_id not in seen:
+                seen.add(post_id)
+                post_ids.append(post_id)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(candidates, (heap[child], child))
+        return post_ids
+
+# Class de la fausse base de donnée
+
+class InMemoryDatabase(IDatabase):
+    # Format binaire des sauvegardes et du journal : un en-tête puis une suite d'enregistrements
+    # U (username, password), P (id, username, text), C (id, post_id, username, text),
+    # F (abonnement : follower, followee) et X (désabonnement : follower, followee).
+    # Les entiers sont en little-endian, les textes en UTF-8 précédés de leur longueur (uint32).
+    # Depuis la version 2, chaque enregistrement est suivi de son crc32 (uint32) pour détecter la corruption.
+    SNAPSHOT_MAGIC = b"THREAD-SNAPSHOT-2\n"
+    JOURNAL_MAGIC = b"THREAD-JOURNAL-2\n"
+    LEGACY_SNAPSHOT_MAGIC = b"THREAD-SNAPSHOT-1\n" # Version 1 : sans crc32, toujours lisible
+    LEGACY_JOURNAL_MAGIC = b"THREAD-JOURNAL-1\n"
+
+    def __init__(self, snapshot_path=None, compact_every=100000, fsync=True):
+        """
+        Paramètres: snapshot_path (fichier de sauvegarde, None pour une base purement en mémoire ;
+                    les écritures sont journalisées dans snapshot_path + ".wal"),
+                    compact_every (nombre d'écritures journalisées avant de réécrire la sauvegarde, None pour ne
+                    compacter qu'à l'appel de compact() ; la réécriture est faite sous le verrou par l'écriture qui
+                    atteint le seuil : cette écriture et les suivantes attendent le temps d'écrire toute la sauvegarde),
+                    fsync (force chaque écriture du journal sur le disque ; si False, une écriture
+                    confirmée peut être perdue en cas de coupure de courant, mais pas si seul le processus s'arrête)
+        """
+        self.users = {}
+        self.posts = [] # Triés par id croissant (les ids sont monotones)
+        self.posts_by_id = {} # Index principal : id -> Post
+        self.posts_by_user = {} # Index secondaire : username -> liste des posts de l'utilisateur
+        self._last_post_id = 0
+        self._last_comment_id = 0
+        self._lock = threading.RLock() # Garde les index cohérents entre eux en cas d'écritures concurrentes
+        self.search_index = InvertedIndex() # Index inversé du texte des posts et de leurs commentaires
+        self.timelines = TimelineStore()
+        self.trending = TrendingIndex() # Compteurs de commentaires et scores de tendance
+        self.snapshot_path = snapshot_path
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._journal = None
+        self._journal_records = 0
+        if snapshot_path:
+            self._open_persistence()
+
+    def create_user(self, username, password):
+        """
+        Méthode pour créer un utilisateur
+        Paramètres: username, password
+        Retourne: un objet User
+        Lève: sqlite3.IntegrityError si le pseudo existe déjà (comme RealDatabase)
+        """
+        with self._lock:
+            if username in self.users: # Comme la contrainte UNIQUE de RealDatabase : pas d'écrasement silencieux
+                raise sqlite3.IntegrityError(f"UNIQUE constraint failed: Users.username ({username})")
+            user = User(self, username, password)
+            self.users[username] = user
+            self._journal_write(self._user_record(user))
+        self._compact_if_needed()
+        return user
+
+    def update_password(self, user, password):
+        """
+        Méthode pour remplacer le mot de passe enregistré d'un utilisateur (journalisé comme une création)
+        Paramètres: user, password
+        """
+        with self._lock:
+            stored = self.users[user.username]
+            stored.password = user.password = password
+            self._journal_write(self._user_record(stored))
+        self._compact_if_needed()
+
+    def get_user(self, username):
+        """
+        Méthode pour récupérer un utilisateur
+        Paramètres: username
+        Retourne: un objet User ou None
+        """
+        return self.users.get(username)
+
+    def create_post(self, user, text):
+        """
+        Méthode pour créer un post
+        Paramètres: user, text
+        Retourne: un objet Post
+        """
+        with self._lock:
+            post = self._store_post(self._last_post_id + 1, user, text)
+            self._journal_write(self._post_record(post))
+        self._compact_if_needed()
+        return post
+
+    def _store_post(self, post_id, user, text):
+        """
+        Méthode pour ajouter un post aux index (à appeler avec le verrou)
+        Paramètres: post_id, user, text
+        Retourne: un objet Post
+        """
+        post = Post(self, post_id, user, text)
+        self.posts.append(post)
+        self.posts_by_id[post_id] = post
+        self.posts_by_user.setdefault(user.username, []).append(post)
+        self.search_index.add(post_id, text)
+        self.timelines.publish(user.username, post_id)
+        self.trending.add_post(post_id)
+        self._last_post_id = post_id
+        return post
+
+    def get_posts(self):
+        """
+        Méthode pour récupérer tous les posts
+        Retourne: une liste d'objets Post
+        """
+        return self.posts
+
+    def get_post(self, post_id):
+        """
+        Méthode pour récupérer un post par son id
+        Paramètres: post_id
+        Retourne: un objet Post ou None
+        """
+        return self.posts_by_id.get(post_id)
+
+    def get_comments_for_post(self, post):
+        """
+        Méthode pour récupérer les commentaires d'un post
+        Paramètres: post
+        Retourne: une liste d'objets Comment
+        """
+        stored = self.posts_by_id.get(post.id)
+        return stored.comments if stored else []
+
+    def get_posts_by_user(self, username):
+        """
+        Méthode pour récupérer les posts d'un utilisateur
+        Paramètres: username
+        Retourne: une liste d'objets Post
+        """
+        return list(self.posts_by_user.get(username, []))
+
+    def search(self, query, limit=10):
+        """
+        Méthode pour rechercher des posts par mots-clés dans leur texte et celui de leurs commentaires
+        Paramètres: query, limit
+        Retourne: une liste d'objets Post classés par pertinence (BM25)
+        """
+        with self._lock:
+            return [self.posts_by_id[post_id] for post_id in self.search_index.search(query, limit)]
+
+    def follow(self, follower, followee):
+        """
+        Méthode pour abonner un utilisateur à un autre
+        Paramètres: follower, followee
+        """
+        with self._lock:
+            self.timelines.follow(follower.username, followee.username, self._post_ids_of(followee.username))
+            self._journal_write(b"F" + self._pack_text(follower.username) + self._pack_text(followee.username))
+        self._compact_if_needed()
+
+    def unfollow(self, follower, followee):
+        """
+        Méthode pour désabonner un utilisateur d'un autre
+        Paramètres: follower, followee
+        """
+        with self._lock:
+            self.timelines.unfollow(follower.username, followee.username, self._post_ids_of(followee.username))
+            self._journal_write(b"X" + self._pack_text(follower.username) + self._pack_text(followee.username))
+        self._compact_if_needed()
+
+    def get_timeline(self, user, cursor=None, limit=20):
+        """
+        Méthode pour récupérer le fil d'actualité d'un utilisateur (ses posts et ceux des comptes suivis)
+        Paramètres: user, cursor (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post, du plus récent au plus ancien
+        """
+        with self._lock:
+            post_ids = self.timelines.get_timeline(user.username, cursor, limit, self._recent_post_ids)
+            return [self.posts_by_id[post_id] for post_id in post_ids]
+
+    def get_top_posts(self, k=10):
+        """
+        Méthode pour récupérer les posts les plus tendance (commentaires récents pondérés par leur âge)
+        Paramètres: k
+        Retourne: une liste d'objets Post, du plus au moins tendance
+        """
+        with self._lock:
+            posts = [self.posts_by_id[post_id] for post_id in self.trending.top(k)]
+            for post in posts:
+                post.comment_count = self.trending.comment_counts[post.id]
+        return posts
+
+    def _post_ids_of(self, username):
+        """
+        Méthode pour récupérer les ids des posts d'un utilisateur
+        Paramètres: username
+        Retourne: une liste d'ids
+        """
+        return [post.id for post in self.posts_by_user.get(username, ())]
+
+    def _recent_post_ids(self, username, cursor, limit):
+        """
+        Méthode pour récupérer les ids des derniers posts d'un utilisateur avant un curseur
+        Paramètres: username, cursor, limit
+        Retourne: une liste d'ids
+        """
+        posts = self.posts_by_user.get(username, [])
+        end = len(posts) if cursor is None else bisect.bisect_left(posts, cursor, key=lambda post: post.id)
+        return [post.id for post in posts[max(0, end - limit):end]]
+
+    def get_posts_page(self, after_id=None, limit=20):
+        """
+        Méthode pour récupérer une page de posts (pagination par curseur sur l'id)
+        Paramètres: after_id (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post
+        """
+        start = bisect.bisect_right(self.posts, after_id or 0, key=lambda post: post.id)
+        return self.posts[start:start + limit]
+
+    def iter_posts(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les posts par paquets
+        Paramètres: batch_size
+        Retourne: un générateur d'objets Post
+        """
+        for start in range(0, len(self.posts), batch_size):
+            yield from self.posts[start:start + batch_size]
+
+    def get_random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire
+        Retourne: un objet Post ou None
+        """
+
+        if not self.posts:
+            return None
+        return random.choice(self.posts)
+
+    def get_random_posts(self, k):
+        """
+        Méthode pour récupérer k posts aléatoires distincts
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        return random.sample(self.posts, max(0, min(k, len(self.posts))))
+
+    def add_comment(self, post, user, text):
+        """
+        Méthode pour ajouter un commentaire
+        Paramètres: post, user, text
+        Retourne: un objet Comment
+        """
+        with self._lock:
+            # Le post est retrouvé par l'index : le commentaire est rattaché au post stocké, même si
+            # l'objet reçu n'est qu'une copie (chaque Post garde la liste de ses commentaires)
+            stored_post = self.posts_by_id.get(post.id, post)
+            comment = self._store_comment(self._last_comment_id + 1, stored_post, user, text)
+            self._journal_write(self._comment_record(comment))
+        self._compact_if_needed()
+        return comment
+
+    def _store_comment(self, comment_id, post, user, text):
+        """
+        Méthode pour ajouter un commentaire à un post (à appeler avec le verrou)
+        Paramètres: comment_id, post, user, text
+        Retourne: un objet Comment
+        """
+        comment = Comment(self, comment_id, post, user, text)
+        post.comments.append(comment)
+        self.search_index.add(post.id, text) # Un commentaire enrichit le document de son post
+        self.trending.add_comment(post.id)
+        self._last_comment_id = max(self._last_comment_id, comment_id)
+        return comment
+
+
+    def create_users_bulk(self, users):
+        """
+        Méthode pour créer plusieurs utilisateurs
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs créés
+        """
+        count = 0
+        for username, password in users:
+            self.create_user(username, password)
+            count += 1
+        return count
+
+    def create_posts_bulk(self, posts):
+        """
+        Méthode pour créer plusieurs posts
+        Paramètres: posts (itérable de tuples (user, text))
+        Retourne: le nombre de posts créés
+        """
+        count = 0
+        for user, text in posts:
+            self.create_post(user, text)
+            count += 1
+        return count
+
+    def add_comments_bulk(self, comments):
+        """
+        Méthode pour ajouter plusieurs commentaires
+        Paramètres: comments (itérable de tuples (post, user, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        count = 0
+        for post, user, text in comments:
+            self.add_comment(post, user, text)
+            count += 1
+        return count
+
+    def iter_users(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les utilisateurs
+        Paramètres: batch_size (ignoré, les utilisateurs sont déjà en mémoire)
+        Retourne: un générateur d'objets User
+        """
+        with self._lock:
+            users = list(self.users.values()) # Copie des références : la boucle ne garde pas le verrou
+        yield from users
+
+    def import_users_bulk(self, users):
+        """
+        Méthode pour importer des utilisateurs (les pseudos déjà présents sont ignorés)
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs ajoutés
+        """
+        count = 0
+        for username, password in users:
+            if username not in self.users:
+                self.create_user(username, password)
+                count += 1
+        return count
+
+    def import_posts_bulk(self, posts):
+        """
+        Méthode pour importer des posts en gardant leurs ids (les ids déjà présents sont ignorés)
+        Les ids doivent être croissants : les posts restent triés pour la pagination.
+        Paramètres: posts (itérable de tuples (post_id, username, text))
+        Retourne: le nombre de posts ajoutés
+        """
+        count = 0
+        for post_id, username, text in posts:
+            with self._lock:
+                if post_id in self.posts_by_id:
+                    continue
+                if post_id < self._last_post_id:
+                    raise ValueError(f"id de post {post_id} inférieur au dernier id ({self._last_post_id})")
+                user = self.users.get(username) or User(self, username, None)
+                post = self._store_post(post_id, user, text)
+                self._journal_write(self._post_record(post))
+            count += 1
+            self._compact_if_needed()
+        return count
+
+    def import_comments_bulk(self, comments):
+        """
+        Méthode pour importer des commentaires en gardant leurs ids et leur post (les ids déjà présents sont ignorés)
+        Paramètres: comments (itérable de tuples (comment_id, post_id, username, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        count = 0
+        for comment_id, post_id, username, text in comments:
+            with self._lock:
+                post = self.posts_by_id.get(post_id)
+                if post is None:
+                    raise ValueError(f"post {post_id} introuvable pour le commentaire {comment_id}")
+                if comment_id <= self._last_comment_id and any(comment.id == comment_id for comment in post.comments):
+                    continue
+                user = self.users.get(username) or User(self, username, None)
+                comment = self._store_comment(comment_id, post, user, text)
+                self._journal_write(self._comment_record(comment))
+            count += 1
+            self._compact_if_needed()
+        return count
+
+    def save_snapshot(self, path=None):
+        """
+        Méthode pour écrire une sauvegarde binaire complète de la base (remplacement atomique du fichier)
+        Paramètres: path (snapshot_path par défaut)
+        """
+        path = path or self.snapshot_path
+        with self._lock:
+            with open(path + ".tmp", "wb") as file:
+                file.write(self.SNAPSHOT_MAGIC)
+                checked = self._checked
+                for user in self.users.values():
+                    file.write(checked(self._user_record(user)))
+                for followee, followers in self.timelines.followers.items():
+                    for follower in followers:
+                        file.write(checked(b"F" + self._pack_text(follower) + self._pack_text(followee)))
+                for post in self.posts:
+                    file.write(checked(self._post_record(post)))
+                    for comment in post.comments:
+                        file.write(checked(self._comment_record(comment)))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(path + ".tmp", path)
+
+    def load_snapshot(self, path):
+        """
+        Méthode pour charger une sauvegarde binaire dans la base
+        Paramètres: path
+        """
+        with self._lock:
+            self._replay(path, skip_existing=False, allow_incomplete=False)
+
+    def compact(self):
+        """
+        Méthode pour réécrire la sauvegarde à partir de l'état courant et vider le journal
+        (sans effet pour une base sans snapshot_path : il n'y a rien à compacter)
+        """
+        with self._lock:
+            if not self._journal:
+                return
+            self.save_snapshot()
+            self._journal.close()
+            self._journal = open(self.snapshot_path + ".wal", "wb")
+            self._journal.write(self.JOURNAL_MAGIC)
+            self._journal.flush()
+            self._journal_records = 0
+
+    def close(self):
+        """
+        Méthode pour fermer le journal
+        """
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def _open_persistence(self):
+        """
+        Méthode pour recharger la sauvegarde puis rejouer le journal, et ouvrir le journal en ajout
+        """
+        journal_path = self.snapshot_path + ".wal"
+        if os.path.exists(self.snapshot_path):
+            self._replay(self.snapshot_path, skip_existing=False, allow_incomplete=False)
+        if os.path.exists(journal_path) and os.path.getsize(journal_path) >= len(self.LEGACY_JOURNAL_MAGIC):
+            # Les enregistrements déjà présents dans la sauvegarde (compaction interrompue) sont ignorés.
+            # Seul un dernier enregistrement incomplet (arrêt brutal pendant une écriture) est tronqué :
+            # un enregistrement corrompu lève une erreur au lieu de faire perdre ceux qui le suivent.
+            valid_end = self._replay(journal_path, skip_existing=True, allow_incomplete=True)
+            if valid_end < os.path.getsize(journal_path):
+                print(f"\033[0;31m⚠ Journal {journal_path} : dernier enregistrement incomplet ignoré\033[0m")
+                with open(journal_path, "r+b") as file:
+                    file.truncate(valid_end)
+            self._journal = open(journal_path, "ab")
+            with open(journal_path, "rb") as file:
+                legacy = file.read(len(self.LEGACY_JOURNAL_MAGIC)) == self.LEGACY_JOURNAL_MAGIC
+            if legacy:
+                self.compact() # Réécrit la sauvegarde et le journal au format courant
+        else:
+            self._journal = open(journal_path, "wb")
+            self._journal.write(self.JOURNAL_MAGIC)
+            self._journal.flush()
+
+    def _journal_write(self, record):
+        """
+        Méthode pour ajouter un enregistrement au journal (à appeler avec le verrou)
+        Paramètres: record
+        """
+        if self._journal:
+            self._journal.write(self._checked(record))
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._journal_records += 1
+
+    def _compact_if_needed(self):
+        """
+        Méthode pour compacter le journal quand il dépasse compact_every enregistrements
+        """
+        if self._journal and self.compact_every is not None and self._journal_records >= self.compact_every:
+            self.compact()
+
+    @staticmethod
+    def _pack_text(value):
+        """
+        Méthode pour encoder un texte (longueur uint32 + UTF-8)
+        Paramètres: value
+        Retourne: des bytes
+        """
+        data = value.encode("utf-8")
+        return struct.pack("<I", len(data)) + data
+
+    @staticmethod
+    def _checked(record):
+        """
+        Méthode pour ajouter le crc32 d'un enregistrement à sa suite
+        Paramètres: record
+        Retourne: des bytes
+        """
+        return record + struct.pack("<I", zlib.crc32(record))
+
+    def _user_record(self, user):
+        """
+        Méthode pour encoder un enregistrement utilisateur
+        Paramètres: user
+        Retourne: des bytes
+        """
+        return b"U" + self._pack_text(user.username) + self._pack_text(user.password or "")
+
+    def _post_record(self, post):
+        """
+        Méthode pour encoder un enregistrement post
+        Paramètres: post
+        Retourne: des bytes
+        """
+        return b"P" + struct.pack("<Q", post.id) + self._pack_text(post.user.username) + self._pack_text(post.text)
+
+    def _comment_record(self, comment):
+        """
+        Méthode pour encoder un enregistrement commentaire
+        Paramètres: comment
+        Retourne: des bytes
+        """
+        return b"C" + struct.pack("<QQ", comment.id, comment.post.id) + self._pack_text(comment.user.username) + self._pack_text(comment.text)
+
+    def _replay(self, path, skip_existing, allow_incomplete):
+        """
+        Méthode pour appliquer les enregistrements d'un fichier, lu par mmap sans le charger en entier
+        Paramètres: path, skip_existing (ignore les posts/commentaires d'id déjà connu),
+                    allow_incomplete (accepte un dernier enregistrement coupé par la fin du fichier, pour le journal)
+        Retourne: la position de fin du dernier enregistrement complet
+        Lève: ValueError si le fichier est corrompu (en-tête, type inconnu, crc32 faux, texte invalide) ou tronqué
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return 0
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magics = (self.SNAPSHOT_MAGIC, self.JOURNAL_MAGIC, self.LEGACY_SNAPSHOT_MAGIC, self.LEGACY_JOURNAL_MAGIC)
+                magic = next((magic for magic in magics if data[:len(magic)] == magic), None)
+                if magic is None:
+                    raise ValueError(f"Fichier de sauvegarde invalide: {path}")
+                checksum = magic in (self.SNAPSHOT_MAGIC, self.JOURNAL_MAGIC)
+                unpack_from = struct.unpack_from
+                users = self.users
+
+                def read_text(position):
+                    (length,) = unpack_from("<I", data, position)
+                    end = position + 4 + length
+                    if end > size:
+                        raise IndexError("enregistrement incomplet")
+                    return data[position + 4:end].decode("utf-8"), end
+
+                def parse(offset):
+                    # Lecture complète (et vérification du crc32) d'un enregistrement avant de l'appliquer.
+                    # Lève struct.error/IndexError s'il dépasse la fin du fichier, ValueError s'il est invalide.
+                    kind = data[offset:offset + 1]
+                    if kind == b"U" or kind == b"F" or kind == b"X":
+                        first, position = read_text(offset + 1)
+                        second, position = read_text(position)
+                        values = (first, second)
+                    elif kind == b"P":
+                        (post_id,) = unpack_from("<Q", data, offset + 1)
+                        username, position = read_text(offset + 9)
+                        text, position = read_text(position)
+                        values = (post_id, username, text)
+                    elif kind == b"C":
+                        comment_id, post_id = unpack_from("<QQ", data, offset + 1)
+                        username, position = read_text(offset + 17)
+                        text, position = read_text(position)
+                        values = (comment_id, post_id, username, text)
+                    else:
+                        raise ValueError(f"type d'enregistrement inconnu {kind!r}")
+                    if checksum:
+                        (crc,) = unpack_from("<I", data, position)
+                        if crc != zlib.crc32(data[offset:position]):
+                            raise ValueError("crc32 invalide")
+                        position += 4
+                    return kind, values, position
+
+                def is_torn_tail(offset):
+                    # Un enregistrement coupé par un arrêt brutal est le dernier du fichier : si un enregistrement
+                    # valide commence après lui, c'est sa longueur qui est corrompue (non vérifiable sans crc32)
+                    if not checksum:
+                        return True
+                    for start in range(offset + 1, size):
+                        try:
+                            parse(start)
+                            return False
+                        except (struct.error, IndexError, ValueError):
+                            pass
+                    return True
+
+                def get_user(username):
+                    user = users.get(username)
+                    if user is None:
+                        user = User(self, username, None)
+                    return user
+
+                # Les commentaires importés peuvent arriver dans le désordre : seul un id déjà présent
+                # dans le post est ignoré, le plus grand id connu ne sert qu'à éviter la recherche
+                known_last_comment_id = self._last_comment_id
+                offset = len(magic)
+                while offset < size:
+                    try:
+                        kind, values, position = parse(offset)
+                    except (struct.error, IndexError):
+                        if allow_incomplete and is_torn_tail(offset):
+                            break
+                        if allow_incomplete:
+                            raise ValueError(f"Enregistrement corrompu dans {path} à la position {offset}: longueur invalide") from None
+                        raise ValueError(f"Fichier de sauvegarde tronqué ou corrompu: {path} (position {offset})") from None
+                    except ValueError as error: # Y compris UnicodeDecodeError
+                        raise ValueError(f"Enregistrement corrompu dans {path} à la position {offset}: {error}") from None
+                    if kind == b"U":
+                        # Un enregistrement utilisateur plus récent porte le dernier mot de passe (update_password)
+                        username, password = values
+                        if username in users:
+                            users[username].password = password
+                        else:
+                            users[username] = User(self, username, password)
+                    elif kind == b"P":
+                        post_id, username, text = values
+                        if not (skip_existing and post_id in self.posts_by_id):
+                            self._store_post(post_id, get_user(username), text)
+                    elif kind == b"C":
+                        comment_id, post_id, username, text = values
+                        post = self.posts_by_id.get(post_id)
+                        if post and not (skip_existing and comment_id <= known_last_comment_id
+                                         and any(comment.id == comment_id for comment in post.comments)):
+                            self._store_comment(comment_id, post, get_user(username), text)
+                    elif kind == b"F":
+                        self.timelines.follow(values[0], values[1], self._post_ids_of(values[1]))
+                    else:
+                        self.timelines.unfollow(values[0], values[1], self._post_ids_of(values[1]))
+                    offset = position
+        return offset
+
+# Class de la base de donnée en mémoire au format colonnes
+
+class ColumnarDatabase(IDatabase):
+    """
+    Base en mémoire compacte : les posts et commentaires sont stockés dans des tableaux parallèles
+    (array d'entiers + liste des textes) et les objets Post/Comment ne sont construits qu'à la lecture.
+    Les pseudos sont internés et référencés par leur indice. Les commentaires d'un post forment une
+    liste chaînée dans les tableaux (premier, dernier, suivant), sans liste Python par post.
+    L'id d'un post ou d'un commentaire est son indice + 1.
+    """
+    def __init__(self):
+        self.users = {}
+        self._usernames = [] # Pseudos internés, référencés par indice
+        self._username_index = {}
+        self._post_authors = array.array("l")
+        self._post_texts = []
+        self._first_comment = array.array("l") # Indice du premier commentaire de chaque post (-1 si aucun)
+        self._last_comment = array.array("l")
+        self._posts_of_user = {} # Indice du pseudo -> array des indices de ses posts
+        self._comment_posts = array.array("l")
+        self._comment_authors = array.array("l")
+        self._comment_texts = []
+        self._next_comment = array.array("l") # Commentaire suivant du même post (-1 si dernier)
+        self.search_index = InvertedIndex()
+        self.timelines = TimelineStore()
+        self.trending = TrendingIndex() # Compteurs de commentaires et scores de tendance
+        self._lock = threading.Lock()
+
+    def _intern_username(self, username):
+        """
+        Méthode pour récupérer l'indice d'un pseudo (ajouté à la table des pseudos si besoin)
+        Paramètres: username
+        Retourne: l'indice du pseudo
+        """
+        index = self._username_index.get(username)
+        if index is None:
+            index = len(self._usernames)
+            self._usernames.append(sys.intern(username))
+            self._username_index[username] = index
+        return index
+
+    def _build_post(self, index):
+        """
+        Méthode pour construire un objet Post (et ses commentaires) à partir des colonnes
+        Paramètres: index (indice du post)
+        Retourne: un objet Post
+        """
+        post = Post(self, index + 1, self.users.get(self._usernames[self._post_authors[index]]), self._post_texts[index])
+        comment_index = self._first_comment[index]
+        while comment_index != -1:
+            user = self.users.get(self._usernames[self._comment_authors[comment_index]])
+            post.comments.append(Comment(self, comment_index + 1, post, user, self._comment_texts[comment_index]))
+            comment_index = self._next_comment[comment_index]
+        return post
+
+    def create_user(self, username, password):
+        """
+        Méthode pour créer un utilisateur
+        Paramètres: username, password
+        Retourne: un objet User
+        Lève: sqlite3.IntegrityError si le pseudo existe déjà (comme RealDatabase)
+        """
+        if username in self.users: # Comme la contrainte UNIQUE de RealDatabase : pas d'écrasement silencieux
+            raise sqlite3.IntegrityError(f"UNIQUE constraint failed: Users.username ({username})")
+        user = User(self, sys.intern(username), password)
+        self.users[username] = user
+        return user
+
+    def update_password(self, user, password):
+        """
+        Méthode pour remplacer le mot de passe enregistré d'un utilisateur
+        Paramètres: user, password
+        """
+        self.users[user.username].password = user.password = password
+
+    def get_user(self, username):
+        """
+        Méthode pour récupérer un utilisateur
+        Paramètres: username
+        Retourne: un objet User ou None
+        """
+        return self.users.get(username)
+
+    def create_post(self, user, text):
+        """
+        Méthode pour créer un post
+        Paramètres: user, text
+        Retourne: un objet Post
+        """
+        with self._lock:
+            index = len(self._post_texts)
+            author = self._intern_username(user.username)
+            self._post_authors.append(author)
+            self._post_texts.append(text)
+            self._first_comment.append(-1)
+            self._last_comment.append(-1)
+            self._posts_of_user.setdefault(author, array.array("l")).append(index)
+            self.search_index.add(index + 1, text)
+            self.timelines.publish(user.username, index + 1)
+            self.trending.add_post(index + 1)
+        return Post(self, index + 1, user, text)
+
+    def get_posts(self):
+        """
+        Méthode pour récupérer tous les posts
+        Retourne: une liste d'objets Post
+        """
+        return list(self.iter_posts())
+
+    def get_post(self, post_id):
+        """
+        Méthode pour récupérer un post par son id
+        Paramètres: post_id
+        Retourne: un objet Post ou None
+        """
+        if not 1 <= post_id <= len(self._post_texts):
+            return None
+        return self._build_post(post_id - 1)
+
+    def get_comments_for_post(self, post):
+        """
+        Méthode pour récupérer les commentaires d'un post
+        Paramètres: post
+        Retourne: une liste d'objets Comment
+        """
+        stored = self.get_post(post.id)
+        return stored.comments if stored else []
+
+    def get_posts_by_user(self, username):
+        """
+        Méthode pour récupérer les posts d'un utilisateur
+        Paramètres: username
+        Retourne: une liste d'objets Post
+        """
+        author = self._username_index.get(username)
+        if author is None:
+            return []
+        return [self._build_post(index) for index in self._posts_of_user.get(author, ())]
+
+    def search(self, query, limit=10):
+        """
+        Méthode pour rechercher des posts par mots-clés dans leur texte et celui de leurs commentaires
+        Paramètres: query, limit
+        Retourne: une liste d'objets Post classés par pertinence (BM25)
+        """
+        with self._lock:
+            post_ids = self.search_index.search(query, limit)
+        return [self._build_post(post_id - 1) for post_id in post_ids]
+
+    def follow(self, follower, followee):
+        """
+        Méthode pour abonner un utilisateur à un autre
+        Paramètres: follower, followee
+        """
+        with self._lock:
+            self.timelines.follow(follower.username, followee.username, self._recent_post_ids(followee.username, None, None))
+
+    def unfollow(self, follower, followee):
+        """
+        Méthode pour désabonner un utilisateur d'un autre
+        Paramètres: follower, followee
+        """
+        with self._lock:
+            self.timelines.unfollow(follower.username, followee.username, self._recent_post_ids(followee.username, None, None))
+
+    def get_timeline(self, user, cursor=None, limit=20):
+        """
+        Méthode pour récupérer le fil d'actualité d'un utilisateur (ses posts et ceux des comptes suivis)
+        Paramètres: user, cursor (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post, du plus récent au plus ancien
+        """
+        with self._lock:
+            post_ids = self.timelines.get_timeline(user.username, cursor, limit, self._recent_post_ids)
+        return [self._build_post(post_id - 1) for post_id in post_ids]
+
+    def get_top_posts(self, k=10):
+        """
+        Méthode pour récupérer les posts les plus tendance (commentaires récents pondérés par leur âge)
+        Paramètres: k
+        Retourne: une liste d'objets Post, du plus au moins tendance
+        """
+        with self._lock:
+            post_ids = self.trending.top(k)
+            comment_counts = [self.trending.comment_counts[post_id] for post_id in post_ids]
+        posts = [self._build_post(post_id - 1) for post_id in post_ids]
+        for post, comment_count in zip(posts, comment_counts):
+            post.comment_count = comment_count
+        return posts
+
+    def _recent_post_ids(self, username, cursor, limit):
+        """
+        Méthode pour récupérer les ids des derniers posts d'un utilisateur avant un curseur
+        Paramètres: username, cursor (None pour tous), limit (None pour tous)
+        Retourne: une liste d'ids
+        """
+        author = self._username_index.get(username)
+        indexes = self._posts_of_user.get(author, ()) if author is not None else ()
+        end = len(indexes) if cursor is None else bisect.bisect_left(indexes, cursor - 1)
+        start = 0 if limit is None else max(0, end - limit)
+        return [index + 1 for index in indexes[start:end]]
+
+    def get_posts_page(self, after_id=None, limit=20):
+        """
+        Méthode pour récupérer une page de posts (pagination par curseur sur l'id)
+        Paramètres: after_id (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post
+        """
+        start = max(after_id or 0, 0)
+        return [self._build_post(index) for index in range(start, min(start + limit, len(self._post_texts)))]
+
+    def iter_posts(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les posts, construits un par un
+        Paramètres: batch_size (ignoré, les posts sont déjà construits à la demande)
+        Retourne: un générateur d'objets Post
+        """
+        for index in range(len(self._post_texts)):
+            yield self._build_post(index)
+
+    def get_random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire
+        Retourne: un objet Post ou None
+        """
+        if not self._post_texts:
+            return None
+        return self._build_post(random.randrange(len(self._post_texts)))
+
+    def get_random_posts(self, k):
+        """
+        Méthode pour récupérer k posts aléatoires distincts
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        indexes = random.sample(range(len(self._post_texts)), max(0, min(k, len(self._post_texts))))
+        return [self._build_post(index) for index in indexes]
+
+    def add_comment(self, post, user, text):
+        """
+        Méthode pour ajouter un commentaire
+        Paramètres: post, user, text
+        Retourne: un objet Comment
+        """
+        with self._lock:
+            post_index = post.id - 1
+            index = len(self._comment_texts)
+            self._comment_posts.append(post_index)
+            self._comment_authors.append(self._intern_username(user.username))
+            self._comment_texts.append(text)
+            self._next_comment.append(-1)
+            if self._last_comment[post_index] == -1:
+                self._first_comment[post_index] = index
+            else:
+                self._next_comment[self._last_comment[post_index]] = index
+            self._last_comment[post_index] = index
+            self.search_index.add(post.id, text)
+            self.trending.add_comment(post.id)
+        comment = Comment(self, index + 1, post, user, text)
+        post.comments.append(comment)
+        return comment
+
+    def create_users_bulk(self, users):
+        """
+        Méthode pour créer plusieurs utilisateurs
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs créés
+        """
+        count = 0
+        for username, password in users:
+            self.create_user(username, password)
+            count += 1
+        return count
+
+    def create_posts_bulk(self, posts):
+        """
+        Méthode pour créer plusieurs posts
+        Paramètres: posts (itérable de tuples (user, text))
+        Retourne: le nombre de posts créés
+        """
+        count = 0
+        for user, text in posts:
+            self.create_post(user, text)
+            count += 1
+        return count
+
+    def add_comments_bulk(self, comments):
+        """
+        Méthode pour ajouter plusieurs commentaires
+        Paramètres: comments (itérable de tuples (post, user, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        count = 0
+        for post, user, text in comments:
+            self.add_comment(post, user, text)
+            count += 1
+        return count
+
+    def iter_users(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les utilisateurs
+        Paramètres: batch_size (ignoré, les utilisateurs sont déjà en mémoire)
+        Retourne: un générateur d'objets User
+        """
+        with self._lock:
+            users = list(self.users.values())
+        yield from users
+
+    def import_users_bulk(self, users):
+        """
+        Méthode pour importer des utilisateurs (les pseudos déjà présents sont ignorés)
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs ajoutés
+        """
+        count = 0
+        for username, password in users:
+            if username not in self.users:
+                self.create_user(username, password)
+                count += 1
+        return count
+
+    def import_posts_bulk(self, posts):
+        """
+        Méthode pour importer des posts en gardant leurs ids (les ids déjà présents sont ignorés)
+        L'id d'un post étant son indice + 1, les ids importés doivent se suivre sans trou.
+        Paramètres: posts (itérable de tuples (post_id, username, text))
+        Retourne: le nombre de posts ajoutés
+        """
+        count = 0
+        for post_id, username, text in posts:
+            if post_id <= len(self._post_texts):
+                continue
+            if post_id != len(self._post_texts) + 1:
+                raise ValueError(f"id de post {post_id} non contigu (attendu {len(self._post_texts) + 1})")
+            self.create_post(self.users.get(username) or User(self, username, None), text)
+            count += 1
+        return count
+
+    def import_comments_bulk(self, comments):
+        """
+        Méthode pour importer des commentaires en gardant leurs ids et leur post (les ids déjà présents sont ignorés)
+        Les commentaires arrivent groupés par post : les ids sautés sont réservés (texte None)
+        et remplis quand leur commentaire arrive.
+        Paramètres: comments (itérable de tuples (comment_id, post_id, username, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        count = 0
+        with self._lock:
+            for comment_id, post_id, username, text in comments:
+                index = comment_id - 1
+                if index < len(self._comment_texts) and self._comment_texts[index] is not None:
+                    continue
+                if not 1 <= post_id <= len(self._post_texts):
+                    raise ValueError(f"post {post_id} introuvable pour le commentaire {comment_id}")
+                while len(self._comment_texts) <= index:
+                    self._comment_posts.append(-1)
+                    self._comment_authors.append(-1)
+                    self._comment_texts.append(None)
+                    self._next_comment.append(-1)
+                post_index = post_id - 1
+                self._comment_posts[index] = post_index
+                self._comment_authors[index] = self._intern_username(username)
+                self._comment_texts[index] = text
+                if self._last_comment[post_index] == -1:
+                    self._first_comment[post_index] = index
+                else:
+                    self._next_comment[self._last_comment[post_index]] = index
+                self._last_comment[post_index] = index
+                self.search_index.add(post_id, text)
+                self.trending.add_comment(post_id)
+                count += 1
+        return count
+
+# Base de donnée répartie sur plusieurs fichiers SQLite (un processus d'écriture par fichier)
+
+_shard_database = None # RealDatabase ouverte par le processus d'écriture d'un shard
+
+def _shard_open(path, options):
+    """
+    Fonction exécutée au démarrage du processus d'écriture d'un shard : ouvre sa base
+    Paramètres: path, options (paramètres de RealDatabase)
+    """
+    global _shard_database
+    _shard_database = RealDatabase(path, **options)
+
+def _shard_call(method, *args):
+    """
+    Fonction pour appeler une méthode de la base du shard (résultat sans objet du modèle : nombre ou None)
+    Paramètres: method (nom de la méthode), args
+    Retourne: le résultat de la méthode
+    """
+    return getattr(_shard_database, method)(*args)
+
+def _shard_update_password(username, password):
+    """
+    Fonction pour remplacer le mot de passe d'un utilisateur dans la base du shard (sans effet s'il n'y est pas)
+    Paramètres: username, password
+    """
+    _shard_database.update_password(User(_shard_database, username, None), password)
+
+def _shard_create_post(username, text):
+    """
+    Fonction pour créer un post dans la base du shard
+    Paramètres: username, text
+    Retourne: l'id du post dans le shard
+    """
+    return _shard_database.create_post(User(_shard_database, username, None), text).id
+
+def _shard_create_posts(rows):
+    """
+    Fonction pour créer plusieurs posts dans la base du shard
+    Paramètres: rows (liste de tuples (username, text))
+    Retourne: le nombre de posts créés
+    """
+    return _shard_database.create_posts_bulk((User(_shard_database, username, None), text) for username, text in rows)
+
+def _shard_import(users, posts, comments):
+    """
+    Fonction pour importer des utilisateurs, posts et commentaires dans la base du shard (ids du shard)
+    Paramètres: users, posts, comments (listes de tuples, voir import_*_bulk)
+    Retourne: le nombre de lignes ajoutées
+    """
+    count = 0
+    if users:
+        count += _shard_database.import_users_bulk(users)
+    if posts:
+        count += _shard_database.import_posts_bulk(posts)
+    if comments:
+        count += _shard_database.import_comments_bulk(comments)
+    return count
+
+def _shard_add_comments(users, rows, index, shard_count, floor):
+    """
+    Fonction pour ajouter des commentaires dans la base du shard, avec des ids uniques pour tous les shards
+    L'id est calculé par SQLite dans l'INSERT lui-même, sous le verrou d'écriture du fichier : c'est le premier id
+    supérieur au plus grand id du shard et à floor qui vaut numéro du shard + 1 modulo shard_count. Deux processus
+    qui écrivent dans le même shard ne peuvent donc pas obtenir le même id, deux shards non plus.
+    Paramètres: users (copies d'utilisateurs à importer avant), rows (liste de tuples (id du post dans le shard, username, text)),
+                index (numéro du shard), shard_count, floor (plus grand id de commentaire connu, tous shards confondus)
+    Retourne: la liste des ids attribués
+    """
+    if users:
+        _shard_database.import_users_bulk(users)
+    next_id = (
+        f"(SELECT base + (({index} - base) % {shard_count} + {shard_count}) % {shard_count} + 1 FROM "
+        f"(SELECT MAX(COALESCE(MAX(id), 0), {int(floor)}) AS base FROM {_shard_database.comments_table}))"
+    )
+    sql = _shard_database.insert_comment_sql.replace(":id", next_id, 1)
+    ids = []
+    with _shard_database._writing() as connection: # Même transaction qu'un _bulk_write, mais un INSERT par ligne pour lire son id
+        started = not connection.in_transaction
+        if started:
+            connection.execute("BEGIN")
+        connection.execute("SAVEPOINT bulk_write")
+        try:
+            for post_id, username, text in rows:
+                ids.append(connection.execute(sql, {"post_id": post_id, "username": username, "text": text}).lastrowid)
+        except sqlite3.Error:
+            _shard_database._rollback_bulk_write(connection, started)
+            raise
+        connection.execute("RELEASE bulk_write")
+        _shard_database._written(len(ids))
+    return ids
+
+def _shard_follow(follower, followee, follow):
+    """
+    Fonction pour abonner (ou désabonner) un utilisateur dans la base du shard
+    Paramètres: follower, followee (pseudos), follow (False pour un désabonnement)
+    """
+    method = _shard_database.follow if follow else _shard_database.unfollow
+    method(User(_shard_database, follower, None), User(_shard_database, followee, None))
+
+class ShardedDatabase(IDatabase):
+    """
+    Base répartie sur N fichiers SQLite (shards) pour écrire sur plusieurs cœurs. Chaque utilisateur
+    appartient au shard choisi par un hachage de son pseudo, et ses posts y sont créés. Les commentaires
+    sont rangés avec leur post ; une copie de leur auteur est ajoutée au shard si besoin (jointures).
+    Chaque shard a son propre processus d'écriture. Les lectures sont faites ici, sur tous les shards en
+    parallèle (scatter-gather), par les connexions de lecture de RealDatabase.
+    Id global d'un post : (id dans le shard - 1) * N + numéro du shard + 1, les ids 1 à N sont donc les premiers
+    posts de chaque shard (aucun id de shard ne vaut 0). Les ids des commentaires sont attribués par le shard
+    du post (voir _shard_add_comments) : plusieurs processus peuvent écrire dans les mêmes fichiers. Les imports,
+    qui gardent les ids du fichier, doivent en revanche être faits par un seul processus.
+    """
+    def __init__(self, path="database.db", shard_count=4, **options):
+        """
+        Paramètres: path (les shards sont nommés <nom>-<numéro><extension>), shard_count,
+                    options (paramètres de RealDatabase pour chaque shard)
+        """
+        self.shard_count = shard_count
+        self.paths = self.shard_paths(path, shard_count)
+        self._writers = [
+            concurrent.futures.ProcessPoolExecutor(1, initializer=_shard_open, initargs=(shard_path, options))
+            for shard_path in self.paths
+        ]
+        # Les processus démarrent (et créent le schéma) avant l'ouverture des lectures et de leurs threads
+        self._submit_all(_shard_call, "flush")
+        # Ici, les shards ne sont que lus : l'écriture est réservée à leur processus
+        self.shards = [RealDatabase(shard_path, read_only=True, **options) for shard_path in self.paths]
+        self._readers = concurrent.futures.ThreadPoolExecutor(shard_count, thread_name_prefix="shard")
+        self._lock = threading.Lock()
+        self._last_comment_id = max(shard.get_last_ids()[1] for shard in self.shards)
+        self._replicas = set() # (pseudo, shard) des copies d'utilisateurs déjà écrites
+
+    @staticmethod
+    def shard_paths(path, shard_count):
+        """
+        Méthode pour calculer les fichiers des shards
+        Paramètres: path, shard_count
+        Retourne: une liste de chemins (<nom>-<numéro><extension>)
+        """
+        base, extension = os.path.splitext(path)
+        return [f"{base}-{index}{extension or '.db'}" for index in range(shard_count)]
+
+    def _shard_of(self, username):
+        """
+        Méthode pour trouver le shard d'un utilisateur (crc32 : identique d'un processus à l'autre, contrairement à hash())
+        Paramètres: username
+        Retourne: le numéro du shard
+        """
+        return zlib.crc32(username.encode("utf-8")) % self.shard_count
+
+    def _global_id(self, index, local_id):
+        """
+        Méthode pour calculer l'id global d'un post à partir de son shard et de son id dans le shard
+        Paramètres: index (numéro du shard), local_id
+        Retourne: l'id global
+        """
+        return (local_id - 1) * self.shard_count + index + 1
+
+    def _locate(self, post_id):
+        """
+        Méthode pour trouver le shard d'un post et son id dans ce shard
+        Paramètres: post_id (id global)
+        Retourne: un tuple (numéro du shard, id dans le shard)
+        """
+        return (post_id - 1) % self.shard_count, (post_id - 1) // self.shard_count + 1
+
+    def _submit_all(self, function, *args):
+        """
+        Méthode pour exécuter la même écriture dans tous les shards et attendre la fin
+        Paramètres: function, args
+        Retourne: la liste des résultats
+        """
+        futures = [writer.submit(function, *args) for writer in self._writers]
+        return [future.result() for future in futures]
+
+    def _submit_groups(self, function, groups):
+        """
+        Méthode pour envoyer à chaque shard ses lignes en parallèle et attendre la fin
+        Paramètres: function, groups (numéro du shard -> arguments)
+        Retourne: la somme des résultats
+        """
+        futures = [self._writers[index].submit(function, *args) for index, args in groups.items()]
+        return sum(future.result() for future in futures)
+
+    def _gather(self, read):
+        """
+        Méthode pour exécuter une lecture sur tous les shards en parallèle (scatter-gather)
+        Paramètres: read (fonction (numéro, shard) -> résultat)
+        Retourne: la liste des résultats, par numéro de shard
+        """
+        return list(self._readers.map(read, range(self.shard_count), self.shards))
+
+    def _replica_users(self, index, usernames):
+        """
+        Méthode pour préparer les copies des utilisateurs qui n'appartiennent pas à un shard
+        Paramètres: index (numéro du shard), usernames
+        Retourne: une liste de tuples (username, password) à importer dans le shard
+        """
+        users = []
+        for username in set(usernames):
+            if self._shard_of(username) == index or (username, index) in self._replicas:
+                continue
+            user = self.shards[self._shard_of(username)].get_user(username)
+            if user:
+                users.append((username, user.password))
+                self._replicas.add((username, index))
+        return users
+
+    def _adopt_user(self, user, users):
+        """
+        Méthode pour rattacher un utilisateur lu dans un shard à cette base (identity map)
+        Paramètres: user (ou None), users
+        Retourne: un objet User ou None
+        """
+        if user is None:
+            return None
+        adopted = users.get(user.username)
+        if adopted is None:
+            adopted = users[user.username] = User(self, user.username, user.password)
+        return adopted
+
+    def _adopt_posts(self, index, posts, users=None):
+        """
+        Méthode pour rattacher des posts lus dans un shard à cette base (ids globaux)
+        Paramètres: index (numéro du shard), posts, users (identity map optionnelle)
+        Retourne: une liste d'objets Post
+        """
+        if users is None:
+            users = {}
+        adopted = []
+        for post in posts:
+            copy = Post(self, self._global_id(index, post.id), self._adopt_user(post.user, users), post.text)
+            copy.comments = [Comment(self, comment.id, copy, self._adopt_user(comment.user, users), comment.text) for comment in post.comments]
+            adopted.append(copy)
+        return adopted
+
+    def create_user(self, username, password):
+        """
+        Méthode pour créer un utilisateur dans son shard
+        Paramètres: username, password
+        Retourne: un objet User
+        """
+        self._writers[self._shard_of(username)].submit(_shard_call, "create_users_bulk", [(username, password)]).result()
+        return User(self, username, password)
+
+    def update_password(self, user, password):
+        """
+        Méthode pour remplacer le mot de passe d'un utilisateur dans tous les shards
+        (les auteurs de commentaires sont copiés dans le shard du post commenté)
+        Paramètres: user, password
+        """
+        self._submit_all(_shard_update_password, user.username, password)
+        user.password = password
+
+    def get_user(self, username):
+        """
+        Méthode pour récupérer un utilisateur dans son shard
+        Paramètres: username
+        Retourne: un objet User ou None
+        """
+        return self._adopt_user(self.shards[self._shard_of(username)].get_user(username), {})
+
+    def create_post(self, user, text):
+        """
+        Méthode pour créer un post dans le shard de son auteur
+        Paramètres: user, text
+        Retourne: un objet Post
+        """
+        index = self._shard_of(user.username)
+        local_id = self._writers[index].submit(_shard_create_post, user.username, text).result()
+        return Post(self, self._global_id(index, local_id), user, text)
+
+    def get_posts(self):
+        """
+        Méthode pour récupérer tous les posts (lus dans tous les shards et fusionnés par id)
+        Retourne: une liste d'objets Post
+        """
+        posts = self._gather(lambda index, shard: self._adopt_posts(index, shard.get_posts()))
+        return list(heapq.merge(*posts, key=lambda post: post.id))
+
+    def get_post(self, post_id):
+        """
+        Méthode pour récupérer un post par son id (le shard est donné par l'id)
+        Paramètres: post_id
+        Retourne: un objet Post ou None
+        """
+        if post_id < 1:
+            return None
+        index, local_id = self._locate(post_id)
+        post = self.shards[index].get_post(local_id)
+        return self._adopt_posts(index, [post])[0] if post else None
+
+    def get_posts_by_user(self, username):
+        """
+        Méthode pour récupérer les posts d'un utilisateur (tous les shards : un post importé garde le shard de son id)
+        Paramètres: username
+        Retourne: une liste d'objets Post
+        """
+        posts = self._gather(lambda index, shard: self._adopt_posts(index, shard.get_posts_by_user(username)))
+        return list(heapq.merge(*posts, key=lambda post: post.id))
+
+    def get_comments_for_post(self, post):
+        """
+        Méthode pour récupérer les commentaires d'un post
+        Paramètres: post
+        Retourne: une liste d'objets Comment
+        """
+        stored = self.get_post(post.id)
+        return stored.comments if stored else []
+
+    def search(self, query, limit=10):
+        """
+        Méthode pour rechercher des posts dans tous les shards
+        Les scores BM25 ne sont pas comparables d'un shard à l'autre : les résultats sont alternés par rang.
+        Paramètres: query, limit
+        Retourne: une liste d'objets Post
+        """
+        results = self._gather(lambda index, shard: self._adopt_posts(index, shard.search(query, limit)))
+        ranked = (post for rank in itertools.zip_longest(*results) for post in rank if post is not None)
+        return list(itertools.islice(ranked, limit))
+
+    def get_posts_page(self, after_id=None, limit=20):
+        """
+        Méthode pour récupérer une page de posts (pagination par curseur sur l'id global)
+        Chaque shard renvoie sa page à partir de son propre curseur, puis les pages sont fusionnées.
+        Paramètres: after_id (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post
+        """
+        def read(index, shard):
+            # Premier id du shard à ne pas renvoyer : (after_id - index - 1) // N + 1 ; 0 si aucun
+            after = (after_id - index - 1) // self.shard_count + 1 if after_id else None
+            return self._adopt_posts(index, shard.get_posts_page(after, limit))
+        return list(itertools.islice(heapq.merge(*self._gather(read), key=lambda post: post.id), limit))
+
+    def iter_posts(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les posts par ordre d'id, un paquet par shard en mémoire
+        Paramètres: batch_size
+        Retourne: un générateur d'objets Post
+        """
+        streams = [self._iter_shard_posts(index, shard, batch_size) for index, shard in enumerate(self.shards)]
+        yield from heapq.merge(*streams, key=lambda post: post.id)
+
+    def _iter_shard_posts(self, index, shard, batch_size):
+        """
+        Méthode pour parcourir les posts d'un shard avec leurs ids globaux
+        Paramètres: index, shard, batch_size
+        Retourne: un générateur d'objets Post
+        """
+        users = {}
+        for post in shard.iter_posts(batch_size):
+            yield from self._adopt_posts(index, [post], users)
+
+    def get_random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire
+        Retourne: un objet Post ou None
+        """
+        posts = self.get_random_posts(1)
+        if not posts:
+            return None
+        return posts[0]
+
+    def get_random_posts(self, k):
+        """
+        Méthode pour récupérer k posts aléatoires distincts : k places sont tirées sans remise parmi tous les posts
+        (numérotés shard après shard), puis chaque shard fournit autant de posts que de places tirées chez lui.
+        Chaque post a ainsi la même probabilité d'être choisi et aucun shard n'est sollicité au-delà de sa taille.
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        if k <= 0:
+            return []
+        ends = list(itertools.accumulate(self._gather(lambda index, shard: shard.get_post_count())))
+        if not ends[-1]:
+            return []
+        counts = collections.Counter(bisect.bisect_right(ends, slot) for slot in random.sample(range(ends[-1]), min(k, ends[-1])))
+        posts = self._gather(lambda index, shard: self._adopt_posts(index, shard.get_random_posts(counts[index])) if counts[index] else [])
+        posts = [post for shard_posts in posts for post in shard_posts]
+        random.shuffle(posts)
+        return posts
+
+    def add_comment(self, post, user, text):
+        """
+        Méthode pour ajouter un commentaire dans le shard de son post
+        Paramètres: post, user, text
+        Retourne: un objet Comment
+        """
+        index, local_id = self._locate(post.id)
+        with self._lock:
+            users = self._replica_users(index, [user.username])
+            floor = self._last_comment_id
+        rows = [(local_id, user.username, text)]
+        (comment_id,) = self._writers[index].submit(_shard_add_comments, users, rows, index, self.shard_count, floor).result()
+        with self._lock:
+            self._last_comment_id = max(self._last_comment_id, comment_id)
+        comment = Comment(self, comment_id, post, user, text)
+        post.comments.append(comment)
+        return comment
+
+    def follow(self, follower, followee):
+        """
+        Méthode pour abonner un utilisateur à un autre
+        L'abonnement est écrit dans tous les shards : les posts de l'auteur peuvent être dans chacun d'eux.
+        Paramètres: follower, followee
+        """
+        if follower.username == followee.username:
+            raise ValueError("Un utilisateur ne peut pas se suivre lui-même")
+        self._submit_all(_shard_follow, follower.username, followee.username, True)
+
+    def unfollow(self, follower, followee):
+        """
+        Méthode pour désabonner un utilisateur d'un autre (dans tous les shards)
+        Paramètres: follower, followee
+        """
+        self._submit_all(_shard_follow, follower.username, followee.username, False)
+
+    def get_timeline(self, user, cursor=None, limit=20):
+        """
+        Méthode pour récupérer le fil d'actualité d'un utilisateur (fils de chaque shard fusionnés)
+        Paramètres: user, cursor (id du dernier post de la page précédente, None pour la première page), limit
+        Retourne: une liste d'objets Post, du plus récent au plus ancien
+        """
+        def read(index, shard):
+            before = -((index + 1 - cursor) // self.shard_count) + 1 if cursor is not None else None
+            return self._adopt_posts(index, shard.get_timeline(user, before, limit))
+        return list(itertools.islice(heapq.merge(*self._gather(read), key=lambda post: post.id, reverse=True), limit))
+
+    def get_top_posts(self, k=10):
+        """
+        Méthode pour récupérer les posts les plus tendance (scores de chaque shard fusionnés)
+        Paramètres: k
+        Retourne: une liste d'objets Post, du plus au moins tendance
+        """
+        scores = self._gather(lambda index, shard: [
+            (score, self._global_id(index, local_id), comment_count) for local_id, score, comment_count in shard.get_top_post_scores(k)
+        ])
+        posts = []
+        for score, post_id, comment_count in heapq.nlargest(k, itertools.chain.from_iterable(scores)):
+            post = self.get_post(post_id)
+            if post:
+                post.comment_count = comment_count
+                posts.append(post)
+        return posts
+
+    def create_users_bulk(self, users):
+        """
+        Méthode pour créer plusieurs utilisateurs, chaque shard écrivant les siens en parallèle
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs créés
+        """
+        groups = {}
+        for username, password in users:
+            groups.setdefault(self._shard_of(username), []).append((username, password))
+        return self._submit_groups(_shard_call, {index: ("create_users_bulk", rows) for index, rows in groups.items()})
+
+    def create_posts_bulk(self, posts):
+        """
+        Méthode pour créer plusieurs posts, chaque shard écrivant les siens en parallèle
+        Paramètres: posts (itérable de tuples (user, text))
+        Retourne: le nombre de posts créés
+        """
+        groups = {}
+        for user, text in posts:
+            groups.setdefault(self._shard_of(user.username), []).append((user.username, text))
+        return self._submit_groups(_shard_create_posts, {index: (rows,) for index, rows in groups.items()})
+
+    def add_comments_bulk(self, comments):
+        """
+        Méthode pour ajouter plusieurs commentaires, chaque shard écrivant les siens en parallèle
+        Paramètres: comments (itérable de tuples (post, user, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        groups = {}
+        for post, user, text in comments:
+            index, local_id = self._locate(post.id)
+            groups.setdefault(index, []).append((local_id, user.username, text))
+        with self._lock:
+            users = {index: self._replica_users(index, [row[1] for row in rows]) for index, rows in groups.items()}
+            floor = self._last_comment_id
+        futures = [
+            self._writers[index].submit(_shard_add_comments, users[index], rows, index, self.shard_count, floor)
+            for index, rows in groups.items()
+        ]
+        ids = [comment_id for future in futures for comment_id in future.result()]
+        with self._lock:
+            self._last_comment_id = max([self._last_comment_id, *ids])
+        return len(ids)
+
+    def iter_users(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les utilisateurs, shard par shard (sans les copies)
+        Paramètres: batch_size
+        Retourne: un générateur d'objets User
+        """
+        for index, shard in enumerate(self.shards):
+            for user in shard.iter_users(batch_size):
+                if self._shard_of(user.username) == index:
+                    yield User(self, user.username, user.password)
+
+    def import_users_bulk(self, users):
+        """
+        Méthode pour importer des utilisateurs dans leur shard (les pseudos déjà présents sont ignorés)
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs ajoutés
+        """
+        groups = {}
+        for username, password in users:
+            groups.setdefault(self._shard_of(username), []).append((username, password))
+        return self._submit_groups(_shard_import, {index: (rows, [], []) for index, rows in groups.items()})
+
+    def import_posts_bulk(self, posts):
+        """
+        Méthode pour importer des posts en gardant leurs ids : le shard est donné par l'id, pas par l'auteur
+        Paramètres: posts (itérable de tuples (post_id, username, text))
+        Retourne: le nombre de posts ajoutés
+        """
+        groups = {}
+        for post_id, username, text in posts:
+            index, local_id = self._locate(post_id)
+            groups.setdefault(index, []).append((local_id, username, text))
+        with self._lock:
+            users = {index: self._replica_users(index, [row[1] for row in rows]) for index, rows in groups.items()}
+        return self._submit_groups(_shard_import, {index: (users[index], rows, []) for index, rows in groups.items()})
+
+    def import_comments_bulk(self, comments):
+        """
+        Méthode pour importer des commentaires dans le shard de leur post, en gardant leurs ids
+        Paramètres: comments (itérable de tuples (comment_id, post_id, username, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        groups = {}
+        with self._lock:
+            for comment_id, post_id, username, text in comments:
+                self._last_comment_id = max(self._last_comment_id, comment_id)
+                index, local_id = self._locate(post_id)
+                groups.setdefault(index, []).append((comment_id, local_id, username, text))
+            users = {index: self._replica_users(index, [row[2] for row in rows]) for index, rows in groups.items()}
+        return self._submit_groups(_shard_import, {index: (users[index], [], rows) for index, rows in groups.items()})
+
+    def flush(self):
+        """
+        Méthode pour valider immédiatement les écritures en attente de tous les shards
+        """
+        self._submit_all(_shard_call, "flush")
+
+    def close(self):
+        """
+        Méthode pour fermer les shards et arrêter leurs processus d'écriture
+        """
+        self._submit_all(_shard_call, "close")
+        for writer in self._writers:
+            writer.shutdown()
+        self._readers.shutdown()
+        for shard in self.shards:
+            shard.close()
+
+# Class de cache en lecture devant n'importe quelle base de donnée
+
+class CachedDatabase(IDatabase):
+    """
+    Décorateur d'IDatabase : les utilisateurs, les posts, les listes de commentaires et les pages du feed lus
+    sont gardés dans des caches LRU bornés à durée de vie limitée. Les écritures faites à travers ce décorateur
+    (create_post, add_comment...) invalident ou mettent à jour les entrées concernées. Les modèles renvoyés
+    sont rattachés au décorateur : post.add_comment() ou user.create_post() passent donc aussi par le cache.
+    """
+    def __init__(self, database: IDatabase, maxsize=10000, user_ttl=300, post_ttl=30):
+        self.database = database
+        self.users = LRUCache(maxsize, user_ttl) # Pseudo -> User
+        self.posts = LRUCache(maxsize, post_ttl) # Id -> Post
+        self.comments = LRUCache(maxsize, post_ttl) # Id du post -> liste de Comment
+        self.pages = LRUCache(maxsize, post_ttl) # (after_id, limit) -> liste de Post, vidé à chaque écriture
+
+    def stats(self):
+        """
+        Méthode pour récupérer les compteurs (succès, échecs, évictions) de chaque cache
+        Retourne: un dictionnaire {nom du cache: compteurs}
+        """
+        return {"users": self.users.stats(), "posts": self.posts.stats(), "comments": self.comments.stats(), "pages": self.pages.stats()}
+
+    def set_trace_callback(self, callback):
+        """
+        Méthode pour transmettre les requêtes SQL de la base décorée à une fonction (sans effet si elle n'en exécute pas)
+        Paramètres: callback (fonction qui reçoit le texte de la requête, None pour arrêter)
+        """
+        if hasattr(self.database, "set_trace_callback"):
+            self.database.set_trace_callback(callback)
+
+    def _bind(self, model):
+        """
+        Méthode pour rattacher un modèle lu dans la base décorée (et ses auteurs et commentaires) à ce décorateur
+        Paramètres: model (Post, User ou None)
+        Retourne: le modèle
+        """
+        if isinstance(model, Post):
+            for comment in model.comments:
+                comment._database = self
+                if comment.user is not None:
+                    comment.user._database = self
+            if model.user is not None:
+                model.user._database = self
+        if model is not None:
+            model._database = self
+        return model
+
+    def _bind_all(self, models):
+        """
+        Méthode pour rattacher une liste de modèles à ce décorateur
+        Paramètres: models
+        Retourne: la liste
+        """
+        for model in models:
+            self._bind(model)
+        return models
+
+    def _posts_written(self, post_ids=()):
+        """
+        Méthode pour invalider les entrées touchées par une écriture : les posts donnés et toutes les pages
+        Paramètres: post_ids (posts dont les commentaires ont changé)
+        """
+        self.pages.clear()
+        for post_id in post_ids:
+            self.posts.pop(post_id)
+            self.comments.pop(post_id)
+
+    def create_user(self, username, password):
+        """
+        Méthode pour créer un utilisateur (gardé en cache)
+        Paramètres: username, password
+        Retourne: un objet User
+        """
+        user = self._bind(self.database.create_user(username, password))
+        self.users.put(username, user)
+        return user
+
+    def update_password(self, user, password):
+        """
+        Méthode pour remplacer le mot de passe d'un utilisateur (l'utilisateur en cache est invalidé)
+        Paramètres: user, password
+        """
+        self.database.update_password(user, password)
+        self.users.pop(user.username)
+
+    def get_user(self, username):
+        """
+        Méthode pour récupérer un utilisateur, depuis le cache si possible
+        Paramètres: username
+        Retourne: un objet User ou None
+        """
+        user = self.users.get(username)
+        if user is None:
+            user = self._bind(self.database.get_user(username))
+            if user is not None: # Les absences ne sont pas mises en cache (inscription à venir)
+                self.users.put(username, user)
+        return user
+
+    def create_post(self, user, text):
+        """
+        Méthode pour créer un post (gardé en cache, les pages du feed sont invalidées)
+        Paramètres: user, text
+        Retourne: un objet Post
+        """
+        post = self._bind(self.database.create_post(user, text))
+        self._posts_written()
+        self.posts.put(post.id, post)
+        return post
+
+    def get_posts(self):
+        """
+        Méthode pour récupérer tous les posts (non mis en cache)
+        Retourne: une liste d'objets Post
+        """
+        return self._bind_all(self.database.get_posts())
+
+    def get_post(self, post_id):
+        """
+        Méthode pour récupérer un post par son id, depuis le cache si possible
+        Paramètres: post_id
+        Retourne: un objet Post ou None
+        """
+        post = self.posts.get(post_id)
+        if post is None:
+            post = self._bind(self.database.get_post(post_id))
+            if post is not None:
+                self.posts.put(post_id, post)
+        return post
+
+    def get_posts_by_user(self, username):
+        """
+        Méthode pour récupérer les posts d'un utilisateur (non mis en cache)
+        Paramètres: username
+        Retourne: une liste d'objets Post
+        """
+        return self._bind_all(self.database.get_posts_by_user(username))
+
+    def get_comments_for_post(self, post):
+        """
+        Méthode pour récupérer les commentaires d'un post, depuis le cache si possible
+        Paramètres: post
+        Retourne: une liste d'objets Comment
+        """
+        comments = self.comments.get(post.id)
+        if comments is None:
+            comments = self._bind_all(self.database.get_comments_for_post(post))
+            self.comments.put(post.id, comments)
+        return comments
+
+    def search(self, query, limit=10):
+        """
+        Méthode pour rechercher des posts (non mis en cache)
+        Paramètres: query, limit
+        Retourne: une liste d'objets Post
+        """
+        return self._bind_all(self.database.search(query, limit))
+
+    def get_posts_page(self, after_id=None, limit=20):
+        """
+        Méthode pour récupérer une page du feed, depuis le cache si possible (clé (after_id, limit))
+        Paramètres: after_id, limit
+        Retourne: une liste d'objets Post
+        """
+        key = (after_id, limit)
+        posts = self.pages.get(key)
+        if posts is None:
+            posts = self._bind_all(self.database.get_posts_page(after_id, limit))
+            self.pages.put(key, posts)
+        return list(posts) # Copie : l'appelant peut modifier sa liste sans toucher au cache
+
+    def iter_posts(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les posts (non mis en cache)
+        Paramètres: batch_size
+        Retourne: un générateur d'objets Post
+        """
+        for post in self.database.iter_posts(batch_size):
+            yield self._bind(post)
+
+    def get_random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire : le tirage est fait par la base décorée, le post renvoyé
+        est celui du cache s'il y est déjà (commentaires à jour), sinon il y est ajouté
+        Retourne: un objet Post ou None
+        """
+        post = self.database.get_random_post()
+        if post is None:
+            return None
+        cached = self.posts.get(post.id)
+        if cached is not None:
+            return cached
+        self.posts.put(post.id, self._bind(post))
+        return post
+
+    def get_random_posts(self, k):
+        """
+        Méthode pour récupérer k posts aléatoires distincts (non mis en cache)
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        return self._bind_all(self.database.get_random_posts(k))
+
+    def add_comment(self, post, user, text):
+        """
+        Méthode pour ajouter un commentaire (le post, ses commentaires et les pages sont invalidés)
+        Paramètres: post, user, text
+        Retourne: un objet Comment
+        """
+        comment = self._bind(self.database.add_comment(post, user, text))
+        self._posts_written([post.id])
+        return comment
+
+    def follow(self, follower, followee):
+        """
+        Méthode pour abonner un utilisateur à un autre
+        Paramètres: follower, followee
+        """
+        return self.database.follow(follower, followee)
+
+    def unfollow(self, follower, followee):
+        """
+        Méthode pour désabonner un utilisateur d'un autre
+        Paramètres: follower, followee
+        """
+        return self.database.unfollow(follower, followee)
+
+    def get_timeline(self, user, cursor=None, limit=20):
+        """
+        Méthode pour récupérer le fil d'actualité d'un utilisateur (non mis en cache)
+        Paramètres: user, cursor, limit
+        Retourne: une liste d'objets Post
+        """
+        return self._bind_all(self.database.get_timeline(user, cursor, limit))
+
+    def get_top_posts(self, k=10):
+        """
+        Méthode pour récupérer les posts les plus tendance (change à chaque commentaire : non mis en cache)
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        return self._bind_all(self.database.get_top_posts(k))
+
+    def create_users_bulk(self, users):
+        """
+        Méthode pour créer plusieurs utilisateurs (entrées du cache invalidées)
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs créés
+        """
+        users = list(users)
+        result = self.database.create_users_bulk(users)
+        for username, _ in users:
+            self.users.pop(username)
+        return result
+
+    def create_posts_bulk(self, posts):
+        """
+        Méthode pour créer plusieurs posts (les pages du feed sont invalidées)
+        Paramètres: posts (itérable de tuples (user, text))
+        Retourne: le nombre de posts créés
+        """
+        result = self.database.create_posts_bulk(posts)
+        self._posts_written()
+        return result
+
+    def add_comments_bulk(self, comments):
+        """
+        Méthode pour ajouter plusieurs commentaires (posts, commentaires et pages invalidés)
+        Paramètres: comments (itérable de tuples (post, user, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        comments = list(comments)
+        result = self.database.add_comments_bulk(comments)
+        self._posts_written(post.id for post, _, _ in comments)
+        return result
+
+    def iter_users(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les utilisateurs (non mis en cache)
+        Paramètres: batch_size
+        Retourne: un générateur d'objets User
+        """
+        for user in self.database.iter_users(batch_size):
+            yield self._bind(user)
+
+    def import_users_bulk(self, users):
+        """
+        Méthode pour importer des utilisateurs (entrées du cache invalidées)
+        Paramètres: users (itérable de tuples (username, password))
+        Retourne: le nombre d'utilisateurs ajoutés
+        """
+        users = list(users)
+        result = self.database.import_users_bulk(users)
+        for username, _ in users:
+            self.users.pop(username)
+        return result
+
+    def import_posts_bulk(self, posts):
+        """
+        Méthode pour importer des posts (posts et pages invalidés)
+        Paramètres: posts (itérable de tuples (post_id, username, text))
+        Retourne: le nombre de posts ajoutés
+        """
+        posts = list(posts)
+        result = self.database.import_posts_bulk(posts)
+        self._posts_written(post_id for post_id, _, _ in posts)
+        return result
+
+    def import_comments_bulk(self, comments):
+        """
+        Méthode pour importer des commentaires (posts, commentaires et pages invalidés)
+        Paramètres: comments (itérable de tuples (comment_id, post_id, username, text))
+        Retourne: le nombre de commentaires ajoutés
+        """
+        comments = list(comments)
+        result = self.database.import_comments_bulk(comments)
+        self._posts_written(post_id for _, post_id, _, _ in comments)
+        return result
+
+    def close(self):
+        """
+        Méthode pour vider les caches et fermer la base décorée
+        """
+        self.users.clear()
+        self.posts.clear()
+        self.comments.clear()
+        self.pages.clear()
+        return self.database.close()
+
+# Class d'instrumentation devant n'importe quelle base de donnée (profilage à la demande)
+
+class InstrumentedDatabase(IDatabase):
+    """
+    Décorateur d'IDatabase qui mesure le nombre d'appels et le temps passé dans chaque méthode, compte les
+    requêtes SQL exécutées (si la base le permet) et les rattache à l'action de l'app en cours, pour
+    repérer les motifs N+1. Une action peut aussi être capturée avec cProfile et/ou tracemalloc.
+    """
+    SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b") # Valeurs remplacées par ? pour regrouper les requêtes
+
+    def __init__(self, database: IDatabase, profile=None):
+        """
+        Paramètres: database, profile ("cprofile", "tracemalloc" ou "all" pour capturer chaque action, None sinon)
+        """
+        self.database = database
+        self.profile = profile if profile in ("cprofile", "tracemalloc", "all") else None
+        self.calls = {} # Méthode -> [appels, secondes, maximum]
+        self.statements = collections.Counter() # Requête normalisée -> nombre d'exécutions
+        self.actions = {} # Action -> {"runs", "seconds", "database", "output", "input", "calls", "statements", "max_statements"}
+        self.last_profile = None # Rapport de la dernière capture cProfile/tracemalloc
+        self._statement_count = 0
+        self._call_count = 0
+        self._database_seconds = 0.0
+        self._lock = threading.Lock()
+        if hasattr(database, "set_trace_callback"):
+            database.set_trace_callback(self._trace)
+
+    def _trace(self, statement):
+        """
+        Méthode appelée par SQLite pour chaque requête exécutée
+        Paramètres: statement
+        """
+        key = " ".join(self.SQL_LITERALS.sub("?", statement).split())
+        with self._lock:
+            self.statements[key] += 1
+            self._statement_count += 1
+
+    def _record(self, name, seconds):
+        """
+        Méthode pour enregistrer la durée d'un appel
+        Paramètres: name, seconds
+        """
+        with self._lock:
+            stats = self.calls.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            self._call_count += 1
+            self._database_seconds += seconds
+
+    def _call(self, method, *args):
+        """
+        Méthode pour appeler une méthode de la base décorée en mesurant sa durée
+        Paramètres: method, args
+        Retourne: le résultat de la méthode
+        """
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._record(method.__name__, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def action(self, name, profile=None):
+        """
+        Gestionnaire de contexte qui rattache les appels et requêtes SQL à une action de l'app. Le temps passé
+        à écrire dans le terminal et à attendre la saisie est mesuré à part.
+        Paramètres: name, profile ("cprofile", "tracemalloc", "all" ou None pour le réglage de la base)
+        """
+        profile = profile or self.profile
+        with self._lock:
+            statements, calls, database_seconds = self._statement_count, self._call_count, self._database_seconds
+        timings = {"output": 0.0, "input": 0.0}
+        real_stdout, real_input = sys.stdout, builtins.input
+
+        class TimedOutput:
+            def write(self, text):
+                start = time.perf_counter()
+                try:
+                    return real_stdout.write(text)
+                finally:
+                    timings["output"] += time.perf_counter() - start
+
+            def flush(self):
+                start = time.perf_counter()
+                try:
+                    return real_stdout.flush()
+                finally:
+                    timings["output"] += time.perf_counter() - start
+
+            def __getattr__(self, attribute):
+                return getattr(real_stdout, attribute)
+
+        def timed_input(prompt=""):
+            start = time.perf_counter()
+            try:
+                return real_input(prompt)
+            finally:
+                timings["input"] += time.perf_counter() - start
+
+        profiler = cProfile.Profile() if profile in ("cprofile", "all") else None
+        tracing = profile in ("tracemalloc", "all") and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        sys.stdout, builtins.input = TimedOutput(), timed_input
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            seconds = time.perf_counter() - start
+            sys.stdout, builtins.input = real_stdout, real_input
+            with self._lock:
+                action_statements = self._statement_count - statements
+                stats = self.actions.setdefault(name, {
+                    "runs": 0, "seconds": 0.0, "database": 0.0, "output": 0.0, "input": 0.0,
+                    "calls": 0, "statements": 0, "max_statements": 0
+                })
+                stats["runs"] += 1
+                stats["seconds"] += seconds
+                stats["database"] += self._database_seconds - database_seconds
+                stats["output"] += timings["output"]
+                stats["input"] += timings["input"]
+                stats["calls"] += self._call_count - calls
+                stats["statements"] += action_statements
+                stats["max_statements"] = max(stats["max_statements"], action_statements)
+            if profiler or tracing:
+                report = io.StringIO()
+                if tracing: # Avant la mise en forme du profil, qui alloue elle aussi
+                    current, peak = tracemalloc.get_traced_memory()
+                    snapshot = tracemalloc.take_snapshot().filter_traces((
+                        tracemalloc.Filter(False, tracemalloc.__file__),
+                        tracemalloc.Filter(False, cProfile.__file__)
+                    ))
+                    tracemalloc.stop()
+                    report.write(f"tracemalloc de {name}: {current / 1024:.1f} Kio alloués, pic {peak / 1024:.1f} Kio\n")
+                    for statistic in snapshot.statistics("lineno")[:10]:
+                        report.write(f"  {statistic}\n")
+                if profiler:
+                    report.write(f"cProfile de {name} (20 fonctions les plus coûteuses, temps cumulé):\n")
+                    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(20)
+                self.last_profile = report.getvalue()
+
+    def reset(self):
+        """
+        Méthode pour remettre les compteurs à zéro
+        """
+        with self._lock:
+            self.calls.clear()
+            self.statements.clear()
+            self.actions.clear()
+            self.last_profile = None
+
+    def summary(self, top=10):
+        """
+        Méthode pour construire le résumé des mesures
+        Paramètres: top (nombre de requêtes SQL les plus fréquentes affichées)
+        Retourne: une chaîne
+        """
+        with self._lock:
+            lines = ["Actions (temps total = base + terminal + saisie + reste du code Python):"]
+            for name, stats in sorted(self.actions.items(), key=lambda item: -item[1]["seconds"]):
+                other = stats["seconds"] - stats["database"] - stats["output"] - stats["input"]
+                lines.append(
+                    f"  {name:<22} {stats['runs']:5d} fois   base {stats['database'] * 1000:9.2f} ms   "
+                    f"terminal {stats['output'] * 1000:9.2f} ms   reste {other * 1000:9.2f} ms   "
+                    f"SQL {stats['statements'] / stats['runs']:7.1f}/action (max {stats['max_statements']})   "
+                    f"appels {stats['calls'] / stats['runs']:6.1f}/action"
+                )
+            lines.append("Méthodes de la base:")
+            for name, (count, seconds, maximum) in sorted(self.calls.items(), key=lambda item: -item[1][1]):
+                lines.append(
+                    f"  {name:<22} {count:7d} appels   total {seconds * 1000:10.2f} ms   "
+                    f"moyenne {seconds / count * 1000:8.3f} ms   max {maximum * 1000:8.3f} ms"
+                )
+            if self.statements:
+                lines.append(f"Requêtes SQL les plus fréquentes ({sum(self.statements.values())} au total):")
+                for statement, count in self.statements.most_common(top):
+                    lines.append(f"  {count:7d} x {statement[:120]}")
+            if self.last_profile:
+                lines.append(self.last_profile)
+            return "\n".join(lines)
+
+    def create_user(self, username, password):
+        """
+        Méthode pour créer un utilisateur (mesuré)
+        Paramètres: username, password
+        Retourne: un objet User
+        """
+        return self._call(self.database.create_user, username, password)
+
+    def update_password(self, user, password):
+        """
+        Méthode pour remplacer le mot de passe d'un utilisateur (mesuré)
+        Paramètres: user, password
+        """
+        return self._call(self.database.update_password, user, password)
+
+    def get_user(self, username):
+        """
+        Méthode pour récupérer un utilisateur (mesuré)
+        Paramètres: username
+        Retourne: un objet User ou None
+        """
+        return self._call(self.database.get_user, username)
+
+    def create_post(self, user, text):
+        """
+        Méthode pour créer un post (mesuré)
+        Paramètres: user, text
+        Retourne: un objet Post
+        """
+        return self._call(self.database.create_post, user, text)
+
+    def get_posts(self):
+        """
+        Méthode pour récupérer tous les posts (mesuré)
+        Retourne: une liste d'objets Post
+        """
+        return self._call(self.database.get_posts)
+
+    def get_post(self, post_id):
+        """
+        Méthode pour récupérer un post par son id (mesuré)
+        Paramètres: post_id
+        Retourne: un objet Post ou None
+        """
+        return self._call(self.database.get_post, post_id)
+
+    def get_posts_by_user(self, username):
+        """
+        Méthode pour récupérer les posts d'un utilisateur (mesuré)
+        Paramètres: username
+        Retourne: une liste d'objets Post
+        """
+        return self._call(self.database.get_posts_by_user, username)
+
+    def get_comments_for_post(self, post):
+        """
+        Méthode pour récupérer les commentaires d'un post (mesuré)
+        Paramètres: post
+        Retourne: une liste d'objets Comment
+        """
+        return self._call(self.database.get_comments_for_post, post)
+
+    def search(self, query, limit=10):
+        """
+        Méthode pour rechercher des posts (mesuré)
+        Paramètres: query, limit
+        Retourne: une liste d'objets Post
+        """
+        return self._call(self.database.search, query, limit)
+
+    def get_posts_page(self, after_id=None, limit=20):
+        """
+        Méthode pour récupérer une page du feed (mesuré)
+        Paramètres: after_id, limit
+        Retourne: une liste d'objets Post
+        """
+        return self._call(self.database.get_posts_page, after_id, limit)
+
+    def iter_posts(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les posts (mesuré)
+        Seul le temps passé à produire les posts est compté, pas celui de l'appelant entre deux posts.
+        Paramètres: batch_size
+        Retourne: un générateur d'objets Post
+        """
+        iterator = iter(self.database.iter_posts(batch_size))
+        seconds = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    post = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - start
+                yield post
+        finally:
+            self._record("iter_posts", seconds)
+
+    def get_random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire (mesuré)
+        Retourne: un objet Post ou None
+        """
+        return self._call(self.database.get_random_post)
+
+    def get_random_posts(self, k):
+        """
+        Méthode pour récupérer k posts aléatoires distincts (mesuré)
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        return self._call(self.database.get_random_posts, k)
+
+    def add_comment(self, post, user, text):
+        """
+        Méthode pour ajouter un commentaire (mesuré)
+        Paramètres: post, user, text
+        Retourne: un objet Comment
+        """
+        return self._call(self.database.add_comment, post, user, text)
+
+    def follow(self, follower, followee):
+        """
+        Méthode pour abonner un utilisateur à un autre (mesuré)
+        Paramètres: follower, followee
+        """
+        return self._call(self.database.follow, follower, followee)
+
+    def unfollow(self, follower, followee):
+        """
+        Méthode pour désabonner un utilisateur d'un autre (mesuré)
+        Paramètres: follower, followee
+        """
+        return self._call(self.database.unfollow, follower, followee)
+
+    def get_timeline(self, user, cursor=None, limit=20):
+        """
+        Méthode pour récupérer le fil d'actualité d'un utilisateur (mesuré)
+        Paramètres: user, cursor, limit
+        Retourne: une liste d'objets Post
+        """
+        return self._call(self.database.get_timeline, user, cursor, limit)
+
+    def get_top_posts(self, k=10):
+        """
+        Méthode pour récupérer les posts les plus tendance (mesuré)
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        return self._call(self.database.get_top_posts, k)
+
+    def create_users_bulk(self, users):
+        """
+        Méthode pour créer plusieurs utilisateurs (mesuré)
+        Paramètres: users
+        Retourne: le nombre d'utilisateurs créés
+        """
+        return self._call(self.database.create_users_bulk, users)
+
+    def create_posts_bulk(self, posts):
+        """
+        Méthode pour créer plusieurs posts (mesuré)
+        Paramètres: posts
+        Retourne: le nombre de posts créés
+        """
+        return self._call(self.database.create_posts_bulk, posts)
+
+    def add_comments_bulk(self, comments):
+        """
+        Méthode pour ajouter plusieurs commentaires (mesuré)
+        Paramètres: comments
+        Retourne: le nombre de commentaires ajoutés
+        """
+        return self._call(self.database.add_comments_bulk, comments)
+
+    def iter_users(self, batch_size=100):
+        """
+        Méthode pour parcourir tous les utilisateurs (mesuré)
+        Paramètres: batch_size
+        Retourne: un générateur d'objets User
+        """
+        return self._call(self.database.iter_users, batch_size)
+
+    def import_users_bulk(self, users):
+        """
+        Méthode pour importer des utilisateurs (mesuré)
+        Paramètres: users
+        Retourne: le nombre d'utilisateurs ajoutés
+        """
+        return self._call(self.database.import_users_bulk, users)
+
+    def import_posts_bulk(self, posts):
+        """
+        Méthode pour importer des posts en gardant leurs ids (mesuré)
+        Paramètres: posts
+        Retourne: le nombre de posts ajoutés
+        """
+        return self._call(self.database.import_posts_bulk, posts)
+
+    def import_comments_bulk(self, comments):
+        """
+        Méthode pour importer des commentaires en gardant leurs ids (mesuré)
+        Paramètres: comments
+        Retourne: le nombre de commentaires ajoutés
+        """
+        return self._call(self.database.import_comments_bulk, comments)
+
+    def close(self):
+        """
+        Méthode pour arrêter la capture des requêtes SQL et fermer la base décorée
+        """
+        if hasattr(self.database, "set_trace_callback"):
+            self.database.set_trace_callback(None)
+        return self._call(self.database.close)
+
+# Class des Posts
+
+class Post(DatabaseModel):
+    __slots__ = ("id", "user", "text", "comments", "comment_count")
+
+    def __init__(self, database, post_id, user, text):
+        super().__init__(database)
+        self.id = post_id
+        self.user = user
+        self.text = text
+        self.comments = []
+        self.comment_count = None # Compteur tenu par la base, renseigné par get_top_posts (None sinon)
+
+    def __str__(self):
+        return f"{self.user} : {self.text}"
+
+    def add_comment(self, user, text):
+        """
+        Méthode pour ajouter un commentaire
+        Paramètres: user, text
+        Retourne: un objet Comment
+        """
+        return self._database.add_comment(self, user, text)
+
+# Class des Commentaires
+
+class Comment(DatabaseModel):
+    __slots__ = ("id", "post", "user", "text")
+
+    def __init__(self, database, comment_id, post, user, text):
+        super().__init__(database)
+        self.id = comment_id
+        self.post = post
+        self.user = user
+        self.text = text
+
+    def __str__(self):
+        return f"{self.user}: {self.text}"
+    
+# Class des Utilisateurs
+
+class User(DatabaseModel):
+    __slots__ = ("username", "password")
+
+    def __init__(self, database, username, password):
+        super().__init__(database)
+        self.username = username
+        self.password = password
+
+    def __str__(self):
+        return f"{self.username}"
+
+    def create_post(self, text):
+        """
+        Méthode pour créer un post
+        Paramètres: text
+        Retourne: un objet Post
+        """
+        return self._database.create_post(self, text)
+
+    def follow(self, user):
+        """
+        Méthode pour suivre un utilisateur
+        Paramètres: user
+        """
+        self._database.follow(self, user)
+
+    def unfollow(self, user):
+        """
+        Méthode pour ne plus suivre un utilisateur
+        Paramètres: user
+        """
+        self._database.unfollow(self, user)
+
+# Cache LRU borné (avec durée de vie optionnelle des entrées)
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl # Durée de vie d'une entrée en secondes, None pour illimitée
+        self._entries = collections.OrderedDict() # Clé -> (valeur, échéance ou None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0 # Entrées évincées faute de place ou expirées
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Méthode pour récupérer une entrée (qui devient la plus récemment utilisée)
+        Paramètres: key, default
+        Retourne: la valeur ou default si l'entrée est absente ou expirée
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Méthode pour ajouter une entrée, en évinçant la moins récemment utilisée si le cache est plein
+        Paramètres: key, value
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        """
+        Méthode pour retirer une entrée
+        Paramètres: key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Méthode pour vider le cache
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Méthode pour récupérer les compteurs du cache
+        Retourne: un dictionnaire {"size", "hits", "misses", "evictions", "hit_rate"}
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+# Rendu des boîtes de posts et commentaires
+
+class PostRenderer:
+    POST_PREFIX = "\033[1;33m"
+    COMMENT_PREFIX = "｜   "
+
+    def __init__(self, cache_size=1024):
+        # Clé (id du post, nombre de commentaires) : un post inchangé n'est pas redessiné
+        self._cache = LRUCache(cache_size)
+
+    def render_post(self, post):
+        """
+        Méthode pour dessiner un post et ses commentaires en une seule chaîne
+        Paramètres: post
+        Retourne: une chaîne prête à être écrite dans le terminal
+        """
+        key = (post.id, len(post.comments))
+        rendered = self._cache.get(key)
+        if rendered is None:
+            parts = [self._render_box(self.POST_PREFIX, post.user.username, post.text)]
+            for comment in post.comments:
+                parts.append("\n\n")
+                parts.append(self._render_box(self.COMMENT_PREFIX, comment.user.username, comment.text))
+            rendered = "".join(parts)
+            self._cache.put(key, rendered)
+        return rendered
+
+    @staticmethod
+    def _render_box(prefix, title, text):
+        """
+        Méthode pour dessiner une boîte contenant un titre (le pseudo) et un texte sur plusieurs lignes
+        Paramètres: prefix (couleur ou indentation), title, text
+        Retourne: une chaîne
+        """
+        lines = text.split('\n')
+        width = max(max(len(line) for line in lines), len(title)) + 4
+        blank = prefix + "█" + " " * (width + 2) + "█\033[0m\n"
+        parts = [prefix + "█" + "▀" * (width + 2) + "█\033[0m\n", blank]
+        parts.append(prefix + "█   " + title + " " * (width - len(title) - 1) + "█\033[0m\n")
+        parts.append(blank)
+        for line in lines:
+            parts.append(prefix + "█   " + line + " " * (width - len(line) - 1) + "█\033[0m\n")
+        parts.append(blank)
+        parts.append(prefix + "█" + "▄" * (width + 2) + "█\033[0m\n")
+        return "".join(parts)
+
+# Authentification : empreintes de mots de passe et sessions
+
+PASSWORD_SCHEMES = ("scrypt$", "pbkdf2_sha256$")
+
+def hash_password(password, n=2 ** 14, r=8, p=1, iterations=600000):
+    """
+    Fonction pour calculer l'empreinte d'un mot de passe avec un sel aléatoire
+    (scrypt si OpenSSL le fournit, sinon PBKDF2-SHA256). Définie au niveau du module pour le pool de processus.
+    Paramètres: password, n, r, p (coût de scrypt), iterations (coût de PBKDF2)
+    Retourne: une chaîne "schéma$paramètres$sel$empreinte"
+    """
+    salt = secrets.token_bytes(16)
+    if hasattr(hashlib, "scrypt"):
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * r * (n + p + 2))
+        return f"scrypt${n}${r}${p}${salt.hex()}${digest.hex()}"
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored):
+    """
+    Fonction pour vérifier un mot de passe contre son empreinte (les paramètres de coût sont lus dans l'empreinte)
+    Les mots de passe enregistrés en clair par les anciennes versions sont encore acceptés.
+    Paramètres: password, stored
+    Retourne: un booléen
+    """
+    if stored is None:
+        return False
+    if stored.startswith("scrypt$"):
+        _, n, r, p, salt, digest = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        computed = hashlib.scrypt(password.encode("utf-8"), salt=bytes.fromhex(salt), n=n, r=r, p=p, maxmem=256 * r * (n + p + 2))
+    elif stored.startswith("pbkdf2_sha256$"):
+        _, iterations, salt, digest = stored.split("$")
+        computed = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    else:
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    return hmac.compare_digest(computed, bytes.fromhex(digest))
+
+def needs_rehash(stored):
+    """
+    Fonction pour savoir si un mot de passe enregistré doit être remplacé par une empreinte
+    (mot de passe en clair enregistré par une ancienne version ou par un import)
+    Paramètres: stored
+    Retourne: un booléen
+    """
+    return stored is not None and not stored.startswith(PASSWORD_SCHEMES)
+
+class Credentials:
+    """
+    Calcul des empreintes dans un pool de processus (le calcul est volontairement coûteux et ne doit
+    bloquer ni l'interface ni la boucle asynchrone) et cache borné de jetons de session à durée de vie courte,
+    pour que les opérations authentifiées suivantes n'aient pas à revérifier le mot de passe.
+    """
+    def __init__(self, n=2 ** 14, r=8, p=1, iterations=600000, max_workers=None, session_ttl=900, max_sessions=10000):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.iterations = iterations
+        self.max_workers = max_workers
+        self.session_ttl = session_ttl # Durée de vie d'une session en secondes
+        self._sessions = LRUCache(max_sessions, session_ttl) # Jeton -> utilisateur
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _pool(self):
+        """
+        Méthode pour créer le pool de processus à la première utilisation
+        Retourne: un ProcessPoolExecutor
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+            return self._executor
+
+    def hash(self, password):
+        """
+        Méthode pour calculer l'empreinte d'un mot de passe dans le pool de processus
+        Paramètres: password
+        Retourne: l'empreinte à enregistrer
+        """
+        return self._pool().submit(hash_password, password, self.n, self.r, self.p, self.iterations).result()
+
+    def verify(self, password, stored):
+        """
+        Méthode pour vérifier un mot de passe dans le pool de processus
+        Paramètres: password, stored
+        Retourne: un booléen
+        """
+        return self._pool().submit(verify_password, password, stored).result()
+
+    def hash_many(self, passwords):
+        """
+        Méthode pour calculer les empreintes de plusieurs mots de passe en parallèle dans le pool de processus
+        Paramètres: passwords (liste de mots de passe)
+        Retourne: la liste des empreintes, dans le même ordre
+        """
+        count = len(passwords)
+        return list(self._pool().map(
+            hash_password, passwords, [self.n] * count, [self.r] * count, [self.p] * count, [self.iterations] * count
+        ))
+
+    async def hash_async(self, password):
+        """
+        Version asynchrone de hash : la boucle d'événements reste libre pendant le calcul
+        Paramètres: password
+        Retourne: l'empreinte à enregistrer
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), hash_password, password, self.n, self.r, self.p, self.iterations)
+
+    async def verify_async(self, password, stored):
+        """
+        Version asynchrone de verify
+        Paramètres: password, stored
+        Retourne: un booléen
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), verify_password, password, stored)
+
+    def open_session(self, user):
+        """
+        Méthode pour ouvrir une session après une connexion réussie
+        Paramètres: user
+        Retourne: un jeton de session
+        """
+        token = secrets.token_urlsafe(32)
+        self._sessions.put(token, user)
+        return token
+
+    def get_session(self, token):
+        """
+        Méthode pour retrouver l'utilisateur d'une session sans revérifier son mot de passe
+        Paramètres: token
+        Retourne: un objet User ou None si la session est inconnue ou expirée
+        """
+        return self._sessions.get(token)
+
+    def close_session(self, token):
+        """
+        Méthode pour fermer une session
+        Paramètres: token
+        """
+        self._sessions.pop(token)
+
+    def close(self):
+        """
+        Méthode pour arrêter le pool de processus et oublier les sessions
+        """
+        self._sessions.clear()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+# Erreur métier levée par les versions de l'app sans terminal
+
+class AppError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status # Code HTTP correspondant, utilisé par l'API REST
+
+# Service métier de l'app (sans terminal) : chaque méthode renvoie un résultat ou lève AppError
+
+class AppService:
+    def __init__(self, database: IDatabase, credentials=None):
+        self.database = database
+        self.credentials = credentials or Credentials()
+
+    @staticmethod
+    def validate_signup(username, password):
+        """
+        Méthode pour vérifier les champs d'une inscription (partagée avec AsyncApp)
+        Paramètres: username, password
+        Lève: AppError (400) si le pseudo ou le mot de passe est vide ou n'est pas une chaîne
+        """
+        if not username or not password or not isinstance(username, str) or not isinstance(password, str):
+            raise AppError("Pseudo et mot de passe obligatoires")
+
+    @staticmethod
+    def validate_login(username, password):
+        """
+        Méthode pour vérifier les champs d'une connexion avant de lire la base (partagée avec AsyncApp)
+        Paramètres: username, password
+        Lève: AppError (401, même message qu'un mauvais mot de passe) si un champ est vide ou n'est pas une chaîne
+        """
+        if not username or not password or not isinstance(username, str) or not isinstance(password, str):
+            raise AppError("Mauvais nom d'utilisateur ou mot de passe", 401)
+
+    def signup(self, username, password):
+        """
+        Méthode pour inscrire un utilisateur (le mot de passe est haché dans le pool de processus)
+        Paramètres: username, password
+        Retourne: un objet User
+        """
+        self.validate_signup(username, password)
+        if self.database.get_user(username):
+            raise AppError("L'utilisateur existe déjà", 409)
+        try:
+            return self.database.create_user(username, self.credentials.hash(password))
+        except sqlite3.IntegrityError:
+            raise AppError("L'utilisateur existe déjà", 409)
+
+    def login(self, username, password):
+        """
+        Méthode pour connecter un utilisateur et ouvrir une session
+        Paramètres: username, password
+        Retourne: un jeton de session
+        """
+        self.validate_login(username, password)
+        user = self.database.get_user(username)
+        if not user or not self.credentials.verify(password, user.password):
+            raise AppError("Mauvais nom d'utilisateur ou mot de passe", 401)
+        if needs_rehash(user.password): # Ancien mot de passe en clair : remplacé par son empreinte
+            self.database.update_password(user, self.credentials.hash(password))
+        return self.credentials.open_session(user)
+
+    def session_user(self, token):
+        """
+        Méthode pour retrouver l'utilisateur d'une session (le mot de passe n'est pas revérifié)
+        Paramètres: token
+        Retourne: un objet User
+        """
+        user = self.credentials.get_session(token) if token else None
+        if not user:
+            raise AppError("Vous devez d'abord vous connecter", 401)
+        return user
+
+    def logout(self, token):
+        """
+        Méthode pour fermer une session
+        Paramètres: token
+        """
+        self.credentials.close_session(token)
+
+    def create_post(self, user, text):
+        """
+        Méthode pour créer un post
+        Paramètres: user (utilisateur connecté), text
+        Retourne: un objet Post
+        """
+        if not text:
+            raise AppError("Le texte du post est obligatoire")
+        return self.database.create_post(user, text)
+
+    def random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire
+        Retourne: un objet Post
+        """
+        post = self.database.get_random_post()
+        if not post:
+            raise AppError("Il y a aucun posts pour le moment", 404)
+        return post
+
+    def feed_page(self, after_id=None, limit=20):
+        """
+        Méthode pour récupérer une page du feed (pagination par curseur)
+        Paramètres: after_id (id du dernier post de la page précédente), limit
+        Retourne: une liste d'objets Post
+        """
+        return self.database.get_posts_page(after_id, limit)
+
+    def get_post(self, post_id):
+        """
+        Méthode pour récupérer un post par son id
+        Paramètres: post_id
+        Retourne: un objet Post
+        """
+        post = self.database.get_post(post_id)
+        if not post:
+            raise AppError("Post introuvable", 404)
+        return post
+
+    def add_comment(self, user, post, text):
+        """
+        Méthode pour commenter un post
+        Paramètres: user (utilisateur connecté), post, text
+        Retourne: un objet Comment
+        """
+        if not text:
+            raise AppError("Le texte du commentaire est obligatoire")
+        return self.database.add_comment(post, user, text)
+
+    def search(self, query, limit=10):
+        """
+        Méthode pour rechercher des posts par mots-clés
+        Paramètres: query, limit
+        Retourne: une liste d'objets Post
+        """
+        return self.database.search(query, limit)
+
+    def follow(self, user, username):
+        """
+        Méthode pour suivre un utilisateur
+        Paramètres: user (utilisateur connecté), username (pseudo à suivre)
+        Retourne: l'objet User suivi
+        """
+        followee = self.database.get_user(username)
+        if not followee:
+            raise AppError("Cet utilisateur n'existe pas", 404)
+        if followee.username == user.username:
+            raise AppError("Vous ne pouvez pas vous suivre vous-même")
+        self.database.follow(user, followee)
+        return followee
+
+    def unfollow(self, user, username):
+        """
+        Méthode pour ne plus suivre un utilisateur
+        Paramètres: user (utilisateur connecté), username
+        Retourne: l'objet User qui n'est plus suivi
+        """
+        followee = self.database.get_user(username)
+        if not followee:
+            raise AppError("Cet utilisateur n'existe pas", 404)
+        self.database.unfollow(user, followee)
+        return followee
+
+    def timeline(self, user, cursor=None, limit=20):
+        """
+        Méthode pour récupérer une page du fil d'actualité
+        Paramètres: user (utilisateur connecté), cursor, limit
+        Retourne: une liste d'objets Post
+        """
+        return self.database.get_timeline(user, cursor, limit)
+
+    def top_posts(self, k=10):
+        """
+        Méthode pour récupérer les posts les plus tendance
+        Paramètres: k
+        Retourne: une liste d'objets Post
+        """
+        return self.database.get_top_posts(k)
+
+    def close(self):
+        """
+        Méthode pour fermer la base de donnée et le pool de hachage
+        """
+        self.database.close()
+        self.credentials.close()
+
+# Class principal de l'app (vue terminal au-dessus d'AppService)
+
+class App:
+    PAGE_SIZE = 10 # Nombre de posts affichés par page dans le feed
+
+    def __init__(self, database: IDatabase, credentials=None):
+        self._service = AppService(database, credentials)
+        self.current_user = None
+        self.session_token = None
+        self._renderer = PostRenderer()
+
+    def authenticated_user(self):
+        """
+        Méthode pour retrouver l'utilisateur connecté à partir du jeton de session (sans revérifier le mot de passe)
+        Retourne: un objet User ou None si la session a expiré
+        """
+        if self.session_token is None:
+            return None
+        try:
+            return self._service.session_user(self.session_token)
+        except AppError:
+            self.current_user = None
+            self.session_token = None
+            return None
+
+    def close(self):
+        """
+        Méthode pour fermer l'app : base de donnée et pool de hachage des mots de passe
+        """
+        self._service.close()
+
+    def disconnect(self):
+        """
+        Méthode pour déconnecter l'utilisateur
+        """
+        if self.current_user:
+            print(f"\033[0;32mL'utilisateur \033[1;33m{self.current_user}\033[0;32m à été déconnecté\033[0m")
+            self._service.logout(self.session_token)
+            self.current_user = None
+            self.session_token = None
+            input()
+        else:
+            print("\033[0;31m⚠ Vous n'etes pas connecté\033[0m")
+            input()
+
+    def signup(self):
+        """
+        Méthode pour inscrire un utilisateur
+        """
+        username = input('Entréer un nom d\'utilisateur: ')
+        password = input('Entréer un mot de passe: ')
+        try:
+            self._service.signup(username, password)
+            print(f"\033[0;32mL'utilisateur {username} à été créer avec succès\033[0m")
+        except AppError as error:
+            print(f"\033[0;31m⚠ {error}.\033[0m")
+        input()
+
+    def login(self):
+        """
+        Méthode pour connecter un utilisateur
+        """
+        username = input("Entrer votre nom d'utilisateur: ")
+        password = input("Entrer votre mot de passe: ")
+        try:
+            self.session_token = self._service.login(username, password)
+            self.current_user = self._service.session_user(self.session_token)
+            print(f"\033[0;32mL'utilisateur {username} est connecté\033[0m")
+        except AppError as error:
+            print(f"\033[0;31m⚠ {error}.\033[0m")
+        input()
+
+    def create_post(self):
+        """
+        Méthode pour créer un post
+        """
+        if self.authenticated_user():
+            try:
+                self._service.create_post(self.current_user, input("Entrer le texte du post: "))
+                print("\033[1;32mPost créer avec succès\033[0m")
+            except AppError as error:
+                print(f"\033[0;31m⚠ {error}\033[0m")
+        else:
             print("\033[0;31m⚠ Vous devez d'abord vous connecter\033[0m")
         input()
 
@@ -354,135 +4291,340 @@ class App:
         """
         Méthode pour afficher un post aléatoire
         """
-        post = self._database.get_random_post()
-        if post:
-            print("\nVoici un post aléatoire:\n")
-            ligne_post = post.text.split('\n')
-            taille_max_boite_dialogue = max(len(line) for line in ligne_post)
-            taille_boite_dialogue = max(taille_max_boite_dialogue, len(post.user.username)) + 4
-            print("\033[1;33m█" + "▀" * (taille_boite_dialogue - 2) + 4*"▀"+ "█\033[0m")
-            print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-            print(f"\033[1;33m█   {post.user.username}" + " " * (taille_boite_dialogue - len(post.user.username) - 4) + 3*" "+ "█\033[0m")
-            print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-            for ligne in ligne_post:
-                print(f"\033[1;33m█   {ligne}" + " " * (taille_boite_dialogue - len(ligne) - 4) + 3*" "+ "█\033[0m")
-            print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-            print("\033[1;33m█" + "▄" * (taille_boite_dialogue - 2) + 4*"▄"+ "█\033[0m")
-            
-            for comment in post.comments:
-                print('\n')
-                ligne_comment = comment.text.split('\n')
-                taille_max_boite_commentaire = max(len(line) for line in ligne_comment)
-                taille_boite_commentaire = max(taille_max_boite_commentaire, len(comment.user.username)) + 4
-                print("｜   " + "█" + "▀" * (taille_boite_commentaire - 2) + 4*"▀"+ "█\033[0m")
-                print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                print(f"｜   █   {comment.user.username}" + " " * (taille_boite_commentaire - len(comment.user.username) - 4) + 3*" "+ "█\033[0m")
-                print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                for ligne in ligne_comment:
-                    print(f"｜   █   {ligne}" + " " * (taille_boite_commentaire - len(ligne) - 4) + 3*" "+ "█\033[0m")
-                print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                print("｜   " + "█" + "▄" * (taille_boite_commentaire - 2) + 4*"▄"+ "█\033[0m")
-        else:
-            print("\033[0;31m⚠ Il y a aucun posts pour le moment\033[0m")
+        try:
+            post = self._service.random_post()
+            sys.stdout.write("\nVoici un post aléatoire:\n\n" + self._renderer.render_post(post))
+            sys.stdout.flush()
+        except AppError as error:
+            print(f"\033[0;31m⚠ {error}\033[0m")
         input()
 
     def display_posts(self):
         """
-        Méthode pour afficher tous les posts
+        Méthode pour afficher tous les posts, page par page
+        """
+        posts = self._service.feed_page(None, self.PAGE_SIZE)
+
+        if len(posts) > 0:
+            print("\nVoici le feed:")
+            while posts:
+                # Une seule écriture par page
+                sys.stdout.write("".join("\n\n" + self._renderer.render_post(post) for post in posts))
+                sys.stdout.flush()
+                if len(posts) < self.PAGE_SIZE:
+                    break
+                if input("\nAppuyez sur Entrée pour la page suivante ou 'q' pour quitter: ").strip().lower() == 'q':
+                    return
+                posts = self._service.feed_page(posts[-1].id, self.PAGE_SIZE)
+        else:
+            print("\033[0;31m⚠ Il y a aucun posts pour le moment \033[0m")
+        input()
+
+    def comment_on_post(self):
+        """
+        Méthode pour commenter un post
+        """
+        if self.authenticated_user():
+            posts = self._service.feed_page(None, self.PAGE_SIZE)
+            if not posts:
+                print("\033[0;31m⚠ Aucun post disponible pour commenter.\033[0m")
+                input()
+                return
+
+            offset = 0
+            selected_post = None
+            while posts and selected_post is None:
+                sys.stdout.write("".join(
+                    f"\n\n{offset+i+1}.\n\n\n" + self._renderer.render_post(post) for i, post in enumerate(posts)
+                ))
+                sys.stdout.flush()
+
+                choice = input("Entrez le numéro du post que vous voulez commenter (Entrée pour la page suivante): ").strip()
+                if choice == '':
+                    offset += len(posts)
+                    posts = self._service.feed_page(posts[-1].id, self.PAGE_SIZE)
+                    continue
+                try:
+                    post_index = int(choice) - offset - 1
+                except ValueError:
+                    post_index = -1
+                if post_index < 0 or post_index >= len(posts):
+                    print("\033[0;31m⚠ Numéro de post invalide.\033[0m")
+                    input()
+                    return
+                selected_post = posts[post_index]
+
+            if selected_post is None:
+                print("\033[0;31m⚠ Entrée invalide.\033[0m")
+                input()
+                return
+
+            text = input("Entrez votre commentaire: ")
+            try:
+                self._service.add_comment(self.current_user, selected_post, text)
+                print("\033[1;32mCommentaire ajouté avec succès !\033[0m")
+            except AppError as error:
+                print(f"\033[0;31m⚠ {error}\033[0m")
+        else:
+            print("\033[0;31m⚠ Vous devez d'abord vous connecter.\033[0m")
+        input()
+
+    def search_posts(self):
+        """
+        Méthode pour rechercher des posts par mots-clés
+        """
+        query = input("Entrer les mots à rechercher: ")
+        posts = self._service.search(query, self.PAGE_SIZE)
+        if posts:
+            print(f"\nRésultats pour \"{query}\":")
+            sys.stdout.write("".join("\n\n" + self._renderer.render_post(post) for post in posts))
+            sys.stdout.flush()
+        else:
+            print("\033[0;31m⚠ Aucun post ne correspond à la recherche\033[0m")
+        input()
+
+    def follow_user(self):
+        """
+        Méthode pour suivre un utilisateur
+        """
+        if self.authenticated_user():
+            username = input("Entrer le nom de l'utilisateur à suivre: ")
+            try:
+                self._service.follow(self.current_user, username)
+                print(f"\033[0;32mVous suivez maintenant \033[1;33m{username}\033[0m")
+            except AppError as error:
+                print(f"\033[0;31m⚠ {error}.\033[0m")
+        else:
+            print("\033[0;31m⚠ Vous devez d'abord vous connecter\033[0m")
+        input()
+
+    def unfollow_user(self):
+        """
+        Méthode pour ne plus suivre un utilisateur
+        """
+        if self.authenticated_user():
+            username = input("Entrer le nom de l'utilisateur à ne plus suivre: ")
+            try:
+                self._service.unfollow(self.current_user, username)
+                print(f"\033[0;32mVous ne suivez plus \033[1;33m{username}\033[0m")
+            except AppError as error:
+                print(f"\033[0;31m⚠ {error}.\033[0m")
+        else:
+            print("\033[0;31m⚠ Vous devez d'abord vous connecter\033[0m")
+        input()
+
+    def display_timeline(self):
+        """
+        Méthode pour afficher le fil d'actualité de l'utilisateur connecté, page par page
+        """
+        if not self.authenticated_user():
+            print("\033[0;31m⚠ Vous devez d'abord vous connecter\033[0m")
+            input()
+            return
+        posts = self._service.timeline(self.current_user, None, self.PAGE_SIZE)
+
+        if len(posts) > 0:
+            print("\nVotre fil d'actualité:")
+            while posts:
+                sys.stdout.write("".join("\n\n" + self._renderer.render_post(post) for post in posts))
+                sys.stdout.flush()
+                if len(posts) < self.PAGE_SIZE:
+                    break
+                if input("\nAppuyez sur Entrée pour la page suivante ou 'q' pour quitter: ").strip().lower() == 'q':
+                    return
+                posts = self._service.timeline(self.current_user, posts[-1].id, self.PAGE_SIZE)
+        else:
+            print("\033[0;31m⚠ Votre fil d'actualité est vide \033[0m")
+        input()
+
+    def display_top_posts(self):
+        """
+        Méthode pour afficher les posts les plus tendance avec leur nombre de commentaires
+        """
+        posts = self._service.top_posts(self.PAGE_SIZE)
+        if posts:
+            print("\nLes posts tendance:")
+            sys.stdout.write("".join(
+                f"\n\n{rank}. ({post.comment_count} commentaires)\n\n" + self._renderer.render_post(post)
+                for rank, post in enumerate(posts, start=1)
+            ))
+            sys.stdout.flush()
+        else:
+            print("\033[0;31m⚠ Il y a aucun posts pour le moment \033[0m")
+        input()
+
+# Class des commandes de l'application
+
+class AppCmd(App):
+    profile_next = None # Capture demandée pour la prochaine action ("all" avec le menu)
+
+    def perform(self, action):
+        """
+        Méthode pour exécuter une action du menu, mesurée si l'instrumentation est active
+        Paramètres: action (méthode de l'app)
+        """
+        if not isinstance(self._service.database, InstrumentedDatabase):
+            action()
+            return
+        profile, self.profile_next = self.profile_next, None
+        with self._service.database.action(action.__name__, profile):
+            action()
+
+    def enable_instrumentation(self):
+        """
+        Méthode pour placer l'instrumentation devant la base de donnée (sans effet si elle y est déjà)
+        """
+        if not isinstance(self._service.database, InstrumentedDatabase):
+            self._service.database = InstrumentedDatabase(self._service.database)
+
+    def display_profile(self):
+        """
+        Méthode pour afficher le résumé de l'instrumentation
+        """
+        if isinstance(self._service.database, InstrumentedDatabase):
+            print(self._service.database.summary())
+        else:
+            self.enable_instrumentation()
+            print("\033[0;32mInstrumentation activée : les prochaines actions seront mesurées\033[0m")
+        input()
+
+    def profile_next_action(self):
+        """
+        Méthode pour capturer la prochaine action avec cProfile et tracemalloc
+        """
+        self.enable_instrumentation()
+        self.profile_next = "all"
+        print("\033[0;32mLa prochaine action sera profilée (résultat dans le profil des performances)\033[0m")
+        input()
+
+    # Mode script : une commande par ligne, sans invite ni pause, réponses écrites par paquets.
+    #   signup <pseudo> <mdp>    login <pseudo> <mdp>    use <pseudo>    logout
+    #   post <texte>             comment <id> <texte>    random          show <id>
+    #   feed [après] [limite]    search <mots>           follow <pseudo> unfollow <pseudo>
+    #   timeline [curseur] [limite]  top [k]
+    # Les lignes vides et celles qui commencent par # sont ignorées ; \\n dans un texte devient un saut de ligne.
+
+    def run_script(self, lines, output=None, flush_every=1000):
+        """
+        Méthode pour exécuter des commandes sans interaction (fichier ou entrée standard redirigée)
+        Paramètres: lines (itérable de lignes), output (flux de sortie, sys.stdout par défaut),
+                    flush_every (nombre de réponses gardées en mémoire avant chaque écriture)
+        Retourne: un tuple (nombre de commandes, nombre d'erreurs)
+        """
+        output = output or sys.stdout
+        sessions = {} # Pseudo -> jeton, pour rejouer le trafic de plusieurs utilisateurs
+        buffer = []
+        count = errors = 0
+        start = time.perf_counter()
+        try:
+            for number, line in enumerate(lines, start=1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                command, _, argument = line.partition(" ")
+                count += 1
+                try:
+                    handler = getattr(self, "_script_" + command, None)
+                    if handler is None:
+                        raise AppError(f"Commande inconnue: {command}")
+                    buffer.append(f"{number}: {handler(argument.strip(), sessions)}")
+                except AppError as error:
+                    errors += 1
+                    buffer.append(f"{number}: erreur: {error}")
+                except ValueError:
+                    errors += 1
+                    buffer.append(f"{number}: erreur: arguments invalides")
+                except Exception as error: # Erreur de la base (sqlite3.Error...) : la ligne échoue, pas le lot
+                    errors += 1
+                    buffer.append(f"{number}: erreur: {type(error).__name__}: {error}")
+                if len(buffer) >= flush_every:
+                    output.write("\n".join(buffer) + "\n")
+                    buffer.clear()
+        finally:
+            # Même si le lot est interrompu (Ctrl+C...), les réponses déjà calculées sont écrites
+            if buffer:
+                output.write("\n".join(buffer) + "\n")
+            output.flush()
+        seconds = time.perf_counter() - start
+        sys.stderr.write(f"{count} commandes, {errors} erreurs en {seconds:.2f} s ({count / seconds if seconds else 0:.0f} commandes/s)\n")
+        return count, errors
+
+    def _require_user(self):
+        """
+        Méthode pour récupérer l'utilisateur de la session courante du script
+        Retourne: un objet User
         """
-        posts = self._database.get_posts()
+        self.current_user = self._service.session_user(self.session_token)
+        return self.current_user
+
+    @staticmethod
+    def _unescape(argument):
+        return argument.replace("\\n", "\n")
+
+    @staticmethod
+    def _format_post_ids(posts):
+        return "posts " + ",".join(str(post.id) for post in posts) if posts else "aucun post"
+
+    def _script_signup(self, argument, sessions):
+        username, password = argument.split()
+        return f"utilisateur {self._service.signup(username, password).username} créé"
+
+    def _script_login(self, argument, sessions):
+        username, password = argument.split()
+        self.session_token = sessions[username] = self._service.login(username, password)
+        return f"{self._require_user().username} connecté"
+
+    def _script_use(self, argument, sessions):
+        if argument not in sessions:
+            raise AppError(f"Aucune session pour {argument}", 401)
+        self.session_token = sessions[argument]
+        return f"session de {self._require_user().username}"
+
+    def _script_logout(self, argument, sessions):
+        user = self._require_user()
+        self._service.logout(self.session_token)
+        sessions.pop(user.username, None)
+        self.current_user = self.session_token = None
+        return f"{user.username} déconnecté"
+
+    def _script_post(self, argument, sessions):
+        return f"post {self._service.create_post(self._require_user(), self._unescape(argument)).id}"
+
+    def _script_comment(self, argument, sessions):
+        post_id, _, text = argument.partition(" ")
+        post = self._service.get_post(int(post_id))
+        return f"commentaire {self._service.add_comment(self._require_user(), post, self._unescape(text)).id}"
+
+    def _script_random(self, argument, sessions):
+        post = self._service.random_post()
+        return f"post {post.id} de {post.user}: {post.text!r}"
+
+    def _script_show(self, argument, sessions):
+        post = self._service.get_post(int(argument))
+        return f"post {post.id} de {post.user}: {post.text!r} ({len(post.comments)} commentaires)"
 
-        if len(posts) > 0:
-            print("\nVoici le feed:")
-            for post in posts:
-                print('\n')
-                ligne_post = post.text.split('\n')
-                taille_max_boite_dialogue = max(len(line) for line in ligne_post)
-                taille_boite_dialogue = max(taille_max_boite_dialogue, len(post.user.username)) + 4
-                print("\033[1;33m█" + "▀" * (taille_boite_dialogue - 2) + 4*"▀"+ "█\033[0m")
-                print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-                print(f"\033[1;33m█   {post.user.username}" + " " * (taille_boite_dialogue - len(post.user.username) - 4) + 3*" "+ "█\033[0m")
-                print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-                for ligne in ligne_post:
-                    print(f"\033[1;33m█   {ligne}" + " " * (taille_boite_dialogue - len(ligne) - 4) + 3*" "+ "█\033[0m")
-                print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-                print("\033[1;33m█" + "▄" * (taille_boite_dialogue - 2) + 4*"▄"+ "█\033[0m")
-                
-                for comment in post.comments:
-                    print('\n')
-                    ligne_comment = comment.text.split('\n')
-                    taille_max_boite_commentaire = max(len(line) for line in ligne_comment)
-                    taille_boite_commentaire = max(taille_max_boite_commentaire, len(comment.user.username)) + 4
-                    print("｜   " + "█" + "▀" * (taille_boite_commentaire - 2) + 4*"▀"+ "█\033[0m")
-                    print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                    print(f"｜   █   {comment.user.username}" + " " * (taille_boite_commentaire - len(comment.user.username) - 4) + 3*" "+ "█\033[0m")
-                    print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                    for ligne in ligne_comment:
-                        print(f"｜   █   {ligne}" + " " * (taille_boite_commentaire - len(ligne) - 4) + 3*" "+ "█\033[0m")
-                    print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                    print("｜   " + "█" + "▄" * (taille_boite_commentaire - 2) + 4*"▄"+ "█\033[0m")
-        else:
-            print("\033[0;31m⚠ Il y a aucun posts pour le moment \033[0m")
-        input()
+    def _script_feed(self, argument, sessions):
+        values = [int(value) for value in argument.split()]
+        after = values[0] if values else None
+        return self._format_post_ids(self._service.feed_page(after, values[1] if len(values) > 1 else self.PAGE_SIZE))
 
-    def comment_on_post(self):
-        """
-        Méthode pour commenter un post
-        """
-        if self.current_user:
-            posts = self._database.get_posts()
-            if not posts:
-                print("\033[0;31m⚠ Aucun post disponible pour commenter.\033[0m")
-                input()
-            
-            for i, post in enumerate(posts):
-                print('\n')
-                print(f"{i+1}.")
-                print('\n')
-                ligne_post = post.text.split('\n')
-                taille_max_boite_dialogue = max(len(line) for line in ligne_post)
-                taille_boite_dialogue = max(taille_max_boite_dialogue, len(post.user.username)) + 4
-                print("\033[1;33m█" + "▀" * (taille_boite_dialogue - 2) + 4*"▀"+ "█\033[0m")
-                print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-                print(f"\033[1;33m█   {post.user.username}" + " " * (taille_boite_dialogue - len(post.user.username) - 4) + 3*" "+ "█\033[0m")
-                print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-                for ligne in ligne_post:
-                    print(f"\033[1;33m█   {ligne}" + " " * (taille_boite_dialogue - len(ligne) - 4) + 3*" "+ "█\033[0m")
-                print("\033[1;33m█" + " " * (taille_boite_dialogue - 2) + 3*" "+ " █\033[0m")
-                print("\033[1;33m█" + "▄" * (taille_boite_dialogue - 2) + 4*"▄"+ "█\033[0m")
-                
-                for comment in post.comments:
-                    print('\n')
-                    ligne_comment = comment.text.split('\n')
-                    taille_max_boite_commentaire = max(len(line) for line in ligne_comment)
-                    taille_boite_commentaire = max(taille_max_boite_commentaire, len(comment.user.username)) + 4
-                    print("｜   " + "█" + "▀" * (taille_boite_commentaire - 2) + 4*"▀"+ "█\033[0m")
-                    print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                    print(f"｜   █   {comment.user.username}" + " " * (taille_boite_commentaire - len(comment.user.username) - 4) + 3*" "+ "█\033[0m")
-                    print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                    for ligne in ligne_comment:
-                        print(f"｜   █   {ligne}" + " " * (taille_boite_commentaire - len(ligne) - 4) + 3*" "+ "█\033[0m")
-                    print("｜   " + "█" + " " * (taille_boite_commentaire - 2) + 3*" "+ " █\033[0m")
-                    print("｜   " + "█" + "▄" * (taille_boite_commentaire - 2) + 4*"▄"+ "█\033[0m")
-
-
-            post_index = int(input("Entrez le numéro du post que vous voulez commenter: ")) - 1
-            if post_index < 0 or post_index >= len(posts):
-                print("\033[0;31m⚠ Numéro de post invalide.\033[0m")
-            print("\033[0;31m⚠ Entrée invalide.\033[0m")
-            input()
+    def _script_search(self, argument, sessions):
+        return self._format_post_ids(self._service.search(argument, self.PAGE_SIZE))
 
-            text = input("Entrez votre commentaire: ")
-            selected_post = posts[post_index]
-            self._database.add_comment(selected_post, self.current_user, text)
-            print("\033[1;32mCommentaire ajouté avec succès !\033[0m")
-        else:
-            print("\033[0;31m⚠ Vous devez d'abord vous connecter.\033[0m")
-        input()
+    def _script_follow(self, argument, sessions):
+        return f"suit {self._service.follow(self._require_user(), argument).username}"
 
-# Class des commandes de l'application
+    def _script_unfollow(self, argument, sessions):
+        return f"ne suit plus {self._service.unfollow(self._require_user(), argument).username}"
+
+    def _script_timeline(self, argument, sessions):
+        values = [int(value) for value in argument.split()]
+        cursor = values[0] if values else None
+        return self._format_post_ids(self._service.timeline(self._require_user(), cursor, values[1] if len(values) > 1 else self.PAGE_SIZE))
+
+    def _script_top(self, argument, sessions):
+        return self._format_post_ids(self._service.top_posts(int(argument) if argument else self.PAGE_SIZE))
 
-class AppCmd(App):
     def run(self):
         while True:
             print('''
@@ -522,41 +4664,1263 @@ class AppCmd(App):
             print('6. Commenter un post')
             print('7. Deconnexion')
             print('8. Quitter')
+            print('9. Rechercher un post')
+            print('10. Suivre un utilisateur')
+            print('11. Ne plus suivre un utilisateur')
+            print('12. Afficher mon fil d\'actualité')
+            print('13. Afficher le profil des performances')
+            print('14. Profiler la prochaine action (cProfile + tracemalloc)')
+            print('15. Afficher les posts tendance')
 
             choice = input('\nVeuillez choisir une option: ')
             if choice == '1':
-                self.signup()
+                self.perform(self.signup)
             elif choice == '2':
-                self.login()
+                self.perform(self.login)
             elif choice == '3':
-                self.create_post()
+                self.perform(self.create_post)
             elif choice == '4':
-                self.display_random_post()
+                self.perform(self.display_random_post)
             elif choice == '5':
-                self.display_posts()
+                self.perform(self.display_posts)
             elif choice == '6':
-                self.comment_on_post()
+                self.perform(self.comment_on_post)
             elif choice == '7':
-                self.disconnect()
+                self.perform(self.disconnect)
             elif choice == '8':
+                if isinstance(self._service.database, InstrumentedDatabase):
+                    print(self._service.database.summary())
+                self.close()
                 break
+            elif choice == '9':
+                self.perform(self.search_posts)
+            elif choice == '10':
+                self.perform(self.follow_user)
+            elif choice == '11':
+                self.perform(self.unfollow_user)
+            elif choice == '12':
+                self.perform(self.display_timeline)
+            elif choice == '13':
+                self.display_profile()
+            elif choice == '14':
+                self.profile_next_action()
+            elif choice == '15':
+                self.perform(self.display_top_posts)
             else:
                print(chr(27) + "[2J")
 
-# Demande du choix de base de donnée
-
-while True:
-    print('1. Utiliser une base de donnée en mémoire')
-    print('2. Utiliser une base de donnée réelle (SQLite)')
-    choice = input('Veuillez choisir une option: ')
-    if choice == '1':
-        app = AppCmd(InMemoryDatabase())
-        break
-    elif choice == '2':
-        app = AppCmd(RealDatabase())
-        break
-    else:
-        print(chr(27) + "[2J")
+# Version asynchrone de l'application
+
+# Interface AsyncIDatabase
+class AsyncIDatabase:
+    async def create_user(self, username, password):
+        pass
+
+    async def update_password(self, user, password):
+        pass
+
+    async def get_user(self, username):
+        pass
+
+    async def create_post(self, user, text):
+        pass
+
+    async def get_posts(self):
+        pass
+
+    async def get_post(self, post_id):
+        pass
+
+    async def get_posts_by_user(self, username):
+        pass
+
+    async def search(self, query, limit=10):
+        pass
+
+    async def get_posts_page(self, after_id=None, limit=20):
+        pass
+
+    async def get_random_post(self):
+        pass
+
+    async def get_random_posts(self, k):
+        pass
+
+    async def add_comment(self, post, user, text):
+        pass
+
+    async def follow(self, follower, followee):
+        pass
+
+    async def unfollow(self, follower, followee):
+        pass
+
+    async def get_timeline(self, user, cursor=None, limit=20):
+        pass
+
+    async def get_top_posts(self, k=10):
+        pass
+
+    async def close(self):
+        pass
+
+class AsyncDatabaseAdapter(AsyncIDatabase):
+    """
+    Adaptateur qui expose une IDatabase synchrone sous forme de coroutines
+    Les sous-classes choisissent comment exécuter chaque appel (_call)
+    """
+    def __init__(self, database: IDatabase):
+        self.database = database
+
+    async def _call(self, method, *args):
+        pass
+
+    async def create_user(self, username, password):
+        return await self._call(self.database.create_user, username, password)
+
+    async def update_password(self, user, password):
+        return await self._call(self.database.update_password, user, password)
+
+    async def get_user(self, username):
+        return await self._call(self.database.get_user, username)
+
+    async def create_post(self, user, text):
+        return await self._call(self.database.create_post, user, text)
+
+    async def get_posts(self):
+        return await self._call(self.database.get_posts)
+
+    async def get_post(self, post_id):
+        return await self._call(self.database.get_post, post_id)
+
+    async def get_posts_by_user(self, username):
+        return await self._call(self.database.get_posts_by_user, username)
+
+    async def search(self, query, limit=10):
+        return await self._call(self.database.search, query, limit)
+
+    async def get_posts_page(self, after_id=None, limit=20):
+        return await self._call(self.database.get_posts_page, after_id, limit)
+
+    async def get_random_post(self):
+        return await self._call(self.database.get_random_post)
+
+    async def get_random_posts(self, k):
+        return await self._call(self.database.get_random_posts, k)
+
+    async def add_comment(self, post, user, text):
+        return await self._call(self.database.add_comment, post, user, text)
+
+    async def follow(self, follower, followee):
+        return await self._call(self.database.follow, follower, followee)
+
+    async def unfollow(self, follower, followee):
+        return await self._call(self.database.unfollow, follower, followee)
+
+    async def get_timeline(self, user, cursor=None, limit=20):
+        return await self._call(self.database.get_timeline, user, cursor, limit)
+
+    async def get_top_posts(self, k=10):
+        return await self._call(self.database.get_top_posts, k)
+
+    async def close(self):
+        await self._call(self.database.close)
+
+class AsyncInMemoryDatabase(AsyncDatabaseAdapter):
+    def __init__(self, database=None):
+        super().__init__(database or InMemoryDatabase())
+
+    async def _call(self, method, *args):
+        """
+        Méthode pour exécuter un appel : les opérations en mémoire ne bloquent pas, on les exécute directement
+        Paramètres: method, args
+        Retourne: le résultat de l'appel
+        """
+        return method(*args)
+
+class AsyncRealDatabase(AsyncDatabaseAdapter):
+    def __init__(self, database=None, max_workers=4):
+        """
+        Paramètres: database (RealDatabase, une nouvelle est créée si None), max_workers (threads dédiés à SQLite)
+        """
+        super().__init__(database or RealDatabase())
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="sqlite")
+
+    async def _call(self, method, *args):
+        """
+        Méthode pour exécuter un appel SQLite dans l'executor dédié sans bloquer la boucle d'événements
+        Paramètres: method, args
+        Retourne: le résultat de l'appel
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, method, *args)
+
+    async def close(self):
+        await super().close()
+        self.executor.shutdown()
+
+# Class principal de l'app asynchrone (aucune entrée/sortie terminal, les erreurs sont levées en AppError)
+
+class AsyncApp:
+    def __init__(self, database: AsyncIDatabase, credentials=None):
+        self._database = database
+        self._credentials = credentials or Credentials()
+
+    async def signup(self, username, password):
+        """
+        Méthode pour inscrire un utilisateur (mêmes vérifications qu'AppService)
+        Paramètres: username, password
+        Retourne: un objet User
+        """
+        AppService.validate_signup(username, password)
+        if await self._database.get_user(username):
+            raise AppError("L'utilisateur existe déjà", 409)
+        try:
+            return await self._database.create_user(username, await self._credentials.hash_async(password))
+        except sqlite3.IntegrityError:
+            raise AppError("L'utilisateur existe déjà", 409)
+
+    async def login(self, username, password):
+        """
+        Méthode pour connecter un utilisateur (mêmes vérifications qu'AppService)
+        Paramètres: username, password
+        Retourne: un objet User
+        """
+        AppService.validate_login(username, password)
+        user = await self._database.get_user(username)
+        if not user or not await self._credentials.verify_async(password, user.password):
+            raise AppError("Mauvais nom d'utilisateur ou mot de passe", 401)
+        if needs_rehash(user.password): # Ancien mot de passe en clair : remplacé par son empreinte
+            await self._database.update_password(user, await self._credentials.hash_async(password))
+        return user
+
+    async def open_session(self, username, password):
+        """
+        Méthode pour connecter un utilisateur et ouvrir une session
+        Paramètres: username, password
+        Retourne: un jeton de session
+        """
+        return self._credentials.open_session(await self.login(username, password))
+
+    def session_user(self, token):
+        """
+        Méthode pour retrouver l'utilisateur d'une session (le mot de passe n'est pas revérifié)
+        Paramètres: token
+        Retourne: un objet User
+        """
+        user = self._credentials.get_session(token)
+        if not user:
+            raise AppError("Session invalide ou expirée", 401)
+        return user
+
+    def close_session(self, token):
+        """
+        Méthode pour fermer une session
+        Paramètres: token
+        """
+        self._credentials.close_session(token)
+
+    async def create_post(self, user, text):
+        """
+        Méthode pour créer un post
+        Paramètres: user (utilisateur connecté), text
+        Retourne: un objet Post
+        """
+        if not user:
+            raise AppError("Vous devez d'abord vous connecter", 401)
+        return await self._database.create_post(user, text)
+
+    async def get_random_post(self):
+        """
+        Méthode pour récupérer un post aléatoire
+        Retourne: un objet Post ou None
+        """
+        return await self._database.get_random_post()
+
+    async def add_comment(self, user, post, text):
+        """
+        Méthode pour commenter un post
+        Paramètres: user (utilisateur connecté), post, text
+        Retourne: un objet Comment
+        """
+        if not user:
+            raise AppError("Vous devez d'abord vous connecter", 401)
+        if not post:
+            raise AppError("Post introuvable", 404)
+        return await self._database.add_comment(post, user, text)
+
+# API REST (JSON, bibliothèque standard uniquement)
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """
+    Serveur HTTP qui traite les connexions dans un pool de threads borné (au lieu d'un thread par connexion)
+    Une connexion persistante occupe un thread tant qu'elle reste ouverte : le délai d'inactivité du
+    handler la libère.
+    """
+    def __init__(self, address, handler, max_workers=16):
+        super().__init__(address, handler)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+class AppApiHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Connexions persistantes (keep-alive)
+    timeout = 5 # Secondes d'inactivité avant de fermer une connexion persistante
+    disable_nagle_algorithm = True # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, l'ACK retardé ajoute ~40 ms
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        """
+        Méthode pour transmettre la requête à l'AppApi du serveur et écrire la réponse JSON
+        Paramètres: method
+        """
+        url = urllib.parse.urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, payload, headers = self.server.api.handle(method, url.path, urllib.parse.parse_qs(url.query), self.headers, body)
+        data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.api.verbose:
+            super().log_message(format, *args)
+
+class AppApi:
+    """
+    API REST de l'application, au-dessus d'AppService et de n'importe quelle IDatabase :
+        POST /signup {"username", "password"}           POST /login {"username", "password"} -> {"token"}
+        GET  /posts?after=<id>&limit=<n> (ETag / 304)    GET  /posts/random       GET /posts/<id>
+        POST /posts {"text"}                             POST /posts/<id>/comments {"text"}
+    Les routes d'écriture demandent l'en-tête "Authorization: Bearer <token>".
+    """
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, database: IDatabase, credentials=None, host="127.0.0.1", port=8000, max_workers=16, verbose=False):
+        self._service = AppService(database, credentials)
+        self.verbose = verbose
+        # Les pages du feed ne changent qu'avec les écritures : l'ETag est dérivé d'un compteur de versions,
+        # ce qui permet de répondre 304 sans interroger la base. L'époque distingue deux démarrages du serveur.
+        self._epoch = secrets.token_hex(4)
+        self._version = 0
+        self._version_lock = threading.Lock()
+        self.server = PooledHTTPServer((host, port), AppApiHandler, max_workers)
+        self.server.api = self
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        """
+        Méthode pour servir les requêtes jusqu'à l'arrêt du serveur
+        """
+        self.server.serve_forever()
+
+    def start(self):
+        """
+        Méthode pour démarrer le serveur dans un thread en arrière-plan
+        Retourne: l'AppApi
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Méthode pour arrêter le serveur (la base de donnée n'est pas fermée)
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        self._service.credentials.close()
+        if self._thread:
+            self._thread.join()
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Méthode pour traiter une requête, indépendamment du transport HTTP
+        Paramètres: method, path, query (dictionnaire de listes), headers, body (octets JSON)
+        Retourne: un tuple (code HTTP, contenu JSON ou None, en-têtes supplémentaires)
+        """
+        parts = [part for part in path.split("/") if part]
+        service = self._service
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise AppError("Le corps de la requête doit être un objet JSON")
+            if method == "POST" and parts == ["signup"]:
+                return 201, {"username": service.signup(self._field(data, "username"), self._field(data, "password")).username}, {}
+            if method == "POST" and parts == ["login"]:
+                return 200, {"token": service.login(self._field(data, "username"), self._field(data, "password"))}, {}
+            if method == "GET" and parts == ["posts"]:
+                return self.feed(query, headers.get("If-None-Match"))
+            if method == "POST" and parts == ["posts"]:
+                post = service.create_post(self._authenticate(headers), self._field(data, "text"))
+                self._written()
+                return 201, self.post_to_json(post), {}
+            if method == "GET" and parts == ["posts", "random"]:
+                return 200, self.post_to_json(service.random_post()), {}
+            if method == "GET" and len(parts) == 2 and parts[0] == "posts":
+                return 200, self.post_to_json(service.get_post(int(parts[1]))), {}
+            if method == "POST" and len(parts) == 3 and parts[0] == "posts" and parts[2] == "comments":
+                user = self._authenticate(headers)
+                comment = service.add_comment(user, service.get_post(int(parts[1])), self._field(data, "text"))
+                self._written()
+                return 201, {"id": comment.id, "user": user.username, "text": comment.text}, {}
+            return 404, {"error": "Route inconnue"}, {}
+        except AppError as error:
+            return error.status, {"error": str(error)}, {}
+        except ValueError:
+            return 400, {"error": "Requête invalide"}, {}
+        except Exception:
+            # Erreur imprévue : le client reçoit quand même une réponse, la trace va sur stderr
+            traceback.print_exc()
+            return 500, {"error": "Erreur interne du serveur"}, {}
+
+    @staticmethod
+    def _field(data, name):
+        """
+        Méthode pour lire un champ texte du corps JSON
+        Paramètres: data, name
+        Retourne: la chaîne, ou None si le champ est absent
+        Lève: AppError (400) si le champ n'est pas une chaîne
+        """
+        value = data.get(name)
+        if value is not None and not isinstance(value, str):
+            raise AppError(f"Le champ {name} doit être une chaîne de caractères")
+        return value
+
+    def _authenticate(self, headers):
+        """
+        Méthode pour retrouver l'utilisateur à partir du jeton de session (sans revérifier le mot de passe)
+        Paramètres: headers
+        Retourne: un objet User
+        """
+        authorization = headers.get("Authorization") or ""
+        return self._service.session_user(authorization[7:] if authorization.startswith("Bearer ") else None)
+
+    def _written(self):
+        """
+        Méthode pour invalider les ETag du feed après une écriture
+        """
+        with self._version_lock:
+            self._version += 1
+
+    @staticmethod
+    def post_to_json(post):
+        """
+        Méthode pour convertir un post et ses commentaires en dictionnaire JSON
+        Paramètres: post
+        Retourne: un dictionnaire
+        """
+        return {
+            "id": post.id,
+            "user": post.user.username if post.user else None,
+            "text": post.text,
+            "comments": [
+                {"id": comment.id, "user": comment.user.username if comment.user else None, "text": comment.text}
+                for comment in post.comments
+            ]
+        }
+
+    def feed(self, query, if_none_match):
+        """
+        Méthode pour récupérer une page du feed (pagination par curseur), avec réponse 304 si elle n'a pas changé
+        Paramètres: query ({"after": [...], "limit": [...]}), if_none_match (ETag envoyé par le client)
+        Retourne: un tuple (code HTTP, contenu JSON ou None, en-têtes)
+        """
+        after = int(query["after"][0]) if "after" in query else None
+        limit = min(max(int(query.get("limit", ["20"])[0]), 1), self.MAX_PAGE_SIZE)
+        with self._version_lock:
+            etag = f'"{self._epoch}-{self._version}-{after}-{limit}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match == etag:
+            return 304, None, headers
+        posts = self._service.feed_page(after, limit)
+        next_cursor = posts[-1].id if len(posts) == limit else None
+        return 200, {"posts": [self.post_to_json(post) for post in posts], "next": next_cursor}, headers
+
+# Import / export en flux (JSONL ou CSV) des utilisateurs, posts et commentaires
+
+EXPORT_FIELDS = ("type", "id", "post_id", "username", "password", "text")
+
+def _export_format(path, format):
+    """
+    Fonction pour déterminer le format d'un fichier d'import/export
+    Paramètres: path, format ("jsonl", "csv" ou None pour le déduire de l'extension)
+    Retourne: "jsonl" ou "csv"
+    """
+    format = format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    if format not in ("jsonl", "csv"):
+        raise ValueError(f"format inconnu : {format}")
+    return format
+
+def iter_records(database, batch_size=1000):
+    """
+    Fonction pour parcourir toute la base sous forme d'enregistrements
+    Les utilisateurs sortent en premier, puis chaque post suivi de ses commentaires.
+    Paramètres: database, batch_size
+    Retourne: un générateur de dictionnaires {"type": "user" | "post" | "comment", ...}
+    """
+    for user in database.iter_users(batch_size):
+        yield {"type": "user", "username": user.username, "password": user.password}
+    for post in database.iter_posts(batch_size):
+        yield {"type": "post", "id": post.id, "username": post.user.username if post.user else None, "text": post.text}
+        for comment in post.comments:
+            yield {
+                "type": "comment", "id": comment.id, "post_id": post.id,
+                "username": comment.user.username if comment.user else None, "text": comment.text
+            }
+
+def export_data(database, path, format=None, batch_size=1000):
+    """
+    Fonction pour exporter la base dans un fichier, en flux (mémoire constante)
+    Paramètres: database, path, format ("jsonl", "csv" ou None), batch_size
+    Retourne: le nombre d'enregistrements écrits
+    """
+    format = _export_format(path, format)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if format == "csv":
+            writer = csv.DictWriter(file, EXPORT_FIELDS)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            write = lambda record: file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for record in iter_records(database, batch_size):
+            write(record)
+            count += 1
+    return count
+
+def read_records(path, format=None):
+    """
+    Fonction pour lire un fichier d'export, en flux
+    Paramètres: path, format ("jsonl", "csv" ou None)
+    Retourne: un générateur de dictionnaires (ids convertis en entiers)
+    """
+    format = _export_format(path, format)
+    with open(path, encoding="utf-8", newline="") as file:
+        records = csv.DictReader(file) if format == "csv" else (json.loads(line) for line in file if line.strip())
+        for record in records:
+            for field in ("id", "post_id"):
+                if record.get(field) not in (None, ""):
+                    record[field] = int(record[field])
+            yield record
+
+def _read_checkpoint(checkpoint_path, source):
+    """
+    Fonction pour lire le point de reprise d'un import
+    Paramètres: checkpoint_path, source (fichier importé)
+    Retourne: le nombre d'enregistrements déjà importés (0 si le point de reprise est absent ou ne correspond pas au fichier)
+    """
+    try:
+        with open(checkpoint_path, encoding="utf-8") as file:
+            checkpoint = json.load(file)
+    except (OSError, ValueError):
+        return 0
+    if checkpoint.get("source") != os.path.abspath(source) or checkpoint.get("size") != os.path.getsize(source):
+        return 0
+    return checkpoint.get("records", 0)
+
+def _write_checkpoint(checkpoint_path, source, records):
+    """
+    Fonction pour écrire le point de reprise d'un import (remplacement atomique)
+    Paramètres: checkpoint_path, source, records (nombre d'enregistrements importés)
+    """
+    temporary = checkpoint_path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"source": os.path.abspath(source), "size": os.path.getsize(source), "records": records}, file)
+    os.replace(temporary, checkpoint_path)
+
+def import_data(database, path, format=None, batch_size=1000, checkpoint_path=None, credentials=None):
+    """
+    Fonction pour importer un fichier d'export dans la base, par lots et en flux
+    Les ids des posts et des commentaires sont conservés. Après chaque lot, un point de reprise
+    est écrit : si l'import est interrompu, le relancer reprend après le dernier lot validé.
+    Les mots de passe en clair (export d'une ancienne version) sont enregistrés sous forme d'empreinte.
+    Paramètres: database, path, format ("jsonl", "csv" ou None), batch_size, checkpoint_path (par défaut path + ".checkpoint"),
+                credentials (Credentials utilisé pour les empreintes, créé pour l'import si None)
+    Retourne: le nombre d'enregistrements lus dans le fichier
+    """
+    checkpoint_path = checkpoint_path or path + ".checkpoint"
+    skip = _read_checkpoint(checkpoint_path, path)
+    users, posts, comments = [], [], []
+    count = skip
+    owned_credentials = credentials is None
+    credentials = credentials or Credentials()
+
+    def flush():
+        plaintext = [index for index, (username, password) in enumerate(users) if needs_rehash(password)]
+        if plaintext:
+            hashes = credentials.hash_many([users[index][1] for index in plaintext])
+            for index, stored in zip(plaintext, hashes):
+                users[index] = (users[index][0], stored)
+        database.import_users_bulk(users)
+        database.import_posts_bulk(posts)
+        database.import_comments_bulk(comments)
+        if hasattr(database, "flush"):
+            database.flush()
+        _write_checkpoint(checkpoint_path, path, count)
+        users.clear()
+        posts.clear()
+        comments.clear()
+
+    try:
+        for record in itertools.islice(read_records(path, format), skip, None):
+            if record["type"] == "user":
+                users.append((record["username"], record["password"]))
+            elif record["type"] == "post":
+                posts.append((record["id"], record["username"], record["text"]))
+            elif record["type"] == "comment":
+                comments.append((record["id"], record["post_id"], record["username"], record["text"]))
+            else:
+                raise ValueError(f"type d'enregistrement inconnu : {record['type']}")
+            count += 1
+            if len(users) + len(posts) + len(comments) >= batch_size:
+                flush()
+        flush()
+    finally:
+        if owned_credentials:
+            credentials.close()
+    os.remove(checkpoint_path)
+    return count
+
+# Benchmarks (python poo-prj-thread.kaelian.baudelet.py --bench <nom>)
+
+@functools.cache
+def benchmark_password():
+    """
+    Fonction pour obtenir l'empreinte du mot de passe des utilisateurs créés par les benchmarks
+    (calculée une seule fois : les benchmarks de la base ne mesurent pas scrypt, mais n'enregistrent pas de clair)
+    Retourne: une empreinte de "password"
+    """
+    return hash_password("password")
+
+def benchmark_concurrency(path="benchmark.db", post_count=20000, thread_counts=(1, 2, 4, 8), duration=2.0):
+    """
+    Benchmark de lecture concurrente sur un même fichier SQLite : chaque thread simule une session
+    qui lit des posts aléatoires et des pages du feed pendant qu'un écrivain crée des posts
+    Paramètres: path, post_count, thread_counts, duration (secondes par mesure)
+    Retourne: un dictionnaire {nombre de threads: lectures par seconde}
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    database = RealDatabase(path)
+    database.create_users_bulk((f"user{i}", benchmark_password()) for i in range(100))
+    users = [User(database, f"user{i}", benchmark_password()) for i in range(100)]
+    database.create_posts_bulk((users[i % 100], f"Post numéro {i}") for i in range(post_count))
+    posts = database.get_posts_page(None, 1000)
+    database.add_comments_bulk((posts[i % len(posts)], users[i % 100], f"Commentaire {i}") for i in range(post_count))
+
+    def reader(deadline):
+        operations = 0
+        while time.monotonic() < deadline:
+            database.get_random_post()
+            database.get_posts_page(random.randint(0, post_count), 10)
+            operations += 2
+        return operations
+
+    def writer(deadline):
+        while time.monotonic() < deadline:
+            database.create_post(users[0], "Post écrit pendant le benchmark")
+
+    results = {}
+    for thread_count in thread_counts:
+        deadline = time.monotonic() + duration
+        with concurrent.futures.ThreadPoolExecutor(thread_count + 1) as executor:
+            executor.submit(writer, deadline)
+            futures = [executor.submit(reader, deadline) for _ in range(thread_count)]
+            operations = sum(future.result() for future in futures)
+        results[thread_count] = operations / duration
+        print(f"{thread_count} thread(s) de lecture : {results[thread_count]:.0f} lectures/s")
+    database.close()
+    return results
+
+def benchmark_sharding(path="benchmark-shard.db", shard_counts=(1, 2, 4, 8), client_count=16, duration=3.0, post_count=100000, batch_size=1000):
+    """
+    Benchmark d'écriture de ShardedDatabase : débit de create_post avec plusieurs clients concurrents,
+    puis de create_posts_bulk par paquets, selon le nombre de shards (un processus d'écriture par shard)
+    Paramètres: path, shard_counts, client_count, duration (secondes pour create_post), post_count, batch_size
+    Retourne: un dictionnaire {nombre de shards: (posts/s avec create_post, posts/s avec create_posts_bulk)}
+    """
+    cores = os.cpu_count() or 1
+    print(f"{cores} cœur(s) disponible(s)")
+    if cores < max(shard_counts):
+        print(f"\033[0;31m⚠ Au-delà de {cores} shard(s), les processus d'écriture se partagent les cœurs : "
+              f"ces mesures ne montrent pas le gain d'une machine avec un cœur par shard\033[0m")
+    results = {}
+    for shard_count in shard_counts:
+        for shard_path in ShardedDatabase.shard_paths(path, shard_count):
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(shard_path + suffix):
+                    os.remove(shard_path + suffix)
+        database = ShardedDatabase(path, shard_count)
+        database.create_users_bulk((f"user{i}", benchmark_password()) for i in range(1000))
+        users = [User(database, f"user{i}", benchmark_password()) for i in range(1000)]
+
+        def writer(deadline):
+            operations = 0
+            while time.monotonic() < deadline:
+                database.create_post(random.choice(users), "Post écrit pendant le benchmark")
+                operations += 1
+            return operations
+
+        deadline = time.monotonic() + duration
+        with concurrent.futures.ThreadPoolExecutor(client_count) as executor:
+            futures = [executor.submit(writer, deadline) for _ in range(client_count)]
+            single = sum(future.result() for future in futures) / duration
+
+        start = time.perf_counter()
+        for offset in range(0, post_count, batch_size):
+            database.create_posts_bulk((users[i % 1000], f"Post numéro {i}") for i in range(offset, min(offset + batch_size, post_count)))
+        bulk = post_count / (time.perf_counter() - start)
+        database.close()
+        results[shard_count] = (single, bulk)
+        note = f" [{shard_count} processus sur {cores} cœur(s)]" if shard_count > cores else ""
+        print(f"{shard_count} shard(s) : {single:.0f} posts/s (create_post, {client_count} clients), {bulk:.0f} posts/s (create_posts_bulk){note}")
+    return results
+
+def percentile(values, fraction):
+    """
+    Fonction pour calculer un percentile (méthode du rang le plus proche)
+    Paramètres: values, fraction (0.5 pour p50, 0.99 pour p99)
+    Retourne: la valeur du percentile ou None si la liste est vide
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+def benchmark_async(path="benchmark.db", client_count=1000):
+    """
+    Benchmark de l'app asynchrone : client_count clients simulés s'inscrivent, se connectent, publient,
+    lisent un post aléatoire et commentent, tous depuis une seule boucle d'événements
+    Paramètres: path, client_count
+    Retourne: un dictionnaire {backend: {opération: {"p50": ms, "p99": ms}}}
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    async def client(app, number, latencies):
+        async def timed(name, coroutine):
+            start = time.perf_counter()
+            result = await coroutine
+            latencies.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+            return result
+        await timed("signup", app.signup(f"client{number}", "password"))
+        user = await timed("login", app.login(f"client{number}", "password"))
+        await timed("create_post", app.create_post(user, f"Post du client {number}"))
+        post = await timed("get_random_post", app.get_random_post())
+        await timed("add_comment", app.add_comment(user, post, "Commentaire"))
+
+    async def run(database):
+        credentials = Credentials(n=2 ** 10) # Coût réduit : le benchmark mesure l'app, pas la dérivation des mots de passe
+        app = AsyncApp(database, credentials)
+        latencies = {}
+        await asyncio.gather(*(client(app, number, latencies) for number in range(client_count)))
+        await database.close()
+        credentials.close()
+        return latencies
+
+    results = {}
+    for name, factory in (("InMemoryDatabase", AsyncInMemoryDatabase), ("RealDatabase", lambda: AsyncRealDatabase(RealDatabase(path)))):
+        latencies = asyncio.run(run(factory()))
+        results[name] = {}
+        for operation, values in latencies.items():
+            results[name][operation] = {"p50": percentile(values, 0.5), "p99": percentile(values, 0.99)}
+            print(f"{name:<17} {operation:<16} p50 {results[name][operation]['p50']:8.3f} ms   p99 {results[name][operation]['p99']:8.3f} ms")
+    return results
+
+def benchmark_memory(post_count=200000, comments_per_post=2):
+    """
+    Benchmark mémoire : compare InMemoryDatabase (un objet par post/commentaire) et ColumnarDatabase (colonnes)
+    Paramètres: post_count, comments_per_post
+    Retourne: un dictionnaire {backend: mémoire occupée en octets}
+    """
+    results = {}
+    for database_class in (InMemoryDatabase, ColumnarDatabase):
+        gc.collect()
+        tracemalloc.start()
+        database = database_class()
+        users = [database.create_user(f"user{i}", benchmark_password()) for i in range(1000)]
+        for i in range(post_count):
+            post = database.create_post(users[i % 1000], f"Post numéro {i}")
+            for j in range(comments_per_post):
+                database.add_comment(post, users[(i + j) % 1000], f"Commentaire {j}")
+            post = None # Le post construit n'est pas gardé (seule la base compte)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[database_class.__name__] = current
+        print(f"{database_class.__name__:<17} {current / 1024 / 1024:8.1f} Mio (pic {peak / 1024 / 1024:.1f} Mio)")
+        del database, users
+    return results
+
+def benchmark_snapshot(path="benchmark.snapshot", post_count=1000000):
+    """
+    Benchmark de persistance d'InMemoryDatabase : écriture d'une sauvegarde puis redémarrage depuis le disque
+    Paramètres: path, post_count
+    Retourne: un dictionnaire {"save": secondes, "load": secondes, "size": octets}
+    """
+    for suffix in ("", ".wal", ".tmp"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    database = InMemoryDatabase()
+    users = [database.create_user(f"user{i}", benchmark_password()) for i in range(1000)]
+    for i in range(post_count):
+        post = database.create_post(users[i % 1000], f"Post numéro {i}")
+        if i % 2 == 0:
+            database.add_comment(post, users[(i + 1) % 1000], "Commentaire")
+    start = time.perf_counter()
+    database.save_snapshot(path)
+    save_time = time.perf_counter() - start
+    del database, users, post
+    start = time.perf_counter()
+    database = InMemoryDatabase(path)
+    load_time = time.perf_counter() - start
+    database.close()
+    results = {"save": save_time, "load": load_time, "size": os.path.getsize(path)}
+    print(f"{post_count} posts : sauvegarde {save_time:.2f} s, chargement {load_time:.2f} s, {results['size'] / 1024 / 1024:.1f} Mio")
+    for suffix in ("", ".wal"):
+        os.remove(path + suffix)
+    return results
+
+def benchmark_search(path="benchmark.db", post_count=1000000, query_count=200):
+    """
+    Benchmark de la recherche plein texte sur un corpus généré (vocabulaire à distribution de Zipf)
+    Paramètres: path, post_count, query_count
+    Retourne: un dictionnaire {backend: {"build": secondes, "p50": ms, "p99": ms}}
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    generator = random.Random(42)
+    vocabulary = [f"mot{i}" for i in range(5000)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    texts = [" ".join(generator.choices(vocabulary, weights, k=8)) for _ in range(post_count)]
+    queries = [" ".join(generator.choices(vocabulary, weights, k=generator.randint(1, 2))) for _ in range(query_count)]
+    results = {}
+    for name, database in (("InMemoryDatabase", InMemoryDatabase()), ("RealDatabase", RealDatabase(path))):
+        start = time.perf_counter()
+        user = database.create_user("auteur", benchmark_password())
+        database.create_posts_bulk((user, text) for text in texts)
+        build_time = time.perf_counter() - start
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            database.search(query, 10)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[name] = {"build": build_time, "p50": percentile(latencies, 0.5), "p99": percentile(latencies, 0.99)}
+        print(f"{name:<17} indexation {build_time:6.1f} s   recherche p50 {results[name]['p50']:8.2f} ms   p99 {results[name]['p99']:8.2f} ms")
+        database.close()
+        del database
+    return results
+
+def benchmark_api(path="benchmark.db", client_count=8, duration=5.0, post_count=10000, max_workers=16):
+    """
+    Générateur de charge local pour l'API REST : client_count clients gardent chacun une connexion persistante
+    et enchaînent lectures du feed (avec If-None-Match), posts aléatoires et quelques créations de posts
+    Paramètres: path, client_count, duration (secondes par backend), post_count (posts créés avant la mesure), max_workers
+    Retourne: un dictionnaire {backend: {"requests_per_second", "p50", "p99", "not_modified"}}
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    def client(api, number, deadline):
+        host, port = api.server.server_address[:2]
+        connection = http.client.HTTPConnection(host, port)
+        generator = random.Random(number)
+
+        def request(method, url, payload=None, headers=None):
+            body = json.dumps(payload) if payload is not None else None
+            connection.request(method, url, body, headers or {})
+            response = connection.getresponse()
+            data = response.read()
+            return response.status, response.getheader("ETag"), json.loads(data) if data else None
+
+        request("POST", "/signup", {"username": f"client{number}", "password": "password"})
+        token = request("POST", "/login", {"username": f"client{number}", "password": "password"})[2]["token"]
+        authorization = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        latencies, not_modified, etag = [], 0, None
+        while time.monotonic() < deadline:
+            draw = generator.random()
+            start = time.perf_counter()
+            if draw < 0.6:
+                status, etag, _ = request("GET", "/posts?limit=20", headers={"If-None-Match": etag} if etag else {})
+                not_modified += status == 304
+            elif draw < 0.75:
+                request("GET", f"/posts?after={generator.randint(0, post_count)}&limit=20")
+            elif draw < 0.95:
+                request("GET", "/posts/random")
+            else:
+                request("POST", "/posts", {"text": f"Post du client {number}"}, authorization)
+            latencies.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        return latencies, not_modified
+
+    results = {}
+    for name, database in (("InMemoryDatabase", InMemoryDatabase()), ("RealDatabase", RealDatabase(path))):
+        user = database.create_user("auteur", benchmark_password())
+        database.create_posts_bulk((user, f"Post numéro {i}") for i in range(post_count))
+        api = AppApi(database, Credentials(n=2 ** 10), port=0, max_workers=max_workers).start()
+        deadline = time.monotonic() + duration
+        with concurrent.futures.ThreadPoolExecutor(client_count) as executor:
+            outcomes = list(executor.map(lambda number: client(api, number, deadline), range(client_count)))
+        api.stop()
+        database.close()
+        latencies = [latency for outcome in outcomes for latency in outcome[0]]
+        requests = len(latencies)
+        results[name] = {
+            "requests_per_second": requests / duration,
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+            "not_modified": sum(outcome[1] for outcome in outcomes) / requests if requests else 0.0
+        }
+        print(
+            f"{name:<17} {results[name]['requests_per_second']:8.0f} requêtes/s   p50 {results[name]['p50']:7.2f} ms   "
+            f"p99 {results[name]['p99']:7.2f} ms   304: {results[name]['not_modified'] * 100:.0f} %"
+        )
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return results
+
+class ZipfGenerator:
+    """
+    Tirage d'indices 0..n-1 selon une loi de Zipf : l'indice de rang r est tiré avec un poids 1 / (r + 1) ** exponent
+    """
+    def __init__(self, n, exponent=1.1, generator=None):
+        self._generator = generator or random.Random()
+        self._population = range(n)
+        self._cum_weights = []
+        total = 0.0
+        for rank in range(1, n + 1):
+            total += 1 / rank ** exponent
+            self._cum_weights.append(total)
+
+    def sample(self, k=1):
+        """
+        Méthode pour tirer k indices
+        Paramètres: k
+        Retourne: une liste d'indices
+        """
+        return self._generator.choices(self._population, cum_weights=self._cum_weights, k=k)
+
+class SyntheticDataset:
+    """
+    Jeu de données généré : quelques utilisateurs publient beaucoup, et les commentaires se concentrent
+    sur quelques posts populaires (lois de Zipf). Les lignes sont produites à la demande pour ne pas
+    occuper la mémoire mesurée, et sont les mêmes d'un appel à l'autre pour une même graine.
+    """
+    PERMUTATION = 2654435761 # Nombre premier : répartit les posts populaires dans toute la table
+
+    def __init__(self, post_count, user_count=None, comments_per_post=2, exponent=1.1, seed=42):
+        self.post_count = post_count
+        self.user_count = user_count or max(10, post_count // 10)
+        self.comment_count = post_count * comments_per_post
+        self.exponent = exponent
+        self.seed = seed
+        self.vocabulary = [f"mot{i}" for i in range(5000)]
+
+    def _zipf(self, n, offset):
+        """
+        Méthode pour créer un tirage de Zipf reproductible (une graine par usage)
+        Paramètres: n, offset (décalage de la graine)
+        Retourne: un ZipfGenerator
+        """
+        return ZipfGenerator(n, self.exponent, random.Random(self.seed + offset))
+
+    def users(self):
+        """
+        Méthode pour générer les utilisateurs
+        Retourne: un générateur de tuples (username, password)
+        """
+        return ((f"user{i}", benchmark_password()) for i in range(self.user_count))
+
+    def posts(self, chunk_size=10000):
+        """
+        Méthode pour générer les posts (auteurs tirés selon une loi de Zipf)
+        Paramètres: chunk_size (nombre de tirages par appel au générateur)
+        Retourne: un générateur de tuples (indice de l'auteur, texte)
+        """
+        authors = self._zipf(self.user_count, 1)
+        words = self._zipf(len(self.vocabulary), 2)
+        for start in range(0, self.post_count, chunk_size):
+            count = min(chunk_size, self.post_count - start)
+            texts = words.sample(count * 8)
+            for i, author in enumerate(authors.sample(count)):
+                yield author, " ".join(self.vocabulary[word] for word in texts[i * 8:i * 8 + 8])
+
+    def comments(self, chunk_size=10000):
+        """
+        Méthode pour générer les commentaires (posts commentés tirés selon une loi de Zipf)
+        Paramètres: chunk_size
+        Retourne: un générateur de tuples (id du post, indice de l'auteur, texte)
+        """
+        targets = self._zipf(self.post_count, 3)
+        authors = self._zipf(self.user_count, 4)
+        for start in range(0, self.comment_count, chunk_size):
+            count = min(chunk_size, self.comment_count - start)
+            for rank, author in zip(targets.sample(count), authors.sample(count)):
+                yield rank * self.PERMUTATION % self.post_count + 1, author, f"Commentaire {start}"
+
+    def queries(self, count):
+        """
+        Méthode pour générer des requêtes de recherche d'un ou deux mots
+        Paramètres: count
+        Retourne: une liste de chaînes
+        """
+        words = self._zipf(len(self.vocabulary), 5)
+        generator = random.Random(self.seed + 6)
+        return [" ".join(self.vocabulary[word] for word in words.sample(generator.randint(1, 2))) for _ in range(count)]
+
+BENCHMARK_BACKENDS = {
+    "InMemoryDatabase": lambda path: InMemoryDatabase(),
+    "RealDatabase": lambda path: RealDatabase(path),
+    "ColumnarDatabase": lambda path: ColumnarDatabase(),
+}
+
+def _benchmark_case(backend, post_count, operation_count, seed, path):
+    """
+    Fonction exécutée dans un processus dédié : charge un jeu de données dans une base puis mesure chaque méthode d'IDatabase
+    Paramètres: backend (nom dans BENCHMARK_BACKENDS), post_count, operation_count, seed, path (fichier SQLite)
+    Retourne: un dictionnaire {"backend", "posts", "load", "operations", "peak_memory"}
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    dataset = SyntheticDataset(post_count, seed=seed)
+    database = BENCHMARK_BACKENDS[backend](path)
+    generator = random.Random(seed)
+    users = [User(database, username, password) for username, password in dataset.users()]
+
+    load = {}
+    def timed_load(name, call, rows):
+        start = time.perf_counter()
+        call()
+        seconds = time.perf_counter() - start
+        load[name] = {"rows": rows, "seconds": seconds, "throughput": rows / seconds if seconds else None}
+    timed_load("create_users_bulk", lambda: database.create_users_bulk(dataset.users()), dataset.user_count)
+    timed_load("create_posts_bulk", lambda: database.create_posts_bulk((users[author], text) for author, text in dataset.posts()), post_count)
+    timed_load("add_comments_bulk", lambda: database.add_comments_bulk(
+        (Post(database, post_id, None, ""), users[author], text) for post_id, author, text in dataset.comments()
+    ), dataset.comment_count)
+    if hasattr(database, "flush"):
+        database.flush()
+
+    hot_users = [users[i] for i in dataset._zipf(dataset.user_count, 7).sample(operation_count)]
+    hot_posts = [rank * dataset.PERMUTATION % post_count + 1 for rank in dataset._zipf(post_count, 8).sample(operation_count)]
+    posts = [database.get_post(post_id) for post_id in hot_posts]
+    queries = dataset.queries(operation_count)
+    pairs = [(users[generator.randrange(dataset.user_count)], users[generator.randrange(dataset.user_count)]) for _ in range(operation_count)]
+    pairs = [(follower, followee) for follower, followee in pairs if follower.username != followee.username]
+
+    # Opérations mesurées : (nom, fonction appelée avec l'indice de l'appel, nombre d'appels)
+    heavy = max(1, min(3, operation_count))
+    operations = [
+        ("create_user", lambda i: database.create_user(f"bench{i}", benchmark_password()), operation_count),
+        ("get_user", lambda i: database.get_user(hot_users[i].username), operation_count),
+        ("create_post", lambda i: database.create_post(hot_users[i], f"Post du benchmark {i}"), operation_count),
+        ("get_post", lambda i: database.get_post(generator.randint(1, post_count)), operation_count),
+        ("get_posts_by_user", lambda i: database.get_posts_by_user(hot_users[i].username), max(1, operation_count // 10)),
+        ("get_comments_for_post", lambda i: database.get_comments_for_post(posts[i]), operation_count),
+        ("search", lambda i: database.search(queries[i], 10), operation_count),
+        ("get_posts_page", lambda i: database.get_posts_page(generator.randint(0, post_count), 20), operation_count),
+        ("get_random_post", lambda i: database.get_random_post(), operation_count),
+        ("get_random_posts", lambda i: database.get_random_posts(10), operation_count),
+        ("add_comment", lambda i: database.add_comment(posts[i], hot_users[i], "Commentaire du benchmark"), operation_count),
+        ("follow", lambda i: database.follow(*pairs[i]), len(pairs)),
+        ("get_timeline", lambda i: database.get_timeline(pairs[i][0], None, 20), len(pairs)),
+        ("unfollow", lambda i: database.unfollow(*pairs[i]), len(pairs)),
+        ("iter_posts", lambda i: collections.deque(database.iter_posts(1000), maxlen=0), heavy),
+        ("get_posts", lambda i: database.get_posts(), heavy),
+    ]
+    results = {}
+    for name, call, count in operations:
+        latencies = []
+        start = time.perf_counter()
+        for i in range(count):
+            call_start = time.perf_counter()
+            call(i)
+            latencies.append((time.perf_counter() - call_start) * 1000)
+        seconds = time.perf_counter() - start
+        results[name] = {
+            "calls": count,
+            "throughput": count / seconds if seconds else None,
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99)
+        }
+    start = time.perf_counter()
+    database.close()
+    results["close"] = {"calls": 1, "throughput": None, "p50": (time.perf_counter() - start) * 1000, "p95": None, "p99": None}
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else None # ru_maxrss est en Kio sous Linux
+    return {"backend": backend, "posts": post_count, "load": load, "operations": results, "peak_memory": peak_memory}
+
+def benchmark_suite(scales=(1000, 100000, 1000000), backends=("InMemoryDatabase", "RealDatabase"), operation_count=1000, output="benchmark.json", seed=42):
+    """
+    Suite de benchmarks : chaque méthode d'IDatabase est mesurée sur chaque backend et à chaque échelle,
+    à partir d'un jeu de données synthétique. Chaque cas tourne dans un processus neuf pour que le pic
+    de mémoire mesuré ne dépende que de lui. Les résultats sont écrits en JSON pour comparer les exécutions.
+    Paramètres: scales (nombres de posts), backends, operation_count (appels mesurés par opération), output, seed
+    Retourne: un dictionnaire {"python", "sqlite", "seed", "cases"}
+    """
+    results = {"python": sys.version.split()[0], "sqlite": sqlite3.sqlite_version, "seed": seed, "cases": []}
+    for post_count in scales:
+        for backend in backends:
+            with concurrent.futures.ProcessPoolExecutor(1) as executor:
+                case = executor.submit(_benchmark_case, backend, post_count, operation_count, seed, f"benchmark_{post_count}.db").result()
+            results["cases"].append(case)
+            memory = f"{case['peak_memory'] / 1024 / 1024:.0f} Mio" if case["peak_memory"] else "?"
+            print(f"\n{backend} - {post_count} posts (pic mémoire {memory})")
+            for name, load in case["load"].items():
+                print(f"  {name:<22} {load['throughput']:12.0f} lignes/s")
+            for name, operation in case["operations"].items():
+                throughput = f"{operation['throughput']:12.0f} op/s" if operation["throughput"] else " " * 17
+                print(f"  {name:<22} {throughput}   p50 {operation['p50']:9.3f} ms   p99 {operation['p99'] or 0:9.3f} ms")
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nRésultats écrits dans {output}")
+    return results
+
+def compare_benchmarks(baseline_path, current_path, tolerance=0.2):
+    """
+    Fonction pour comparer deux fichiers de résultats de benchmark_suite et signaler les régressions
+    Paramètres: baseline_path, current_path, tolerance (hausse relative de la latence p50 tolérée)
+    Retourne: une liste de tuples (backend, posts, opération, p50 de référence, p50 actuel)
+    """
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {(case["backend"], case["posts"]): case for case in json.load(file)["cases"]}
+    with open(current_path, encoding="utf-8") as file:
+        current = json.load(file)["cases"]
+    regressions = []
+    for case in current:
+        reference = baseline.get((case["backend"], case["posts"]))
+        if reference is None:
+            continue
+        for name, operation in case["operations"].items():
+            before = reference["operations"].get(name, {}).get("p50")
+            if before and operation["p50"] > before * (1 + tolerance):
+                regressions.append((case["backend"], case["posts"], name, before, operation["p50"]))
+                print(f"\033[0;31m⚠ {case['backend']} {case['posts']} posts {name}: p50 {before:.3f} ms -> {operation['p50']:.3f} ms\033[0m")
+    if not regressions:
+        print("\033[0;32mAucune régression\033[0m")
+    return regressions
+
+BENCHMARKS = {
+    "concurrency": benchmark_concurrency,
+    "async": benchmark_async,
+    "memory": benchmark_memory,
+    "snapshot": benchmark_snapshot,
+    "search": benchmark_search,
+    "suite": benchmark_suite,
+    "api": benchmark_api,
+    "sharding": benchmark_sharding,
+}
+
+# Bases de donnée proposées au démarrage (menu ou --script) : numéro -> (libellé, fonction qui ouvre la base)
+
+DATABASE_CHOICES = {
+    "1": ("Utiliser une base de donnée en mémoire", InMemoryDatabase),
+    "2": ("Utiliser une base de donnée réelle (SQLite)", RealDatabase),
+    "3": ("Utiliser une base de donnée en mémoire compacte (colonnes)", ColumnarDatabase),
+    "4": ("Utiliser une base de donnée en mémoire sauvegardée sur disque", lambda: InMemoryDatabase("database.snapshot")),
+    "5": ("Utiliser une base de donnée réelle (SQLite) avec cache", lambda: CachedDatabase(RealDatabase())),
+    "6": ("Utiliser une base de donnée réelle répartie sur plusieurs fichiers SQLite (un processus par fichier)",
+          lambda: ShardedDatabase(shard_count=os.cpu_count() or 1)),
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--bench":
+        BENCHMARKS[sys.argv[2]]()
+        sys.exit()
+    if len(sys.argv) > 3 and sys.argv[1] == "--compare":
+        sys.exit(1 if compare_benchmarks(sys.argv[2], sys.argv[3]) else 0)
+    if len(sys.argv) > 1 and sys.argv[1] == "--script":
+        # python poo-prj-thread.kaelian.baudelet.py --script [fichier|-] [base.db|1-6] : commandes sans interaction
+        # (un numéro choisit la base comme le menu de démarrage, sinon c'est le fichier SQLite à utiliser)
+        target = sys.argv[3] if len(sys.argv) > 3 else "database.db"
+        app = AppCmd(DATABASE_CHOICES[target][1]() if target in DATABASE_CHOICES else RealDatabase(target))
+        try:
+            if len(sys.argv) > 2 and sys.argv[2] != "-":
+                with open(sys.argv[2], encoding="utf-8") as file:
+                    count, errors = app.run_script(file)
+            else:
+                count, errors = app.run_script(sys.stdin)
+        finally:
+            app.close()
+        sys.exit(1 if errors else 0)
+    if len(sys.argv) > 2 and sys.argv[1] in ("--export", "--import"):
+        # python poo-prj-thread.kaelian.baudelet.py --export|--import fichier.jsonl|fichier.csv [base.db]
+        database = RealDatabase(sys.argv[3] if len(sys.argv) > 3 else "database.db")
+        if sys.argv[1] == "--export":
+            count = export_data(database, sys.argv[2])
+        else:
+            count = import_data(database, sys.argv[2])
+        database.close()
+        print(f"{count} enregistrements traités")
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "--api":
+        # python poo-prj-thread.kaelian.baudelet.py --api [port] : API REST sur la base SQLite
+        database = RealDatabase()
+        api = AppApi(database, port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000, verbose=True)
+        print(f"API disponible sur {api.address}")
+        try:
+            api.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        api.stop()
+        database.close()
+        sys.exit()
+
+    # Demande du choix de base de donnée
+
+    while True:
+        for number, (label, factory) in DATABASE_CHOICES.items():
+            print(f'{number}. {label}')
+        choice = input('Veuillez choisir une option: ')
+        if choice in DATABASE_CHOICES:
+            database = DATABASE_CHOICES[choice][1]()
+            break
+        else:
+            print(chr(27) + "[2J")
+
+    # THREAD_PROFILE=1 mesure chaque action (résumé affiché en quittant),
+    # THREAD_PROFILE=cprofile, tracemalloc ou all capture en plus chaque action
+    if os.environ.get("THREAD_PROFILE"):
+        database = InstrumentedDatabase(database, os.environ["THREAD_PROFILE"])
+    app = AppCmd(database)
 
-# Lancement de l'application
-app.run()
\ No newline at end of file
+    # Lancement de l'application
+    app.run()
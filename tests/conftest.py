@@ -0,0 +1,21 @@
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+SOURCE = pathlib.Path(__file__).resolve().parent.parent / "poo-prj-thread.kaelian.baudelet.py"
+
+
+def _load():
+    # Le nom du fichier n'est pas un nom de module valide : chargement par chemin
+    spec = importlib.util.spec_from_file_location("thread_app", SOURCE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["thread_app"] = module # Nécessaire pour les processus de ShardedDatabase
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def thread():
+    return _load()
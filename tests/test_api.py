@@ -0,0 +1,84 @@
+import json
+
+
+# user-018 : API REST sans terminal, pool de threads et connexions persistantes
+def _api(thread, database=None):
+    api = thread.AppApi(database or thread.InMemoryDatabase(), thread.Credentials(n=2 ** 10), port=0)
+    return api
+
+
+def _call(api, method, path, body=None, headers=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    return api.handle(method, path, {}, headers or {}, data)
+
+
+def test_signup_login_and_post(thread):
+    api = _api(thread)
+    try:
+        assert _call(api, "POST", "/signup", {"username": "alice", "password": "secret"})[0] == 201
+        status, payload, _ = _call(api, "POST", "/login", {"username": "alice", "password": "secret"})
+        assert status == 200
+        headers = {"Authorization": f"Bearer {payload['token']}"}
+        status, post, _ = _call(api, "POST", "/posts", {"text": "bonjour"}, headers)
+        assert status == 201 and post["text"] == "bonjour"
+    finally:
+        api.server.server_close()
+
+
+def test_non_string_fields_are_rejected(thread):
+    api = _api(thread)
+    try:
+        status, payload, _ = _call(api, "POST", "/signup", {"username": 123, "password": "secret"})
+        assert status == 400 and "username" in payload["error"]
+        assert _call(api, "POST", "/login", {"username": "alice", "password": ["x"]})[0] == 400
+        assert _call(api, "POST", "/signup", {"username": "alice", "password": "secret"})[0] == 201
+        token = _call(api, "POST", "/login", {"username": "alice", "password": "secret"})[1]["token"]
+        assert _call(api, "POST", "/posts", {"text": {"a": 1}}, {"Authorization": f"Bearer {token}"})[0] == 400
+    finally:
+        api.server.server_close()
+
+
+def test_unexpected_error_returns_500(thread, capsys):
+    database = thread.InMemoryDatabase()
+
+    def broken():
+        raise RuntimeError("panne")
+
+    database.get_random_post = broken
+    api = _api(thread, database)
+    try:
+        status, payload, _ = _call(api, "GET", "/posts/random")
+        assert status == 500 and "error" in payload
+        assert "RuntimeError" in capsys.readouterr().err
+    finally:
+        api.server.server_close()
+
+
+def test_http_keep_alive_etag_and_unknown_routes(thread):
+    import http.client
+    api = _api(thread).start()
+    try:
+        host, port = api.server.server_address[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+
+        def request(method, path, body=None, headers=None):
+            connection.request(method, path, json.dumps(body) if body is not None else None, headers or {})
+            response = connection.getresponse()
+            data = response.read()
+            return response.status, json.loads(data) if data else None, response
+
+        assert request("POST", "/signup", {"username": "alice", "password": "secret"})[0] == 201
+        token = request("POST", "/login", {"username": "alice", "password": "secret"})[1]["token"]
+        socket = connection.sock
+        status, page, response = request("GET", "/posts?limit=5")
+        etag = response.getheader("ETag")
+        assert status == 200 and page is not None and etag
+        assert request("GET", "/posts?limit=5", headers={"If-None-Match": etag})[0] == 304
+        request("POST", "/posts", {"text": "nouveau"}, {"Authorization": f"Bearer {token}"})
+        assert request("GET", "/posts?limit=5", headers={"If-None-Match": etag})[0] == 200 # Écriture : nouvel ETag
+        assert request("POST", "/posts", {"text": "anonyme"})[0] == 401
+        assert request("GET", "/inconnue")[0] == 404
+        assert connection.sock is socket # Toutes les requêtes sur la même connexion
+        connection.close()
+    finally:
+        api.stop()
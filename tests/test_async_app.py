@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+
+def _run(thread, scenario):
+    async def main():
+        database = thread.AsyncInMemoryDatabase()
+        app = thread.AsyncApp(database, thread.Credentials(n=2 ** 10))
+        try:
+            return await scenario(app)
+        finally:
+            await database.close()
+            app._credentials.close()
+    return asyncio.run(main())
+
+
+# user-007 : AsyncApp et bases asynchrones (mêmes règles que la version synchrone)
+def test_signup_and_login(thread):
+    async def scenario(app):
+        await app.signup("alice", "secret")
+        return await app.login("alice", "secret")
+    assert _run(thread, scenario).username == "alice"
+
+
+@pytest.mark.parametrize("username, password", [("", "secret"), (None, "secret"), ("alice", None), ("alice", ""), (123, "secret")])
+def test_signup_validates_like_the_service(thread, username, password):
+    async def scenario(app):
+        with pytest.raises(thread.AppError) as error:
+            await app.signup(username, password)
+        return error.value.status
+    assert _run(thread, scenario) == 400
+
+
+@pytest.mark.parametrize("password", [None, "", "mauvais"])
+def test_login_rejects_missing_or_wrong_password(thread, password):
+    async def scenario(app):
+        await app.signup("alice", "secret")
+        with pytest.raises(thread.AppError) as error:
+            await app.login("alice", password)
+        return error.value.status
+    assert _run(thread, scenario) == 401
+
+
+def test_concurrent_sessions_on_sqlite(thread, tmp_path):
+    async def main():
+        database = thread.AsyncRealDatabase(thread.RealDatabase(str(tmp_path / "a.db")), max_workers=4)
+        app = thread.AsyncApp(database, thread.Credentials(n=2 ** 10))
+
+        async def client(number):
+            await app.signup(f"client{number}", "secret")
+            token = await app.open_session(f"client{number}", "secret")
+            user = app.session_user(token)
+            post = await app.create_post(user, f"post {number}")
+            await app.add_comment(user, post, f"commentaire {number}")
+            app.close_session(token)
+            return post.id
+
+        try:
+            ids = await asyncio.gather(*(client(number) for number in range(20)))
+            assert len(set(ids)) == 20
+            assert (await app.get_random_post()).id in ids
+            with pytest.raises(thread.AppError) as error:
+                app.session_user("jeton inconnu")
+            assert error.value.status == 401
+            with pytest.raises(thread.AppError) as error:
+                await app.add_comment(await database.get_user("client0"), None, "sans post")
+            assert error.value.status == 404
+        finally:
+            await database.close()
+            app._credentials.close()
+    asyncio.run(main())
+
+
+# user-014 : un ancien mot de passe en clair est remplacé par son empreinte après une connexion réussie
+def test_login_rehashes_legacy_plaintext_password(thread):
+    async def scenario(app):
+        await app._database.create_user("alice", "secret")
+        await app.login("alice", "secret")
+        return (await app._database.get_user("alice")).password
+    stored = _run(thread, scenario)
+    assert stored.startswith(thread.PASSWORD_SCHEMES)
+    assert thread.verify_password("secret", stored)
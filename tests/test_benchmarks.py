@@ -0,0 +1,45 @@
+import collections
+import json
+
+import pytest
+
+
+# user-016 : jeu de données synthétique et suite de benchmarks
+def test_dataset_is_reproducible_and_skewed(thread):
+    dataset = thread.SyntheticDataset(2000, seed=7)
+    posts = list(dataset.posts())
+    assert posts == list(thread.SyntheticDataset(2000, seed=7).posts())
+    assert posts != list(thread.SyntheticDataset(2000, seed=8).posts())
+    assert len(posts) == 2000 and len(list(dataset.users())) == dataset.user_count == 200
+    authors = collections.Counter(author for author, text in posts)
+    assert authors.most_common(1)[0][0] == 0 # Zipf : le premier rang publie le plus
+    assert authors[0] > 10 * 2000 / dataset.user_count
+    comments = list(dataset.comments())
+    assert len(comments) == dataset.comment_count
+    assert all(1 <= post_id <= 2000 for post_id, author, text in comments)
+
+
+@pytest.mark.parametrize("backend", ["InMemoryDatabase", "RealDatabase", "ColumnarDatabase"])
+def test_benchmark_case_measures_every_operation(thread, tmp_path, backend):
+    case = thread._benchmark_case(backend, 60, 4, 42, str(tmp_path / "bench.db"))
+    assert case["backend"] == backend and case["posts"] == 60
+    assert set(case["load"]) == {"create_users_bulk", "create_posts_bulk", "add_comments_bulk"}
+    expected = {
+        "create_user", "get_user", "create_post", "get_post", "get_posts_by_user", "get_comments_for_post", "search",
+        "get_posts_page", "get_random_post", "get_random_posts", "add_comment", "follow", "get_timeline", "unfollow",
+        "iter_posts", "get_posts", "close",
+    }
+    assert set(case["operations"]) == expected
+    assert all(operation["p50"] >= 0 for operation in case["operations"].values())
+    assert not (tmp_path / "bench.db").exists() # Le fichier du cas est supprimé
+
+
+def test_compare_benchmarks_reports_slower_operations(thread, tmp_path):
+    def write(name, p50):
+        case = {"backend": "RealDatabase", "posts": 10, "operations": {"get_post": {"p50": p50}, "search": {"p50": 1.0}}}
+        (tmp_path / name).write_text(json.dumps({"cases": [case]}), encoding="utf-8")
+    write("before.json", 1.0)
+    write("after.json", 1.5)
+    regressions = thread.compare_benchmarks(str(tmp_path / "before.json"), str(tmp_path / "after.json"), tolerance=0.2)
+    assert regressions == [("RealDatabase", 10, "get_post", 1.0, 1.5)]
+    assert thread.compare_benchmarks(str(tmp_path / "before.json"), str(tmp_path / "after.json"), tolerance=0.6) == []
@@ -0,0 +1,77 @@
+# user-015 : cache LRU en lecture devant n'importe quelle base
+def _cached(thread, tmp_path):
+    return thread.CachedDatabase(thread.RealDatabase(str(tmp_path / "cache.db")))
+
+
+def test_feed_pages_are_cached_and_invalidated_by_writes(thread, tmp_path):
+    cache = _cached(thread, tmp_path)
+    user = cache.create_user("alice", "secret")
+    first = cache.create_post(user, "premier")
+    assert [post.id for post in cache.get_posts_page()] == [first.id]
+    assert [post.id for post in cache.get_posts_page()] == [first.id]
+    assert cache.stats()["pages"]["hits"] == 1
+    second = cache.create_post(user, "second")
+    assert [post.id for post in cache.get_posts_page()] == [first.id, second.id]
+    cache.add_comment(second, user, "commentaire")
+    assert [comment.text for comment in cache.get_posts_page()[1].comments] == ["commentaire"]
+    cache.close()
+
+
+def test_models_write_through_the_cache(thread, tmp_path):
+    cache = _cached(thread, tmp_path)
+    cache.create_user("alice", "secret")
+    user = cache.get_user("alice")
+    assert cache.get_posts_page() == []
+    post = user.create_post("par le modèle") # User._database doit être le cache, pas la base décorée
+    assert [p.id for p in cache.get_posts_page()] == [post.id]
+    page_post = cache.get_posts_page()[0]
+    page_post.add_comment(user, "aussi par le modèle")
+    assert [comment.text for comment in cache.get_post(post.id).comments] == ["aussi par le modèle"]
+    assert [comment.text for comment in cache.get_posts_page()[0].comments] == ["aussi par le modèle"]
+    cache.close()
+
+
+def test_random_post_goes_through_the_post_cache(thread, tmp_path):
+    cache = _cached(thread, tmp_path)
+    user = cache.create_user("alice", "secret")
+    post = cache.create_post(user, "seul post")
+    assert cache.get_random_post() is cache.get_post(post.id)
+    cache.close()
+
+
+def test_sql_tracing_reaches_the_wrapped_database(thread, tmp_path):
+    instrumented = thread.InstrumentedDatabase(_cached(thread, tmp_path))
+    user = instrumented.create_user("alice", "secret")
+    instrumented.create_post(user, "bonjour")
+    assert sum(instrumented.statements.values()) > 0
+    instrumented.close()
+
+
+def test_lru_cache_evicts_least_recently_used_and_expires(thread):
+    import time
+    cache = thread.LRUCache(maxsize=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1 # "a" devient le plus récent
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1, 1)
+    time.sleep(0.1)
+    assert cache.get("a", "expiré") == "expiré"
+
+
+def test_user_and_post_reads_are_served_from_the_cache(thread, tmp_path):
+    cache = _cached(thread, tmp_path)
+    user = cache.create_user("alice", "secret")
+    post = cache.create_post(user, "post")
+    queries = []
+    cache.set_trace_callback(queries.append)
+    for _ in range(3):
+        assert cache.get_user("alice") is not None
+        assert cache.get_post(post.id).text == "post"
+    cache.set_trace_callback(None)
+    assert queries == [] # L'utilisateur et le post écrits via le cache y sont déjà
+    assert cache.stats()["users"]["hits"] >= 3
+    cache.close()
@@ -0,0 +1,69 @@
+import pytest
+
+
+# user-014 : empreintes scrypt et remplacement des anciens mots de passe en clair
+@pytest.fixture(scope="module")
+def credentials(thread):
+    credentials = thread.Credentials(n=2 ** 10)
+    yield credentials
+    credentials.close()
+
+
+def test_hash_and_verify(thread):
+    stored = thread.hash_password("secret", n=2 ** 10)
+    assert stored.startswith(thread.PASSWORD_SCHEMES)
+    assert thread.verify_password("secret", stored)
+    assert not thread.verify_password("autre", stored)
+    assert not thread.needs_rehash(stored)
+    assert thread.needs_rehash("secret")
+
+
+@pytest.mark.parametrize("factory", [
+    lambda thread, tmp_path: thread.InMemoryDatabase(),
+    lambda thread, tmp_path: thread.ColumnarDatabase(),
+    lambda thread, tmp_path: thread.RealDatabase(str(tmp_path / "a.db")),
+    lambda thread, tmp_path: thread.CachedDatabase(thread.RealDatabase(str(tmp_path / "a.db"))),
+    lambda thread, tmp_path: thread.ShardedDatabase(str(tmp_path / "a.db"), shard_count=2),
+], ids=["memory", "columnar", "sqlite", "cached", "sharded"])
+def test_login_rehashes_legacy_plaintext_password(thread, credentials, tmp_path, factory):
+    database = factory(thread, tmp_path)
+    try:
+        database.create_user("alice", "secret") # Comme une ancienne version : mot de passe en clair
+        service = thread.AppService(database, credentials)
+        assert service.login("alice", "secret")
+        stored = database.get_user("alice").password
+        assert stored.startswith(thread.PASSWORD_SCHEMES)
+        assert service.login("alice", "secret")
+        assert database.get_user("alice").password == stored # Pas de nouveau calcul
+        with pytest.raises(thread.AppError):
+            service.login("alice", "autre")
+    finally:
+        database.close()
+
+
+def test_rehashed_password_survives_reopen(thread, credentials, tmp_path):
+    path = str(tmp_path / "a.snap")
+    database = thread.InMemoryDatabase(path)
+    database.create_user("alice", "secret")
+    thread.AppService(database, credentials).login("alice", "secret")
+    stored = database.get_user("alice").password
+    database.close()
+    reopened = thread.InMemoryDatabase(path)
+    assert reopened.get_user("alice").password == stored
+    reopened.compact()
+    reopened.close()
+    assert thread.InMemoryDatabase(path).get_user("alice").password == stored
+
+
+def test_sessions_expire_and_are_bounded(thread):
+    import time
+    credentials = thread.Credentials(session_ttl=0.05, max_sessions=2)
+    users = [thread.User(None, f"user{i}", None) for i in range(3)]
+    tokens = [credentials.open_session(user) for user in users]
+    assert credentials.get_session(tokens[0]) is None # Le plus ancien est évincé
+    assert credentials.get_session(tokens[2]) is users[2]
+    credentials.close_session(tokens[2])
+    assert credentials.get_session(tokens[2]) is None
+    time.sleep(0.1)
+    assert credentials.get_session(tokens[1]) is None
+    credentials.close()
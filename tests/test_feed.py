@@ -0,0 +1,113 @@
+import pytest
+
+
+def _database(thread, tmp_path, post_count=30, **options):
+    database = thread.RealDatabase(str(tmp_path / "feed.db"), **options)
+    users = [database.create_user(f"user{i}", "secret") for i in range(3)]
+    posts = [database.create_post(users[i % 3], f"post {i}") for i in range(post_count)]
+    for i, post in enumerate(posts):
+        for j in range(i % 3):
+            database.add_comment(post, users[j], f"comment {i}.{j}")
+    database.flush()
+    return database, users, posts
+
+
+def _count_queries(database, action):
+    queries = []
+    database.set_trace_callback(queries.append)
+    try:
+        result = action()
+    finally:
+        database.set_trace_callback(None)
+    return result, [query for query in queries if query.lstrip().upper().startswith("SELECT")]
+
+
+# user-001 : le feed complet est chargé en un nombre fixe de requêtes
+@pytest.mark.parametrize("compact", [False, True])
+def test_get_posts_runs_a_fixed_number_of_queries(thread, tmp_path, compact):
+    database, users, posts = _database(thread, tmp_path, compact=compact)
+    loaded, queries = _count_queries(database, database.get_posts)
+    assert len(queries) == 2
+    assert [post.id for post in loaded] == [post.id for post in posts]
+    assert [[c.text for c in post.comments] for post in loaded] == [[f"comment {i}.{j}" for j in range(i % 3)] for i in range(30)]
+    database.close()
+
+
+def test_get_posts_shares_one_user_object_per_author(thread, tmp_path):
+    database, users, posts = _database(thread, tmp_path)
+    loaded = database.get_posts()
+    authors = {id(post.user) for post in loaded if post.user.username == "user0"}
+    commenters = {id(comment.user) for post in loaded for comment in post.comments if comment.user.username == "user0"}
+    assert len(authors | commenters) == 1
+    database.close()
+
+
+# user-002 : tirage aléatoire sans charger le feed
+def test_random_post_reads_only_the_drawn_rows(thread, tmp_path):
+    database, users, posts = _database(thread, tmp_path, post_count=200)
+    post, queries = _count_queries(database, database.get_random_post)
+    assert post.id in {p.id for p in posts}
+    assert not any("RANDOM()" in query for query in queries) # Ids denses : pas de repli linéaire
+    assert all("WHERE" in query or "MIN(id)" in query for query in queries)
+    database.close()
+
+
+@pytest.mark.parametrize("factory", [
+    lambda thread, tmp_path: thread.RealDatabase(str(tmp_path / "r.db")),
+    lambda thread, tmp_path: thread.InMemoryDatabase(),
+], ids=["sqlite", "memory"]) # ColumnarDatabase n'accepte que des ids contigus
+def test_random_posts_with_sparse_ids(thread, tmp_path, factory):
+    database = factory(thread, tmp_path)
+    assert database.get_random_post() is None
+    assert database.get_random_posts(3) == []
+    database.import_users_bulk([("alice", "secret")])
+    ids = [1, 500, 100000]
+    database.import_posts_bulk([(post_id, "alice", f"post {post_id}") for post_id in ids])
+    for _ in range(20):
+        assert database.get_random_post().id in ids
+    drawn = database.get_random_posts(10)
+    assert sorted(post.id for post in drawn) == ids
+    assert all(post.text == f"post {post.id}" for post in drawn)
+    database.close()
+
+
+# user-003 : pagination par curseur et parcours en flux, sur chaque backend
+BACKENDS = {
+    "sqlite": lambda thread, tmp_path: thread.RealDatabase(str(tmp_path / "p.db")),
+    "memory": lambda thread, tmp_path: thread.InMemoryDatabase(),
+    "columnar": lambda thread, tmp_path: thread.ColumnarDatabase(),
+    "cached": lambda thread, tmp_path: thread.CachedDatabase(thread.RealDatabase(str(tmp_path / "p.db"))),
+}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pages_follow_the_cursor(thread, tmp_path, backend):
+    database = BACKENDS[backend](thread, tmp_path)
+    user = database.create_user("alice", "secret")
+    posts = [database.create_post(user, f"post {i}") for i in range(23)]
+    seen, after = [], None
+    while True:
+        page = database.get_posts_page(after, 5)
+        assert len(page) <= 5
+        if not page:
+            break
+        seen += [post.id for post in page]
+        after = page[-1].id
+    assert seen == [post.id for post in posts]
+    new = database.create_post(user, "écrit pendant la pagination")
+    assert [post.id for post in database.get_posts_page(after, 5)] == [new.id]
+    database.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_iter_posts_streams_every_post(thread, tmp_path, backend):
+    database = BACKENDS[backend](thread, tmp_path)
+    user = database.create_user("alice", "secret")
+    posts = [database.create_post(user, f"post {i}") for i in range(23)]
+    database.add_comment(posts[7], user, "commentaire")
+    iterator = database.iter_posts(batch_size=4)
+    assert next(iterator).id == posts[0].id # Générateur : rien n'est lu d'avance
+    rest = list(iterator)
+    assert [post.id for post in rest] == [post.id for post in posts[1:]]
+    assert [comment.text for comment in rest[6].comments] == ["commentaire"]
+    database.close()
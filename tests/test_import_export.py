@@ -0,0 +1,124 @@
+import pytest
+
+
+# user-020 : import / export en flux (JSONL et CSV) avec point de reprise
+def _source(thread):
+    # Les ids de commentaires ne suivent pas l'ordre des posts : l'export les ressort dans le désordre
+    database = thread.InMemoryDatabase()
+    alice = database.create_user("alice", "secret")
+    bob = database.create_user("bob", "hunter2")
+    first = database.create_post(alice, "premier post")
+    second = database.create_post(bob, "second post")
+    database.add_comment(second, alice, "C1 sur le second")
+    database.add_comment(first, bob, "C2 sur le premier")
+    database.add_comment(second, bob, "C3 sur le second")
+    database.create_post(alice, "troisième post, sans commentaire")
+    return database
+
+
+def _dump(thread, database):
+    return sorted(
+        tuple(sorted((key, value) for key, value in record.items() if key != "password"))
+        for record in thread.iter_records(database)
+    )
+
+
+@pytest.mark.parametrize("name", ["export.jsonl", "export.csv"])
+def test_round_trip_into_persisted_database(thread, tmp_path, name):
+    source = _source(thread)
+    path = str(tmp_path / name)
+    assert thread.export_data(source, path) == 8
+    snapshot = str(tmp_path / "target.snap")
+    target = thread.InMemoryDatabase(snapshot)
+    assert thread.import_data(target, path) == 8
+    assert _dump(thread, target) == _dump(thread, source)
+    target.close()
+    reopened = thread.InMemoryDatabase(snapshot)
+    assert _dump(thread, reopened) == _dump(thread, source)
+    assert [comment.text for comment in reopened.get_post(2).comments] == ["C1 sur le second", "C3 sur le second"]
+    reopened.close()
+
+
+def test_import_into_real_database_keeps_ids(thread, tmp_path):
+    source = _source(thread)
+    path = str(tmp_path / "export.csv")
+    thread.export_data(source, path)
+    target = thread.RealDatabase(str(tmp_path / "target.db"))
+    thread.import_data(target, path)
+    assert _dump(thread, target) == _dump(thread, source)
+    assert target.get_user("bob") is not None
+    target.close()
+
+
+def test_import_twice_adds_nothing(thread, tmp_path):
+    source = _source(thread)
+    path = str(tmp_path / "export.jsonl")
+    thread.export_data(source, path)
+    target = thread.InMemoryDatabase()
+    thread.import_data(target, path)
+    thread.import_data(target, path)
+    assert _dump(thread, target) == _dump(thread, source)
+
+
+def test_interrupted_import_resumes_from_checkpoint(thread, tmp_path):
+    source = _source(thread)
+    path = str(tmp_path / "export.jsonl")
+    thread.export_data(source, path)
+    target = thread.InMemoryDatabase()
+    import_comments_bulk = target.import_comments_bulk
+    calls = []
+
+    def failing(comments):
+        calls.append(list(comments))
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return import_comments_bulk(comments)
+
+    target.import_comments_bulk = failing
+    with pytest.raises(KeyboardInterrupt):
+        thread.import_data(target, path, batch_size=3)
+    checkpoint = tmp_path / "export.jsonl.checkpoint"
+    assert thread._read_checkpoint(str(checkpoint), path) == 3
+
+    resumed = []
+    target.import_comments_bulk = lambda comments: resumed.extend(comments) or import_comments_bulk(comments)
+    assert thread.import_data(target, path, batch_size=3) == 8
+    assert not checkpoint.exists()
+    assert [comment[0] for comment in resumed] == [2, 1, 3] # Le premier lot n'est pas relu
+    assert _dump(thread, target) == _dump(thread, source)
+
+
+def test_checkpoint_of_another_file_is_ignored(thread, tmp_path):
+    source = _source(thread)
+    path = str(tmp_path / "export.jsonl")
+    thread.export_data(source, path)
+    checkpoint = str(tmp_path / "export.jsonl.checkpoint")
+    thread._write_checkpoint(checkpoint, path, 5)
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"type": "user", "username": "carol", "password": "x"}\n')
+    assert thread._read_checkpoint(checkpoint, path) == 0
+
+
+def test_unknown_record_type_is_rejected(thread, tmp_path):
+    path = tmp_path / "export.jsonl"
+    path.write_text('{"type": "like", "id": 1}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        thread.import_data(thread.InMemoryDatabase(), str(path))
+
+
+# user-014 : les mots de passe en clair d'un export ne sont pas enregistrés tels quels
+def test_import_hashes_plaintext_passwords(thread, tmp_path):
+    source = _source(thread)
+    source.update_password(source.get_user("bob"), thread.hash_password("hunter2", n=2 ** 10))
+    kept = source.get_user("bob").password
+    path = str(tmp_path / "export.jsonl")
+    thread.export_data(source, path)
+    target = thread.InMemoryDatabase()
+    credentials = thread.Credentials(n=2 ** 10)
+    try:
+        thread.import_data(target, path, credentials=credentials)
+    finally:
+        credentials.close()
+    assert thread.verify_password("secret", target.get_user("alice").password)
+    assert not thread.needs_rehash(target.get_user("alice").password)
+    assert target.get_user("bob").password == kept # Une empreinte n'est pas recalculée
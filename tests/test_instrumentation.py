@@ -0,0 +1,58 @@
+import sys
+
+
+# user-017 : instrumentation des appels à la base et profil des actions de l'app
+def _instrumented(thread, tmp_path):
+    database = thread.InstrumentedDatabase(thread.RealDatabase(str(tmp_path / "i.db")))
+    user = database.create_user("alice", "secret")
+    for i in range(5):
+        database.add_comment(database.create_post(user, f"post {i}"), user, f"commentaire {i}")
+    database.reset()
+    return database, user
+
+
+def test_calls_and_sql_statements_are_counted_per_action(thread, tmp_path):
+    database, user = _instrumented(thread, tmp_path)
+    with database.action("feed"):
+        database.get_posts()
+        database.get_user("alice")
+        print("écrit dans le terminal")
+    stats = database.actions["feed"]
+    assert stats["runs"] == 1 and stats["calls"] == 2
+    assert stats["statements"] == stats["max_statements"] >= 3
+    assert stats["output"] > 0
+    assert database.calls["get_posts"][0] == 1
+    assert any("username = ?" in statement for statement in database.statements)
+    assert all("'alice'" not in statement for statement in database.statements) # Littéraux remplacés par ?
+    summary = database.summary()
+    assert "feed" in summary and "get_posts" in summary
+    database.close()
+
+
+def test_action_can_be_profiled(thread, tmp_path):
+    database, user = _instrumented(thread, tmp_path)
+    stdout = sys.stdout
+    with database.action("recherche", profile="all"):
+        database.search("post")
+    assert "cProfile de recherche" in database.last_profile
+    assert "tracemalloc de recherche" in database.last_profile
+    assert sys.stdout is stdout # Sortie du terminal restaurée
+    database.close()
+
+
+def test_app_measures_menu_actions_once_enabled(thread):
+    app = thread.AppCmd(thread.InMemoryDatabase(), thread.Credentials(n=2 ** 10))
+    calls = []
+    app.perform(lambda: calls.append("sans mesure"))
+    app.enable_instrumentation()
+    database = app._service.database
+    assert isinstance(database, thread.InstrumentedDatabase)
+
+    def show_random():
+        database.get_random_post()
+    app.perform(show_random)
+    app.enable_instrumentation() # Sans effet : déjà en place
+    assert app._service.database is database
+    assert calls == ["sans mesure"]
+    assert database.actions["show_random"]["calls"] == 1
+    app.close()
@@ -0,0 +1,94 @@
+import concurrent.futures
+
+import pytest
+
+
+# user-008 : InMemoryDatabase indexée, ids stables sous charge
+def test_posts_are_indexed_by_id_and_author(thread):
+    database = thread.InMemoryDatabase()
+    alice = database.create_user("alice", "secret")
+    bob = database.create_user("bob", "secret")
+    posts = [database.create_post((alice, bob)[i % 2], f"post {i}") for i in range(10)]
+    assert [post.id for post in posts] == list(range(1, 11))
+    assert database.get_post(7) is posts[6]
+    assert database.get_post(0) is None and database.get_post(11) is None
+    assert [post.id for post in database.get_posts_by_user("bob")] == [2, 4, 6, 8, 10]
+    assert database.get_posts_by_user("inconnu") == []
+    comment = database.add_comment(posts[2], bob, "commentaire")
+    assert database.get_comments_for_post(posts[2]) == [comment]
+
+
+def test_concurrent_writers_get_unique_ids(thread):
+    database = thread.InMemoryDatabase()
+    users = [database.create_user(f"user{i}", "secret") for i in range(8)]
+
+    def write(number):
+        post = database.create_post(users[number % 8], f"post {number}")
+        return post.id, database.add_comment(post, users[(number + 1) % 8], f"comment {number}").id
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(write, range(400)))
+    post_ids = sorted(post_id for post_id, comment_id in results)
+    comment_ids = sorted(comment_id for post_id, comment_id in results)
+    assert post_ids == list(range(1, 401))
+    assert comment_ids == list(range(1, 401))
+    assert [post.id for post in database.get_posts()] == post_ids # Liste gardée triée
+    assert sum(len(database.get_posts_by_user(f"user{i}")) for i in range(8)) == 400
+
+
+def test_imported_ids_keep_the_next_id_above_them(thread):
+    database = thread.InMemoryDatabase()
+    database.import_users_bulk([("alice", "secret")])
+    database.import_posts_bulk([(10, "alice", "importé")])
+    database.import_comments_bulk([(20, 10, "alice", "importé")])
+    alice = database.get_user("alice")
+    post = database.create_post(alice, "nouveau")
+    assert post.id == 11
+    assert database.add_comment(post, alice, "nouveau").id == 21
+
+
+# user-009 : modèles à __slots__ et stockage en colonnes
+def test_models_have_no_instance_dict(thread):
+    database = thread.InMemoryDatabase()
+    user = database.create_user("alice", "secret")
+    post = database.create_post(user, "post")
+    comment = database.add_comment(post, user, "commentaire")
+    for model in (user, post, comment):
+        assert not hasattr(model, "__dict__")
+        with pytest.raises(AttributeError):
+            model.extra = 1
+
+
+def _scenario(database):
+    users = [database.create_user(f"user{i}", "secret") for i in range(4)]
+    posts = [database.create_post(users[i % 4], f"post numéro {i}") for i in range(30)]
+    for i in range(0, 30, 3):
+        database.add_comment(posts[i], users[(i + 1) % 4], f"commentaire {i}")
+    database.follow(users[0], users[1])
+    return [
+        [(p.id, p.user.username, p.text, [(c.id, c.user.username, c.text) for c in p.comments]) for p in database.get_posts()],
+        [p.id for p in database.get_posts_by_user("user2")],
+        [p.id for p in database.get_posts_page(10, 5)],
+        [p.id for p in database.get_timeline(users[0], None, 8)],
+        [p.id for p in database.search("numéro 12")][:1],
+        [c.text for c in database.get_comments_for_post(database.get_post(4))],
+    ]
+
+
+def test_columnar_database_matches_in_memory_database(thread):
+    assert _scenario(thread.ColumnarDatabase()) == _scenario(thread.InMemoryDatabase())
+
+
+def test_columnar_database_uses_less_memory(thread):
+    import tracemalloc
+    sizes = {}
+    for database_class in (thread.InMemoryDatabase, thread.ColumnarDatabase):
+        tracemalloc.start()
+        database = database_class()
+        user = database.create_user("alice", "secret")
+        for i in range(3000):
+            database.add_comment(database.create_post(user, f"post {i}"), user, "commentaire")
+        sizes[database_class.__name__] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del database
+    assert sizes["ColumnarDatabase"] < sizes["InMemoryDatabase"]
@@ -0,0 +1,140 @@
+import pytest
+
+
+# user-010 : sauvegarde binaire et journal d'InMemoryDatabase
+def _fill(thread, path, post_count=5):
+    database = thread.InMemoryDatabase(str(path))
+    user = database.create_user("alice", "secret")
+    for i in range(post_count):
+        database.create_post(user, f"post {i}")
+    database.close()
+
+
+def _record_offsets(thread, path):
+    # Positions des enregistrements du journal (en-tête, puis un enregistrement par écriture)
+    data = path.read_bytes()
+    offsets = []
+    offset = len(thread.InMemoryDatabase.JOURNAL_MAGIC)
+    while offset < len(data):
+        offsets.append(offset)
+        kind = data[offset:offset + 1]
+        position = offset + {b"U": 1, b"P": 9, b"C": 17}[kind]
+        for _ in range(2):
+            position += 4 + int.from_bytes(data[position:position + 4], "little")
+        offset = position + 4
+    return offsets
+
+
+def test_journal_is_replayed_after_reopen(thread, tmp_path):
+    path = tmp_path / "snap.bin"
+    _fill(thread, path)
+    database = thread.InMemoryDatabase(str(path))
+    assert [post.text for post in database.get_posts()] == [f"post {i}" for i in range(5)]
+    database.close()
+
+
+def test_incomplete_last_record_is_truncated(thread, tmp_path):
+    path = tmp_path / "snap.bin"
+    _fill(thread, path)
+    journal = tmp_path / "snap.bin.wal"
+    data = journal.read_bytes()
+    journal.write_bytes(data[:-3])
+    database = thread.InMemoryDatabase(str(path))
+    assert [post.text for post in database.get_posts()] == [f"post {i}" for i in range(4)]
+    database.create_post(database.get_user("alice"), "after")
+    database.close()
+    database = thread.InMemoryDatabase(str(path))
+    assert [post.text for post in database.get_posts()][-1] == "after"
+    database.close()
+
+
+@pytest.mark.parametrize("damage", ["kind", "text"])
+def test_corrupt_record_in_the_middle_raises_without_truncating(thread, tmp_path, damage):
+    path = tmp_path / "snap.bin"
+    _fill(thread, path)
+    journal = tmp_path / "snap.bin.wal"
+    data = bytearray(journal.read_bytes())
+    second_post = _record_offsets(thread, journal)[2]
+    data[second_post if damage == "kind" else second_post + 20] ^= 0xFF
+    journal.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="corrompu"):
+        thread.InMemoryDatabase(str(path))
+    assert journal.read_bytes() == bytes(data)
+
+
+def test_corrupt_snapshot_raises(thread, tmp_path):
+    path = tmp_path / "snap.bin"
+    _fill(thread, path)
+    database = thread.InMemoryDatabase(str(path))
+    database.compact()
+    database.close()
+    data = bytearray(path.read_bytes())
+    data[-10] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        thread.InMemoryDatabase(str(path))
+    path.write_bytes(bytes(data[:-10]))
+    with pytest.raises(ValueError, match="tronqué ou corrompu"):
+        thread.InMemoryDatabase(str(path))
+
+
+def test_compact_without_snapshot_is_a_no_op(thread):
+    database = thread.InMemoryDatabase()
+    database.create_user("alice", "secret")
+    database.compact()
+    assert database.get_user("alice").password == "secret"
+
+
+def test_compaction_can_be_left_to_explicit_calls(thread, tmp_path):
+    path = tmp_path / "snap.bin"
+    database = thread.InMemoryDatabase(str(path), compact_every=None)
+    user = database.create_user("alice", "secret")
+    for i in range(20):
+        database.create_post(user, f"post {i}")
+    assert not path.exists() # Aucune réécriture pendant les écritures
+    database.compact()
+    database.close()
+    assert [post.text for post in thread.InMemoryDatabase(str(path)).get_posts()] == [f"post {i}" for i in range(20)]
+
+
+@pytest.mark.parametrize("backend", ["InMemoryDatabase", "ColumnarDatabase"])
+def test_existing_username_is_rejected(thread, backend):
+    import sqlite3
+    database = getattr(thread, backend)()
+    database.create_user("alice", "secret")
+    with pytest.raises(sqlite3.IntegrityError):
+        database.create_user("alice", "autre")
+    assert database.get_user("alice").password == "secret"
+
+
+def test_signup_of_existing_user_keeps_password_after_reopen(thread, tmp_path):
+    path = str(tmp_path / "snap.bin")
+    service = thread.AppService(thread.InMemoryDatabase(path), thread.Credentials(n=2 ** 10))
+    service.signup("alice", "secret")
+    with pytest.raises(thread.AppError):
+        service.signup("alice", "autre")
+    service.close()
+    service = thread.AppService(thread.InMemoryDatabase(path), thread.Credentials(n=2 ** 10))
+    assert service.login("alice", "secret")
+    service.close()
+
+
+def test_compaction_threshold_keeps_comments_and_follows(thread, tmp_path):
+    path = str(tmp_path / "db.snap")
+    database = thread.InMemoryDatabase(path, compact_every=4)
+    alice = database.create_user("alice", "secret")
+    bob = database.create_user("bob", "secret")
+    posts = [database.create_post((alice, bob)[i % 2], f"post {i}") for i in range(6)]
+    database.add_comment(posts[1], alice, "commentaire")
+    database.follow(alice, bob)
+    database.follow(bob, alice)
+    database.unfollow(bob, alice)
+    assert (tmp_path / "db.snap").exists() # Le seuil a déclenché au moins une réécriture
+    database.close()
+    reopened = thread.InMemoryDatabase(path)
+    assert [post.text for post in reopened.get_posts()] == [f"post {i}" for i in range(6)]
+    assert [comment.text for comment in reopened.get_post(2).comments] == ["commentaire"]
+    assert [post.id for post in reopened.get_timeline(reopened.get_user("alice"), None, 10)] == [6, 5, 4, 3, 2, 1]
+    assert [post.id for post in reopened.get_timeline(reopened.get_user("bob"), None, 10)] == [6, 4, 2]
+    assert reopened.create_post(reopened.get_user("alice"), "après").id == 7
+    reopened.close()
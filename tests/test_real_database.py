@@ -0,0 +1,159 @@
+import pytest
+
+
+# user-005 / user-006 : une lecture voit les écritures du même thread, même avant leur commit
+@pytest.mark.parametrize("options", [
+    {"commit_every": 1},
+    {"commit_every": None},
+    {"commit_every": 50},
+    {"commit_every": None, "commit_interval_ms": 60000},
+])
+def test_reads_see_own_uncommitted_writes(thread, tmp_path, options):
+    database = thread.RealDatabase(str(tmp_path / "g.db"), **options)
+    user = database.create_user("a", "secret")
+    assert database.get_user("a").username == "a"
+    post = database.create_post(user, "hello")
+    assert [p.id for p in database.get_posts_page()] == [post.id]
+    database.add_comment(post, user, "first")
+    assert [c.text for c in database.get_post(post.id).comments] == ["first"]
+    database.close()
+    reopened = thread.RealDatabase(str(tmp_path / "g.db"))
+    assert reopened.get_post(post.id).text == "hello"
+    reopened.close()
+
+
+# user-006 : une connexion de lecture par thread, un seul écrivain, parcours sans verrou tenu
+def test_reads_from_another_thread_after_flush(thread, tmp_path):
+    import threading
+    database = thread.RealDatabase(str(tmp_path / "g.db"), commit_every=None)
+    database.create_user("a", "secret")
+    database.flush()
+    result = []
+    worker = threading.Thread(target=lambda: result.append(database.get_user("a")))
+    worker.start()
+    worker.join()
+    assert result[0].username == "a"
+    database.close()
+
+
+@pytest.mark.parametrize("options", [{"commit_every": None}, {"commit_every": 1}])
+def test_half_consumed_iteration_does_not_block_writers(thread, tmp_path, options):
+    import threading
+    database = thread.RealDatabase(str(tmp_path / "g.db"), **options)
+    user = database.create_user("a", "secret")
+    database.create_posts_bulk((user, f"post {i}") for i in range(10))
+    posts = database.iter_posts(batch_size=3)
+    users = database.iter_users(batch_size=1)
+    next(posts)
+    next(users)
+    writer = threading.Thread(target=lambda: database.create_post(user, "pendant le parcours"))
+    writer.start()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+    assert len(list(posts)) == 10 # Le post créé pendant le parcours a un id plus grand : il est lu aussi
+    database.close()
+
+
+def test_concurrent_sessions_read_while_writing(thread, tmp_path):
+    import concurrent.futures
+    database = thread.RealDatabase(str(tmp_path / "g.db"))
+    user = database.create_user("a", "secret")
+    database.create_posts_bulk((user, f"post {i}") for i in range(50))
+
+    def session(number):
+        if number % 4 == 0:
+            database.create_post(user, f"session {number}")
+            return True
+        return len(database.get_posts_page(None, 10)) == 10 and database.get_random_post() is not None
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        assert all(executor.map(session, range(40)))
+    assert len(database.get_posts()) == 60
+    assert 1 < len(database._readers) <= 8 # Les connexions de lecture sont réutilisées par thread
+    database.close()
+
+
+def test_iteration_on_memory_database(thread):
+    database = thread.RealDatabase(":memory:")
+    user = database.create_user("a", "secret")
+    database.create_posts_bulk((user, f"post {i}") for i in range(7))
+    assert [post.text for post in database.iter_posts(batch_size=2)] == [f"post {i}" for i in range(7)]
+    assert [user.username for user in database.iter_users()] == ["a"]
+    database.close()
+
+
+# user-005 : une écriture groupée qui échoue ne laisse ni transaction ouverte ni compteur faussé
+@pytest.mark.parametrize("options", [{"commit_every": 1}, {"commit_every": None}])
+def test_failed_bulk_write_closes_its_transaction(thread, tmp_path, options):
+    import sqlite3
+    path = str(tmp_path / "g.db")
+    database = thread.RealDatabase(path, **options)
+    database.create_user("a", "secret")
+    database.flush()
+    with pytest.raises(sqlite3.IntegrityError):
+        database.create_users_bulk([("b", "secret"), ("a", "secret")])
+    assert not database.database_connection.in_transaction
+    assert database._pending_writes == 0
+    other = sqlite3.connect(path, timeout=0) # Le verrou du fichier est libéré
+    other.execute("INSERT INTO Users (username, password) VALUES ('c', 'secret')")
+    other.commit()
+    other.close()
+    database.create_user("d", "secret")
+    database.close()
+    reopened = thread.RealDatabase(path)
+    assert [reopened.get_user(name) is not None for name in "abcd"] == [True, False, True, True]
+    reopened.close()
+
+
+def test_failed_bulk_write_keeps_earlier_pending_writes(thread, tmp_path):
+    import sqlite3
+    path = str(tmp_path / "g.db")
+    database = thread.RealDatabase(path, commit_every=None)
+    database.create_user("a", "secret")
+    with pytest.raises(sqlite3.IntegrityError):
+        database.create_users_bulk([("b", "secret"), ("a", "secret")])
+    assert database._pending_writes == 1
+    database.close()
+    reopened = thread.RealDatabase(path)
+    assert reopened.get_user("a") is not None and reopened.get_user("b") is None
+    reopened.close()
+
+
+def _committed_users(path):
+    import sqlite3
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM Users").fetchone()[0]
+    finally:
+        connection.close()
+
+
+# user-005 : commit groupé par nombre de lignes ou par délai, journal WAL
+def test_commit_every_groups_writes(thread, tmp_path):
+    path = str(tmp_path / "g.db")
+    database = thread.RealDatabase(path, commit_every=3)
+    assert database.database_connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    database.create_user("a", "secret")
+    database.create_user("b", "secret")
+    assert _committed_users(path) == 0
+    database.create_user("c", "secret")
+    assert _committed_users(path) == 3
+    database.create_users_bulk([(f"bulk{i}", "secret") for i in range(5)]) # Un lot dépasse le seuil d'un coup
+    assert _committed_users(path) == 8
+    database.create_user("d", "secret")
+    database.flush()
+    assert _committed_users(path) == 9
+    database.close()
+
+
+def test_commit_interval_flushes_in_the_background(thread, tmp_path):
+    import time
+    path = str(tmp_path / "g.db")
+    database = thread.RealDatabase(path, commit_every=None, commit_interval_ms=50)
+    database.create_user("a", "secret")
+    deadline = time.monotonic() + 5
+    while _committed_users(path) == 0 and time.monotonic() < deadline:
+        time.sleep(0.02) # Aucune nouvelle écriture : le thread de fond valide seul
+    assert _committed_users(path) == 1
+    assert database._pending_writes == 0
+    database.close()
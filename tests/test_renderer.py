@@ -0,0 +1,35 @@
+# user-011 : rendu des posts en une seule chaîne, mis en cache par (id du post, nombre de commentaires)
+def _post(thread):
+    database = thread.InMemoryDatabase()
+    alice = database.create_user("alice", "secret")
+    post = database.create_post(alice, "première ligne\nune ligne plus longue que le titre")
+    return database, alice, post
+
+
+def test_box_lines_have_the_same_width(thread):
+    database, alice, post = _post(thread)
+    rendered = thread.PostRenderer().render_post(post)
+    lines = [line for line in rendered.split("\n") if line]
+    assert len(lines) == 8 # Haut, vide, titre, vide, deux lignes de texte, vide, bas
+    assert len({len(line) for line in lines}) == 1
+    assert "alice" in lines[2] and "une ligne plus longue que le titre" in lines[5]
+    assert rendered.startswith(thread.PostRenderer.POST_PREFIX)
+
+
+def test_comments_are_drawn_under_the_post(thread):
+    database, alice, post = _post(thread)
+    database.add_comment(post, alice, "un commentaire")
+    rendered = thread.PostRenderer().render_post(post)
+    post_box, comment_box = rendered.split("\n\n\n")
+    assert "un commentaire" not in post_box
+    assert all(line.startswith(thread.PostRenderer.COMMENT_PREFIX) for line in comment_box.split("\n") if line)
+
+
+def test_render_is_cached_until_a_comment_is_added(thread):
+    database, alice, post = _post(thread)
+    renderer = thread.PostRenderer()
+    first = renderer.render_post(post)
+    assert renderer.render_post(post) is first # Pas de nouveau dessin
+    database.add_comment(post, alice, "nouveau")
+    second = renderer.render_post(post)
+    assert second is not first and "nouveau" in second
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+
+# user-004 : index, migrations et réglages du backend SQLite
+def _plan(connection, sql, parameters=()):
+    return " ".join(row[-1] for row in connection.execute("EXPLAIN QUERY PLAN " + sql, parameters))
+
+
+def test_feed_queries_use_the_indexes(thread, tmp_path):
+    database = thread.RealDatabase(str(tmp_path / "s.db"))
+    connection = database.database_connection
+    assert "idx_comments_post_id" in _plan(connection, "SELECT username FROM Comments WHERE post_id = ?", (1,))
+    assert "idx_posts_username" in _plan(connection, "SELECT id FROM Posts WHERE username = ?", ("alice",))
+    database.close()
+
+
+def test_old_file_is_migrated_in_place(thread, tmp_path):
+    path = str(tmp_path / "old.db")
+    connection = sqlite3.connect(path) # Schéma d'origine, sans index ni version
+    connection.execute("CREATE TABLE Users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, password TEXT NOT NULL)")
+    connection.execute("CREATE TABLE Posts (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, text TEXT NOT NULL)")
+    connection.execute("CREATE TABLE Comments (id INTEGER PRIMARY KEY AUTOINCREMENT, post_id INTEGER NOT NULL, username TEXT NOT NULL, text TEXT NOT NULL)")
+    connection.execute("INSERT INTO Users (username, password) VALUES ('alice', 'secret')")
+    connection.execute("INSERT INTO Posts (username, text) VALUES ('alice', 'ancien post')")
+    connection.commit()
+    connection.close()
+    database = thread.RealDatabase(path)
+    version = database.database_connection.execute("PRAGMA user_version").fetchone()[0]
+    indexes = {row[0] for row in database.database_connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert version == 5
+    assert {"idx_comments_post_id", "idx_posts_username"} <= indexes
+    assert database.get_post(1).text == "ancien post"
+    database.close()
+
+
+def test_pragmas_are_applied_and_checked(thread, tmp_path):
+    database = thread.RealDatabase(str(tmp_path / "s.db"), synchronous="FULL", cache_size=-4000)
+    connection = database.database_connection
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert connection.execute("PRAGMA synchronous").fetchone()[0] == 2
+    assert connection.execute("PRAGMA cache_size").fetchone()[0] == -4000
+    database.close()
+    with pytest.raises(ValueError):
+        thread.RealDatabase(str(tmp_path / "t.db"), journal_mode="FAST")
+    with pytest.raises(ValueError):
+        thread.RealDatabase(str(tmp_path / "t.db"), synchronous="SOMETIMES")
+
+
+def test_conversion_to_compact_layout_keeps_the_data(thread, tmp_path):
+    path = str(tmp_path / "c.db")
+    database = thread.RealDatabase(path)
+    alice = database.create_user("alice", "secret")
+    post = database.create_post(alice, "avant conversion")
+    database.add_comment(post, alice, "commentaire")
+    database.close()
+    database = thread.RealDatabase(path, compact=True)
+    assert database.compact
+    assert database.get_post(post.id).text == "avant conversion"
+    assert [comment.text for comment in database.get_post(post.id).comments] == ["commentaire"]
+    second = database.create_post(database.get_user("alice"), "après conversion")
+    assert [p.id for p in database.get_posts_by_user("alice")] == [post.id, second.id]
+    database.close()
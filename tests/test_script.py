@@ -0,0 +1,79 @@
+import io
+import sqlite3
+
+import pytest
+
+
+# user-019 : cœur métier sans terminal (AppService) et mode script non interactif
+def _app(thread, database=None):
+    return thread.AppCmd(database or thread.InMemoryDatabase(), thread.Credentials(n=2 ** 10))
+
+
+def test_script_runs_commands_and_counts_errors(thread):
+    app = _app(thread)
+    output = io.StringIO()
+    lines = ["signup alice secret", "login alice secret", "post bonjour", "inconnue", "show abc", "# commentaire", "top"]
+    assert app.run_script(lines, output) == (6, 2)
+    answers = output.getvalue().splitlines()
+    assert answers[2] == "3: post 1"
+    assert answers[3].startswith("4: erreur")
+    assert answers[-1] == "7: posts 1"
+    app.close()
+
+
+def test_backend_error_fails_only_its_line(thread):
+    database = thread.InMemoryDatabase()
+    app = _app(thread, database)
+
+    def locked(user, text):
+        raise sqlite3.OperationalError("database is locked")
+
+    create_post = database.create_post
+    database.create_post = locked
+    output = io.StringIO()
+    lines = ["signup alice secret", "login alice secret", "post perdu", "search perdu"]
+    assert app.run_script(lines, output) == (4, 1)
+    assert "3: erreur: OperationalError: database is locked" in output.getvalue()
+    database.create_post = create_post
+    app.close()
+
+
+def test_interrupted_batch_keeps_buffered_answers(thread):
+    app = _app(thread)
+    output = io.StringIO()
+
+    def lines():
+        yield "signup alice secret"
+        yield "signup bob secret"
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        app.run_script(lines(), output, flush_every=1000)
+    assert output.getvalue().splitlines() == ["1: utilisateur alice créé", "2: utilisateur bob créé"]
+    app.close()
+
+
+def test_service_reports_errors_without_terminal_io(thread, capsys):
+    service = thread.AppService(thread.InMemoryDatabase(), thread.Credentials(n=2 ** 10))
+    statuses = []
+
+    def status(call, *args):
+        with pytest.raises(thread.AppError) as error:
+            call(*args)
+        statuses.append(error.value.status)
+
+    status(service.random_post)
+    service.signup("alice", "secret")
+    status(service.signup, "alice", "autre")
+    status(service.login, "alice", "autre")
+    user = service.session_user(service.login("alice", "secret"))
+    status(service.session_user, "jeton inconnu")
+    status(service.create_post, user, "")
+    post = service.create_post(user, "bonjour")
+    status(service.get_post, post.id + 1)
+    status(service.add_comment, user, post, "")
+    status(service.follow, user, "inconnu")
+    status(service.follow, user, "alice")
+    assert statuses == [404, 409, 401, 401, 400, 404, 400, 404, 400]
+    assert capsys.readouterr() == ("", "")
+    service.close()
@@ -0,0 +1,73 @@
+import pytest
+
+
+# user-012 : recherche plein texte, avec FTS5 ou avec le repli LIKE
+@pytest.mark.parametrize("fts_enabled", [True, False])
+def test_search_ignores_accents_and_case(thread, tmp_path, fts_enabled):
+    database = thread.RealDatabase(str(tmp_path / "s.db"))
+    database.fts_enabled = database.fts_enabled and fts_enabled
+    alice = database.create_user("alice", "secret")
+    cafe = database.create_post(alice, "Un Café crème, s'il vous plaît")
+    other = database.create_post(alice, "rien à voir")
+    database.add_comment(other, alice, "Élève studieux")
+    assert [post.id for post in database.search("cafe CREME")] == [cafe.id]
+    assert [post.id for post in database.search("café")] == [cafe.id]
+    assert [post.id for post in database.search("eleve")] == [other.id]
+    assert database.search("thé") == []
+    database.close()
+
+
+def test_like_fallback_on_reader_threads(thread, tmp_path):
+    import threading
+    database = thread.RealDatabase(str(tmp_path / "s.db"))
+    database.fts_enabled = False
+    alice = database.create_user("alice", "secret")
+    post = database.create_post(alice, "Noël à la montagne")
+    database.flush()
+    result = []
+    worker = threading.Thread(target=lambda: result.append(database.search("noel")))
+    worker.start()
+    worker.join()
+    assert [p.id for p in result[0]] == [post.id]
+    database.close()
+
+
+def test_inverted_index_ranks_by_bm25(thread):
+    index = thread.InvertedIndex()
+    index.add(1, "le chat dort")
+    index.add(2, "chat chat chat")
+    index.add(3, "le chien")
+    index.add(3, "un commentaire sur le chat")
+    assert index.search("CHAT")[0] == 2
+    assert set(index.search("chat")) == {1, 2, 3}
+    assert index.search("chien") == [3]
+    assert index.search("oiseau") == []
+
+
+def test_inverted_index_stores_term_frequencies(thread):
+    index = thread.InvertedIndex()
+    index.add(1, "chat chat chien")
+    index.add(1, "un chat de plus")
+    index.add(2, "chat")
+    assert index.postings["chat"] == {1: 3, 2: 1}
+    assert index.postings["chien"] == {1: 1}
+    assert index.lengths[1] == 7 and index.document_count == 2
+
+
+@pytest.mark.parametrize("factory", [
+    lambda thread, tmp_path: thread.RealDatabase(str(tmp_path / "s.db")),
+    lambda thread, tmp_path: thread.InMemoryDatabase(),
+    lambda thread, tmp_path: thread.ColumnarDatabase(),
+], ids=["sqlite", "memory", "columnar"])
+def test_comments_make_their_post_match(thread, tmp_path, factory):
+    database = factory(thread, tmp_path)
+    alice = database.create_user("alice", "secret")
+    posts = [database.create_post(alice, f"post {i}") for i in range(5)]
+    database.add_comment(posts[3], alice, "une remarque sur les Châteaux")
+    database.create_post(alice, "châteaux châteaux châteaux")
+    found = [post.id for post in database.search("chateaux")]
+    assert sorted(found) == [posts[3].id, 6]
+    assert found[0] == 6 # Le post qui répète le mot est le plus pertinent
+    assert [post.id for post in database.search("CHÂTEAUX", limit=1)] == [6]
+    assert database.search("   ") == []
+    database.close()
@@ -0,0 +1,105 @@
+import pytest
+
+
+# user-022 : base répartie sur plusieurs fichiers SQLite, un processus d'écriture par shard
+@pytest.fixture
+def sharded(thread, tmp_path):
+    database = thread.ShardedDatabase(str(tmp_path / "shard.db"), shard_count=3)
+    yield database
+    database.close()
+
+
+def _populate(database, post_count=20):
+    users = [database.create_user(f"user{i}", "secret") for i in range(5)]
+    posts = [database.create_post(users[i % 5], f"post {i}") for i in range(post_count)]
+    return users, posts
+
+
+def test_every_post_id_can_be_read_back(sharded):
+    users, posts = _populate(sharded)
+    assert min(post.id for post in posts) >= 1
+    assert len({post.id for post in posts}) == 20
+    for post in posts:
+        assert sharded.get_post(post.id).text == post.text
+    assert sharded.get_post(0) is None
+    assert sharded.get_post(max(post.id for post in posts) + 3) is None
+
+
+def test_imported_low_ids_are_kept(thread, sharded):
+    sharded.import_users_bulk([("alice", "secret")])
+    sharded.import_posts_bulk([(post_id, "alice", f"post {post_id}") for post_id in range(1, 7)])
+    sharded.import_comments_bulk([(1, 2, "alice", "sur le post 2")])
+    assert [post.id for post in sharded.get_posts()] == list(range(1, 7))
+    for post_id in range(1, 7):
+        assert sharded.get_post(post_id).text == f"post {post_id}"
+    assert [comment.text for comment in sharded.get_post(2).comments] == ["sur le post 2"]
+
+
+def test_pages_and_timeline_follow_global_ids(sharded):
+    users, posts = _populate(sharded)
+    seen, after = [], None
+    while True:
+        page = sharded.get_posts_page(after, 4)
+        if not page:
+            break
+        seen += [post.id for post in page]
+        after = page[-1].id
+    assert seen == sorted(post.id for post in posts)
+    sharded.follow(users[0], users[1])
+    expected = sorted((post.id for post in posts if post.user.username in ("user0", "user1")), reverse=True)
+    first = sharded.get_timeline(users[0], None, 3)
+    second = sharded.get_timeline(users[0], first[-1].id, 100)
+    assert [post.id for post in first + second] == expected
+
+
+def test_two_instances_never_reuse_comment_ids(thread, tmp_path):
+    # Deux instances = deux ensembles de processus d'écriture sur les mêmes fichiers
+    path = str(tmp_path / "shared.db")
+    first = thread.ShardedDatabase(path, shard_count=3)
+    second = thread.ShardedDatabase(path, shard_count=3)
+    try:
+        users, posts = _populate(first, post_count=6)
+        expected = []
+        for i in range(12):
+            database = (first, second)[i % 2]
+            post, user = posts[i % 6], users[i % 5]
+            expected.append(database.add_comment(post, user, f"comment {i}").id)
+        second.add_comments_bulk([(post, users[0], f"bulk {post.id}") for post in posts])
+        first.add_comments_bulk([(post, users[1], f"bulk bis {post.id}") for post in posts])
+        comments = [comment for post in first.get_posts() for comment in post.comments]
+        ids = [comment.id for comment in comments]
+        assert len(comments) == 24
+        assert len(set(ids)) == 24
+        assert set(expected) <= set(ids)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_comment_ids_stay_above_imported_ids(sharded):
+    users, posts = _populate(sharded, post_count=3)
+    sharded.import_comments_bulk([(100, posts[0].id, "user0", "importé")])
+    comment = sharded.add_comment(posts[1], users[1], "nouveau")
+    assert comment.id > 100
+    assert [c.id for c in sharded.get_post(posts[1].id).comments] == [comment.id]
+
+
+def test_random_posts_cover_every_post_without_overdrawing_a_shard(thread, sharded):
+    users = [sharded.create_user(f"user{i}", "secret") for i in range(3)]
+    shards = [sharded._shard_of(user.username) for user in users]
+    assert len(set(shards)) > 1 # Des shards de tailles différentes
+    sharded.create_posts_bulk((users[i % 3], f"post {i}") for i in range(5 * 3 + 15))
+    for _ in range(10):
+        posts = sharded.get_random_posts(30)
+        assert len(posts) == 30
+        assert len({post.id for post in posts}) == 30
+    assert len(sharded.get_random_posts(100)) == 30
+
+
+def test_parent_shard_handles_are_read_only(thread, sharded):
+    import sqlite3
+    assert all(shard.read_only for shard in sharded.shards)
+    with pytest.raises(sqlite3.OperationalError):
+        sharded.shards[0].create_user("intrus", "secret")
+    assert sharded.create_user("alice", "secret").username == "alice"
+    assert sharded.get_user("alice") is not None
@@ -0,0 +1,48 @@
+import pytest
+
+
+# user-013 : fil d'actualité précalculé (fan-out à l'écriture, fusion à la lecture pour les auteurs très suivis)
+BACKENDS = {
+    "sqlite": lambda thread, tmp_path: thread.RealDatabase(str(tmp_path / "t.db")),
+    "memory": lambda thread, tmp_path: thread.InMemoryDatabase(),
+    "columnar": lambda thread, tmp_path: thread.ColumnarDatabase(),
+}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_timeline_follows_and_unfollows(thread, tmp_path, backend):
+    database = BACKENDS[backend](thread, tmp_path)
+    alice, bob, carol = (database.create_user(name, "secret") for name in ("alice", "bob", "carol"))
+    old = database.create_post(bob, "avant l'abonnement")
+    database.follow(alice, bob)
+    mine = database.create_post(alice, "le mien")
+    new = database.create_post(bob, "après l'abonnement")
+    database.create_post(carol, "pas suivie")
+    assert [post.id for post in database.get_timeline(alice)] == [new.id, mine.id, old.id]
+    first = database.get_timeline(alice, None, 2)
+    assert [post.id for post in database.get_timeline(alice, first[-1].id, 2)] == [old.id]
+    database.unfollow(alice, bob)
+    assert [post.id for post in database.get_timeline(alice)] == [mine.id]
+    with pytest.raises(ValueError):
+        database.follow(alice, alice)
+    database.close()
+
+
+def test_celebrity_posts_are_merged_at_read_time(thread):
+    store = thread.TimelineStore(fanout_limit=1)
+    posts = {"star": [1, 3, 5], "ami": [2]}
+    store.follow("alice", "ami", posts["ami"])
+    store.follow("alice", "star", posts["star"])
+    store.follow("bob", "star", posts["star"])
+    assert store.is_celebrity("star") and not store.is_celebrity("ami")
+    store.publish("star", 7) # Pas de fan-out : seul le fil de l'auteur est écrit
+    posts["star"].append(7)
+    assert 7 not in store.timelines["alice"]
+
+    def recent(author, cursor, limit):
+        return [post_id for post_id in posts[author] if cursor is None or post_id < cursor][-limit:]
+
+    assert store.get_timeline("alice", None, 3, recent) == [7, 5, 3]
+    assert store.get_timeline("alice", 3, 10, recent) == [2, 1]
+    store.publish("ami", 8)
+    assert store.timelines["alice"][-1] == 8
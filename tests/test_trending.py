@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+
+# user-021 : posts tendance, compteurs maintenus à l'écriture
+def _backends(thread, tmp_path):
+    return [
+        thread.InMemoryDatabase(),
+        thread.ColumnarDatabase(),
+        thread.RealDatabase(str(tmp_path / "real.db")),
+        thread.RealDatabase(str(tmp_path / "compact.db"), compact=True),
+    ]
+
+
+def test_top_posts_carry_their_comment_count(thread, tmp_path):
+    for database in _backends(thread, tmp_path):
+        user = database.create_user("alice", "secret")
+        quiet = database.create_post(user, "calme")
+        busy = database.create_post(user, "animé")
+        for i in range(3):
+            database.add_comment(busy, user, f"commentaire {i}")
+        database.add_comments_bulk([(quiet, user, "un seul")])
+        top = database.get_top_posts(2)
+        assert [post.id for post in top] == [busy.id, quiet.id], type(database).__name__
+        assert [post.comment_count for post in top] == [3, 1], type(database).__name__
+        database.close()
+
+
+def test_trigger_works_for_other_sqlite_clients(thread, tmp_path):
+    path = str(tmp_path / "real.db")
+    database = thread.RealDatabase(path)
+    user = database.create_user("alice", "secret")
+    post = database.create_post(user, "bonjour")
+    database.close()
+    # Connexion sans aucune fonction de l'app, comme la commande sqlite3
+    connection = sqlite3.connect(path)
+    before = connection.execute("SELECT hot FROM Posts WHERE id = ?", (post.id,)).fetchone()[0]
+    connection.execute("INSERT INTO Comments (post_id, username, text) VALUES (?, 'alice', 'externe')", (post.id,))
+    connection.commit()
+    count, after = connection.execute("SELECT comment_count, hot FROM Posts WHERE id = ?", (post.id,)).fetchone()
+    connection.close()
+    assert count == 1
+    assert after == pytest.approx(thread.hot_add(before, thread.hot_points(__import__("time").time())), abs=1e-3)
+
+
+def test_old_trigger_is_replaced_on_open(thread, tmp_path):
+    path = str(tmp_path / "real.db")
+    thread.RealDatabase(path).close()
+    connection = sqlite3.connect(path)
+    connection.execute("DROP TRIGGER trending_comment")
+    connection.execute("CREATE TRIGGER trending_comment AFTER INSERT ON Comments BEGIN UPDATE Posts SET hot = hot_add(hot, 0) WHERE id = new.post_id; END")
+    connection.execute("PRAGMA user_version = 4")
+    connection.commit()
+    connection.close()
+    thread.RealDatabase(path).close()
+    connection = sqlite3.connect(path)
+    sql = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'trending_comment'").fetchone()[0]
+    connection.close()
+    assert "hot_add" not in sql
+
+
+def test_recent_activity_outranks_older_activity(thread):
+    half_life = thread.TRENDING_HALF_LIFE
+    index = thread.TrendingIndex()
+    now = 1_000_000_000
+    for post_id in (1, 2, 3):
+        index.add_post(post_id, now - 4 * half_life)
+    for _ in range(3):
+        index.add_comment(1, now - 3 * half_life) # Trois commentaires anciens
+    index.add_comment(2, now) # Un seul, mais récent : vaut 8 commentaires d'il y a trois demi-vies
+    assert index.top(3) == [2, 1, 3]
+    assert index.comment_counts[1] == 3 and index.comment_counts[2] == 1
+    assert index.top(1) == [2]